@@ -0,0 +1,252 @@
+import logging
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CRYPTO = '24/7'
+NYSE = 'NYSE'
+EURONEXT = 'Euronext'
+
+# Yahoo suffixes / indices traded on Euronext; everything else follows the NYSE calendar
+EURONEXT_SUFFIXES = ('.PA', '.AS', '.BR', '.LS', '.IR')
+EURONEXT_INDICES = ('^FCHI', '^AEX', '^BFX', '^N100')
+
+# Maximum number of consecutive missing sessions filled from a neighbouring price
+FILL_LIMIT = 3
+
+
+def exchange_for_symbol(symbol: str, asset_class: str) -> str:
+    """Exchange calendar an asset trades on"""
+    if asset_class == 'crypto':
+        return CRYPTO
+    if symbol.upper().endswith(EURONEXT_SUFFIXES) or symbol.upper() in EURONEXT_INDICES:
+        return EURONEXT
+    return NYSE
+
+
+def _easter(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-th given weekday of a month (n = -1 for the last one)"""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + (month == 12), month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day: date) -> date:
+    """NYSE rule: Saturday holidays move to Friday, Sunday holidays to Monday"""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def _nyse_holidays(year: int) -> List[date]:
+    holidays = [
+        _observed(date(year, 1, 1)),
+        _nth_weekday(year, 1, 0, 3),        # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),        # Washington's Birthday
+        _easter(year) - timedelta(days=2),  # Good Friday
+        _nth_weekday(year, 5, 0, -1),       # Memorial Day
+        _observed(date(year, 7, 4)),
+        _nth_weekday(year, 9, 0, 1),        # Labor Day
+        _nth_weekday(year, 11, 3, 4),       # Thanksgiving
+        _observed(date(year, 12, 25))
+    ]
+    if year >= 2022:
+        holidays.append(_observed(date(year, 6, 19)))  # Juneteenth
+    return holidays
+
+
+def _euronext_holidays(year: int) -> List[date]:
+    easter = _easter(year)
+    return [
+        date(year, 1, 1),
+        easter - timedelta(days=2),  # Good Friday
+        easter + timedelta(days=1),  # Easter Monday
+        date(year, 5, 1),
+        date(year, 12, 25),
+        date(year, 12, 26)
+    ]
+
+
+HOLIDAY_RULES = {NYSE: _nyse_holidays, EURONEXT: _euronext_holidays}
+
+
+@lru_cache(maxsize=None)
+def _sessions_for_year(exchange: str, year: int) -> np.ndarray:
+    """Trading days of one exchange and year, as sorted datetime64[D]"""
+    days = np.arange(np.datetime64(f'{year}-01-01'), np.datetime64(f'{year + 1}-01-01'), dtype='datetime64[D]')
+    if exchange == CRYPTO:
+        return days
+    days = days[np.is_busday(days)]
+    holidays = np.array(HOLIDAY_RULES[exchange](year), dtype='datetime64[D]')
+    return days[~np.isin(days, holidays)]
+
+
+def trading_days(exchange: str, start: np.datetime64, end: np.datetime64) -> np.ndarray:
+    """Trading days of an exchange between start and end (inclusive), from the per-year cache"""
+    first, last = start.astype(object).year, end.astype(object).year
+    days = np.concatenate([_sessions_for_year(exchange, year) for year in range(first, last + 1)])
+    return days[(days >= start) & (days <= end)]
+
+
+def _fill_forward(values: np.ndarray, limit: int):
+    """
+    Fill NaN cells in place from the value above, over at most `limit`
+    consecutive rows: each pass moves valid values one row down into gaps.
+    """
+    for _ in range(limit):
+        gaps = np.isnan(values[1:]) & ~np.isnan(values[:-1])
+        if not gaps.any():
+            break
+        values[1:][gaps] = values[:-1][gaps]
+
+
+def _bar_keys(index: pd.DatetimeIndex, minutes: int) -> np.ndarray:
+    """
+    Row key of each bar: its day for daily bars. Intraday bars (indexed by
+    their start) are keyed by the end of the clock-aligned interval in
+    which they close (UTC), so a row holds the last price known at that
+    time: an hourly bar [13:30, 14:30) and a bar [14:00, 15:00) both land
+    on 15:00, and no bar is matched with one that closes before it.
+    """
+    if minutes >= 1440:
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        return index.values.astype('datetime64[D]')
+    if index.tz is not None:
+        index = index.tz_convert(None)
+    step = np.int64(minutes * 60 * 10 ** 9)
+    closes = index.as_unit('ns').asi8 + step
+    return (-(-closes // step) * step).view('datetime64[ns]')
+
+
+def _bar_offset(index: pd.DatetimeIndex, minutes: int) -> int:
+    """Most common offset (minutes) of bar starts from the clock-aligned intervals, 0 for daily bars"""
+    if minutes >= 1440 or len(index) == 0:
+        return 0
+    if index.tz is not None:
+        index = index.tz_convert(None)
+    step = np.int64(minutes * 60 * 10 ** 9)
+    offsets, counts = np.unique(index.as_unit('ns').asi8 % step, return_counts=True)
+    return int(offsets[np.argmax(counts)] // (60 * 10 ** 9))
+
+
+def align_frames(frames: List[pd.DataFrame], exchanges: Dict[str, str], minutes: int = 1440,
+                 dtype=np.float64) -> Tuple[pd.DataFrame, Dict]:
+    """
+    Align price frames from several sources on a common trading calendar.
+
+    The row grid is the union of the observed dates (normalized to days),
+    restricted to days when at least one of the exchanges involved trades
+    (several bars on the same day keep the last one):
+    crypto weekends and exchange holidays are dropped when crypto is mixed
+    with listed assets, while crypto alone keeps every day. Each asset's
+    gaps are then filled from the previous price (or, at the start, the
+    next one) over at most FILL_LIMIT rows, and rows still incomplete are
+    dropped. Everything runs on one NumPy matrix, without intermediate
+    DataFrames.
+
+    Intraday bars (`minutes` < 1440) are keyed by the end of the
+    clock-aligned interval in which they close (UTC); when listed assets
+    are involved, the grid keeps the intervals in which at least one of
+    them has a bar (their trading hours), so `calendar_days_excluded` then
+    counts excluded bars. Bars that do not start on the clock (Yahoo's US
+    hourly bars start at :30) are sampled up to that much earlier than the
+    row time: `bar_offsets` reports those offsets in minutes by symbol, as
+    returns of assets sampled at different times are less correlated. `dtype` is the
+    dtype of the aligned values (float32 halves the memory of long
+    intraday windows).
+
+    Returns the aligned frame and a report of what was filled or dropped.
+    """
+    columns, blocks, offsets = [], [], {}
+    for frame in frames:
+        offset = _bar_offset(frame.index, minutes)
+        if offset:
+            offsets.update({str(c): offset for c in frame.columns})
+        day_index = _bar_keys(frame.index, minutes)
+        block = frame.to_numpy(dtype=dtype)
+        if len(day_index) > 1 and not (day_index[1:] > day_index[:-1]).all():
+            # Unsorted or several bars per day: sort, then keep the last bar of each day
+            order = np.argsort(day_index, kind='stable')
+            day_index, block = day_index[order], block[order]
+            last_of_day = np.append(day_index[1:] != day_index[:-1], True)
+            day_index, block = day_index[last_of_day], block[last_of_day]
+        columns.extend(frame.columns)
+        blocks.append((day_index, block, any(exchanges.get(c, NYSE) != CRYPTO for c in frame.columns)))
+
+    report = {'calendars': sorted(set(exchanges.get(c, NYSE) for c in columns)), 'rows': 0,
+              'calendar_days_excluded': 0, 'non_finite_values': 0, 'filled': {}, 'rows_dropped': 0,
+              'first_complete_date': None, 'bar_offsets': offsets}
+    if not columns:
+        return pd.DataFrame(), report
+
+    observed = np.unique(np.concatenate([day_index for day_index, _, _ in blocks]))
+    listed = [e for e in report['calendars'] if e != CRYPTO]
+    if listed and minutes < 1440:
+        sessions = np.unique(np.concatenate([day_index for day_index, _, is_listed in blocks if is_listed]))
+        grid = observed[np.isin(observed, sessions, assume_unique=True)]
+    elif listed:
+        sessions = np.unique(np.concatenate([trading_days(e, observed[0], observed[-1]) for e in listed]))
+        grid = observed[np.isin(observed, sessions, assume_unique=True)]
+    else:
+        grid = observed
+    report['calendar_days_excluded'] = int(len(observed) - len(grid))
+
+    matrix = np.full((len(grid), len(columns)), np.nan, dtype=dtype)
+    offset = 0
+    for day_index, block, _ in blocks:
+        rows = np.searchsorted(grid, day_index)
+        on_grid = rows < len(grid)
+        on_grid[on_grid] = grid[rows[on_grid]] == day_index[on_grid]
+        matrix[rows[on_grid], offset:offset + block.shape[1]] = block[on_grid]
+        offset += block.shape[1]
+
+    non_finite = np.isinf(matrix)
+    report['non_finite_values'] = int(non_finite.sum())
+    matrix[non_finite] = np.nan
+
+    # Forward fill, then backward fill (on the reversed rows), each limited to FILL_LIMIT rows,
+    # only on the columns that have gaps
+    missing = np.isnan(matrix)
+    gaps = np.flatnonzero(missing.any(axis=0))
+    if len(gaps):
+        sub = matrix[:, gaps]
+        _fill_forward(sub, FILL_LIMIT)
+        _fill_forward(sub[::-1], FILL_LIMIT)
+        matrix[:, gaps] = sub
+    filled = missing & ~np.isnan(matrix)
+
+    complete = ~np.isnan(matrix).any(axis=1)
+    report['filled'] = {str(c): int(n) for c, n in zip(columns, filled[complete].sum(axis=0)) if n}
+    report['rows_dropped'] = int(len(grid) - complete.sum())
+    report['rows'] = int(complete.sum())
+    if complete.any():
+        report['first_complete_date'] = str(grid[complete][0].astype('datetime64[D]' if minutes >= 1440 else 'datetime64[m]'))
+
+    aligned = pd.DataFrame(matrix[complete], index=pd.DatetimeIndex(grid[complete].astype('datetime64[ns]')),
+                           columns=columns, copy=False)
+    return aligned, report
@@ -1,14 +1,21 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request, stream_with_context
 from flask_cors import CORS
-import pandas as pd
-import numpy as np
 from datetime import datetime
+import hashlib
 import json
+import hmac
 import logging
+import math
+import os
+import re
+import threading
+import time
 
 from config import Config
-from data_fetcher import DataFetcher
-from correlation_calc import CorrelationCalculator
+from price_stream import PriceBroadcaster
+from metrics import metrics
+from profiler import RequestProfiler, prune_profiles
+from result_cache import ResultCache
 
 # Configure logging
 logging.basicConfig(
@@ -21,15 +28,116 @@ app = Flask(__name__)
 app.config.from_object(Config)
 CORS(app, origins=Config.CORS_ORIGINS)
 
-# Initialize components
-data_fetcher = DataFetcher()
-calc = CorrelationCalculator()
+# Components are built on first use: data_fetcher and correlation_calc pull in
+# pandas, scipy.stats, yfinance and requests, which would otherwise delay the
+# first health check by several hundred milliseconds
+def _lazy(factory):
+    """Return a getter that builds the component once (thread-safe) and reuses it"""
+    instance = []
+    lock = threading.Lock()
+
+    def get():
+        if not instance:
+            with lock:
+                if not instance:
+                    instance.append(factory())
+        return instance[0]
+    return get
+
+def _build_data_fetcher():
+    from data_fetcher import DataFetcher
+    return DataFetcher()
+
+def _build_calculator():
+    from correlation_calc import CorrelationCalculator
+    return CorrelationCalculator()
+
+def _build_calc_executor():
+    from calc_executor import CalculationExecutor
+    return CalculationExecutor(get_calculator(), Config.CALC_PROCESSES,
+                               Config.CALC_KENDALL_INLINE_MAX, Config.CALC_DENSE_INLINE_MAX)
+
+def _build_correlation_cube():
+    from correlation_cube import CorrelationCube
+    return CorrelationCube(Config.CORRELATION_CUBE_FILE, Config.CORRELATION_CUBE_MAX_AGE)
+
+get_data_fetcher = _lazy(_build_data_fetcher)
+get_calculator = _lazy(_build_calculator)
+get_calc_executor = _lazy(_build_calc_executor)
+get_correlation_cube = _lazy(_build_correlation_cube)
+price_broadcaster = PriceBroadcaster(lambda assets: get_data_fetcher().get_latest_quotes(assets))
+result_cache = ResultCache(Config.RESULT_CACHE_SIZE, Config.CACHE_DURATION)
+
+_warmup_started = threading.Event()
+
+def _start_warmup():
+    """Build the components in the background after the first request (typically a health check)"""
+    if _warmup_started.is_set():
+        return
+    _warmup_started.set()
+    threading.Thread(target=_warm_up, name='warmup', daemon=True).start()
+
+def _warm_up():
+    get_data_fetcher()
+    if Config.CORRELATION_CUBE:
+        get_correlation_cube().load()
+    try:
+        get_calc_executor().warm_up()
+    except Exception as e:
+        logger.warning(f"Could not start the calculation pool: {e}")
+profile_dir = os.path.join(Config.DATA_DIR, 'profiles')
+
+def _profile_token_valid():
+    """True when the request carries the configured profiling token"""
+    token = request.headers.get('X-Profile-Token')
+    return bool(token and Config.PROFILE_TOKEN and hmac.compare_digest(token, Config.PROFILE_TOKEN))
 
 @app.before_request
 def log_request_info():
     """Log incoming requests for debugging"""
     if request.endpoint != 'health_check':
         logger.debug(f"Request: {request.method} {request.path}")
+    g.request_start = time.perf_counter()
+    metrics.start_request()
+    _start_warmup()
+    
+    # Opt-in profiling of this request only; unprofiled requests just miss the header
+    if 'X-Profile-Token' in request.headers and _profile_token_valid():
+        g.profiler = RequestProfiler(profile_dir, Config.PROFILE_INTERVAL, f"{request.method} {request.path}")
+        g.profiler.start()
+
+@app.after_request
+def record_request_metrics(response):
+    """Record request metrics and expose per-stage timings as Server-Timing"""
+    endpoint = request.endpoint or 'unknown'
+    metrics.inc('http_requests_total', endpoint=endpoint, status=response.status_code)
+    if 'request_start' in g:
+        metrics.observe('http_request_duration_seconds', time.perf_counter() - g.request_start, endpoint=endpoint)
+
+    server_timing = metrics.server_timing()
+    if server_timing:
+        response.headers['Server-Timing'] = server_timing
+    
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        def finish_profile():
+            profiler.stop()
+            prune_profiles(profile_dir, Config.PROFILE_KEEP)
+        
+        response.headers['X-Profile-Id'] = profiler.profile_id
+        if response.is_streamed:
+            # Keep sampling while the body is generated
+            response.call_on_close(finish_profile)
+        else:
+            finish_profile()
+    return response
+
+@app.teardown_request
+def stop_unfinished_profile(exc):
+    """Stop the sampler if the request ended before after_request ran"""
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.stop()
 
 @app.errorhandler(404)
 def handle_404(e):
@@ -72,146 +180,535 @@ def health_check():
         'timestamp': datetime.now().isoformat()
     })
 
-@app.route('/api/assets', methods=['GET'])
-def get_available_assets():
-    """Get list of available assets"""
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus metrics (per worker process)"""
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/profiles/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    """Download a request profile (collapsed stacks, for flame graphs)"""
+    if not _profile_token_valid():
+        return jsonify({'error': 'Route non trouvée', 'path': request.path}), 404
+    if not re.fullmatch(r'[0-9a-f-]+', profile_id):
+        return jsonify({'error': 'Identifiant de profil invalide'}), 400
+    
+    path = os.path.join(profile_dir, f"{profile_id}.folded")
+    if not os.path.exists(path):
+        return jsonify({'error': 'Profil introuvable'}), 404
+    with open(path, 'r', encoding='utf-8') as f:
+        return Response(f.read(), mimetype='text/plain')
+
+def _build_catalog():
+    """Serialize the asset catalog, the periods and the intervals once; they only depend on Config"""
     def get_display_name(symbol, fallback_name):
         return Config.DISPLAY_NAMES.get(symbol, fallback_name)
     
-    return jsonify({
-        'crypto': [{'symbol': Config.DISPLAY_SYMBOLS.get(k, k), 'name': get_display_name(k, v), 'technical_symbol': k} for k, v in Config.CRYPTO_ASSETS.items()],
-        'stocks': [{'symbol': Config.DISPLAY_SYMBOLS.get(k, k), 'name': get_display_name(k, v), 'technical_symbol': k} for k, v in Config.STOCK_ASSETS.items()],
-        'etfs': [{'symbol': Config.DISPLAY_SYMBOLS.get(k, k), 'name': get_display_name(k, v), 'technical_symbol': k} for k, v in Config.ETF_ASSETS.items()],
-        'commodities': [{'symbol': Config.DISPLAY_SYMBOLS.get(k, k), 'name': get_display_name(k, v), 'technical_symbol': k} for k, v in Config.COMMODITY_ASSETS.items()]
-    })
+    def entries(assets):
+        return [{'symbol': Config.DISPLAY_SYMBOLS.get(k, k), 'name': get_display_name(k, v), 'technical_symbol': k} for k, v in assets.items()]
+    
+    assets = {
+        'crypto': entries(Config.CRYPTO_ASSETS),
+        'stocks': entries(Config.STOCK_ASSETS),
+        'etfs': entries(Config.ETF_ASSETS),
+        'commodities': entries(Config.COMMODITY_ASSETS)
+    }
+    periods = {period: info['label'] for period, info in Config.TIME_PERIODS.items()}
+    intervals = {interval: {'label': info['label'], 'max_days': info.get('max_days')}
+                 for interval, info in Config.INTERVALS.items()}
+    return tuple(app.json.dumps(body).encode('utf-8') for body in (assets, periods, intervals))
+
+ASSETS_JSON, PERIODS_JSON, INTERVALS_JSON = _build_catalog()
+
+def _catalog_response(body):
+    """Static JSON response, revalidated by ETag"""
+    response = Response(body, mimetype='application/json')
+    response.add_etag()
+    response.headers['Cache-Control'] = 'public, max-age=3600'
+    return response.make_conditional(request)
+
+@app.route('/api/assets', methods=['GET'])
+def get_available_assets():
+    """Get list of available assets"""
+    return _catalog_response(ASSETS_JSON)
 
 @app.route('/api/periods', methods=['GET'])
 def get_time_periods():
     """Get available time periods"""
-    return jsonify({
-        period: info['label'] 
-        for period, info in Config.TIME_PERIODS.items()
-    })
+    return _catalog_response(PERIODS_JSON)
 
-@app.route('/api/correlation', methods=['POST'])
-def calculate_correlation():
-    """Calculate correlation matrix for selected assets"""
+@app.route('/api/intervals', methods=['GET'])
+def get_intervals():
+    """Get available bar intervals, with the longest history each one allows"""
+    return _catalog_response(INTERVALS_JSON)
+
+class AnalysisError(Exception):
+    """Error raised by the correlation pipeline, carrying its HTTP status"""
+
+    def __init__(self, message, status_code=400, debug=None):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.debug = debug
+
+    def to_dict(self):
+        payload = {'error': self.message}
+        if self.debug is not None:
+            payload['debug'] = self.debug
+        return payload
+
+def _parse_correlation_request(data):
+    """Validate a correlation request body and return its parameters"""
+    # Validate input
+    if not data or 'assets' not in data or 'period' not in data:
+        raise AnalysisError('Paramètres requis manquants (assets, period)')
+
+    assets = data['assets']
+    period = data['period']
+
+    # Validate that at least some assets are selected
+    total_assets = sum(len(v) for v in assets.values() if isinstance(v, list))
+    if total_assets < 2:
+        raise AnalysisError('Veuillez sélectionner au moins 2 actifs')
+
+    # Validate period
+    if period not in Config.TIME_PERIODS:
+        raise AnalysisError(f'Période invalide. Choix: {list(Config.TIME_PERIODS.keys())}')
+
+    # Validate interval: intraday history only goes back so far
+    interval = data.get('interval', '1d')
+    if interval not in Config.INTERVALS:
+        raise AnalysisError(f'Intervalle invalide. Choix: {list(Config.INTERVALS.keys())}')
+    max_days = Config.INTERVALS[interval].get('max_days')
+    if max_days is not None:
+        today = datetime.now()
+        days = Config.TIME_PERIODS[period].get('days', (today - datetime(today.year, 1, 1)).days)
+        if days > max_days:
+            raise AnalysisError(f"L'intervalle {interval} est limité à {max_days} jours d'historique")
+
+    return {
+        'assets': assets,
+        'period': period,
+        'interval': interval,
+        'correlation_method': data.get('correlation_method', 'pearson'),
+        'returns_method': data.get('returns_method', 'log'),
+        'seriation': bool(data.get('seriation', False)),
+        'total_assets': total_assets
+    }
+
+def _parse_number(data, name, cast, default, minimum=None, maximum=None):
+    """Optional numeric request parameter, validated against its bounds"""
+    value = data.get(name)
+    if value is None:
+        return default
     try:
-        data = request.get_json()
+        value = cast(value)
+    except (TypeError, ValueError):
+        raise AnalysisError(f'Paramètre {name} invalide')
+    if (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+        bounds = f"entre {minimum} et {maximum}" if maximum is not None else f"au moins {minimum}"
+        raise AnalysisError(f'Le paramètre {name} doit être {bounds}')
+    return value
 
-        # Validate input
-        if not data or 'assets' not in data or 'period' not in data:
-            return jsonify({'error': 'Paramètres requis manquants (assets, period)'}), 400
-
-        assets = data['assets']
-        period = data['period']
-        correlation_method = data.get('correlation_method', 'pearson')
-        returns_method = data.get('returns_method', 'log')
-
-        # Validate that at least some assets are selected
-        total_assets = sum(len(v) for v in assets.values() if isinstance(v, list))
-        if total_assets < 2:
-            return jsonify({'error': 'Veuillez sélectionner au moins 2 actifs'}), 400
-
-        # Validate period
-        if period not in Config.TIME_PERIODS:
-            return jsonify({'error': f'Période invalide. Choix: {list(Config.TIME_PERIODS.keys())}'}), 400
-
-        logger.info(f"Calculating correlation for {total_assets} assets over {period}")
-        logger.info(f"Assets received: {json.dumps(assets, indent=2)}")
-
-        # Fetch data
-        prices_df = data_fetcher.fetch_mixed_assets(assets, period)
-
-        logger.info(f"Fetched data shape: {prices_df.shape}")
-        logger.info(f"Fetched data columns: {prices_df.columns.tolist() if not prices_df.empty else 'No columns'}")
-
-        if prices_df.empty:
-            logger.warning(f"No data fetched for assets: {assets}")
-            return jsonify({
-                'error': 'Aucune donnée disponible pour les actifs sélectionnés. '
-                         'Vérifiez que les symboles sont corrects et réessayez.',
-                'debug': {
-                    'assets_received': assets,
-                    'total_assets': total_assets
-                }
-            }), 404
-
-        if len(prices_df.columns) < 2:
-            return jsonify({
-                'error': f'Données insuffisantes. Seulement {len(prices_df.columns)} actif(s) avec des données.'
-            }), 400
-
-        # Calculate returns
-        returns_df = calc.calculate_returns(prices_df, method=returns_method)
-
-        if returns_df.empty or len(returns_df) < 5:
-            return jsonify({
-                'error': f'Données insuffisantes pour calculer les corrélations. '
-                         f'Seulement {len(returns_df)} points de données disponibles.'
-            }), 400
-
-        # Calculate correlation matrix
-        corr_matrix = calc.calculate_correlation_matrix(returns_df, method=correlation_method)
+def _get_asset_names(symbols):
+    """Create mapping of technical symbols to display names"""
+    asset_names = {}
+    for technical_symbol in symbols:
+        # Utiliser DISPLAY_NAMES si disponible, sinon fallback vers les dictionnaires d'actifs
+        if technical_symbol in Config.DISPLAY_NAMES:
+            asset_names[technical_symbol] = Config.DISPLAY_NAMES[technical_symbol]
+        elif technical_symbol in Config.CRYPTO_ASSETS:
+            asset_names[technical_symbol] = Config.CRYPTO_ASSETS[technical_symbol]
+        elif technical_symbol in Config.STOCK_ASSETS:
+            asset_names[technical_symbol] = Config.STOCK_ASSETS[technical_symbol]
+        elif technical_symbol in Config.ETF_ASSETS:
+            asset_names[technical_symbol] = Config.ETF_ASSETS[technical_symbol]
+        elif technical_symbol in Config.COMMODITY_ASSETS:
+            asset_names[technical_symbol] = Config.COMMODITY_ASSETS[technical_symbol]
+        else:
+            asset_names[technical_symbol] = technical_symbol  # fallback
+    return asset_names
 
-        if corr_matrix.empty:
-            return jsonify({'error': 'Impossible de calculer la matrice de corrélation'}), 500
+def _correlation_result(returns_df, method, derived=None):
+    """
+    Correlation matrix of the returns, plus artifacts derived from it.
+
+    `derived` maps artifact names (e.g. 'seriation') to functions of the
+    matrix. Results computed from cached returns are cached under the
+    returns version and method, so the matrix and each artifact are
+    computed once per data refresh.
+    """
+    returns_key = returns_df.attrs.get('returns_key')
+    key = f"{returns_key}|{method}" if returns_key else None
+    result = result_cache.get(key) if key else None
+    metrics.inc('cache_requests_total', cache='correlation', result='hit' if result is not None else 'miss')
+
+    updated = result is None
+    if result is None:
+        with metrics.span('correlation', method=method):
+            result = {'matrix': get_calc_executor().correlation_matrix(returns_df, method=method)}
+
+    missing = {name: compute for name, compute in (derived or {}).items() if name not in result}
+    if missing and not result['matrix'].empty:
+        result = dict(result)
+        for name, compute in missing.items():
+            with metrics.span(name.partition(':')[0]):
+                result[name] = compute(result['matrix'])
+        updated = True
+
+    if key and updated:
+        result_cache.put(key, result)
+    return result
 
-        # Calculate additional metrics
-        diversification_score = calc.calculate_diversification_score(corr_matrix)
-        statistics = calc.calculate_statistics(returns_df)
+export_dir = os.path.join(Config.DATA_DIR, 'exports')
+_exports_pruned_at = [0.0]
 
-        # Find highly correlated pairs
+def _register_export(source, entry):
+    """
+    Keep what an export of a result needs (request parameters, matrix and
+    the frames or statistics at hand) in the result cache, and return the
+    result id clients pass to /api/export. `source` describes the data and
+    the request, never a worker-local state (fetch times): the same data
+    gives the same id in every worker.
+
+    The result cache belongs to one worker: the request parameters are
+    also written to DATA_DIR/exports, so that another worker can compute
+    the result again when the export lands there.
+    """
+    result_id = hashlib.sha1(source.encode()).hexdigest()[:16]
+    result_cache.put(f"export:{result_id}", entry)
+
+    path = os.path.join(export_dir, f"{result_id}.json")
+    if not os.path.exists(path):
+        try:
+            os.makedirs(export_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(entry['params'], f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not save export parameters {result_id}: {e}")
+        _prune_exports()
+    return result_id
+
+def _prune_exports():
+    """Delete the export parameters older than CACHE_DURATION (at most once a minute)"""
+    now = time.time()
+    if now - _exports_pruned_at[0] < 60:
+        return
+    _exports_pruned_at[0] = now
+    try:
+        entries = list(os.scandir(export_dir))
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            if entry.stat().st_mtime < now - Config.CACHE_DURATION:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+def _export_entry(result_id):
+    """
+    Export entry of a result: from this worker's cache, or computed again
+    from its saved parameters. None when unknown or expired; raises a 410
+    when the data changed since the analysis (the recomputed result is
+    another one).
+    """
+    entry = result_cache.get(f"export:{result_id}")
+    metrics.inc('cache_requests_total', cache='export', result='hit' if entry is not None else 'miss')
+    if entry is not None or not re.fullmatch(r'[0-9a-f]{16}', result_id):
+        return entry
+
+    path = os.path.join(export_dir, f"{result_id}.json")
+    try:
+        if time.time() - os.path.getmtime(path) >= Config.CACHE_DURATION:
+            return None
+        with open(path, 'r') as f:
+            params = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # The matrix section registers the result again, under the same id if the data did not change
+    _, payload = next(_correlation_sections(params))
+    if payload['result_id'] != result_id:
+        raise AnalysisError("Les données ont été mises à jour depuis l'analyse. "
+                            "Relancez l'analyse avant d'exporter.", status_code=410)
+    return result_cache.get(f"export:{result_id}")
+
+def _load_returns(params):
+    """Aligned prices and returns of the requested basket, validated for analysis"""
+    assets = params['assets']
+
+    # Fetch aligned prices and their returns (cached per basket, period and returns method)
+    prices_df, returns_df = get_data_fetcher().fetch_returns(assets, params['period'], params['returns_method'],
+                                                             params['interval'])
+
+    logger.info(f"Fetched data shape: {prices_df.shape}")
+    logger.info(f"Fetched data columns: {prices_df.columns.tolist() if not prices_df.empty else 'No columns'}")
+
+    if prices_df.empty:
+        logger.warning(f"No data fetched for assets: {assets}")
+        raise AnalysisError(
+            'Aucune donnée disponible pour les actifs sélectionnés. '
+            'Vérifiez que les symboles sont corrects et réessayez.',
+            status_code=404,
+            debug={
+                'assets_received': assets,
+                'total_assets': params['total_assets']
+            }
+        )
+
+    if len(prices_df.columns) < 2:
+        raise AnalysisError(f'Données insuffisantes. Seulement {len(prices_df.columns)} actif(s) avec des données.')
+
+    if returns_df.empty or len(returns_df) < 5:
+        raise AnalysisError(
+            f'Données insuffisantes pour calculer les corrélations. '
+            f'Seulement {len(returns_df)} points de données disponibles.'
+        )
+
+    return prices_df, returns_df
+
+def _pairs_payload(corr_matrix, calc):
+    """Most positively and negatively correlated pairs"""
+    with metrics.span('pairs'):
         positive_pairs = calc.find_correlated_pairs(corr_matrix, threshold=0.7, correlation_type='positive')
         negative_pairs = calc.find_correlated_pairs(corr_matrix, threshold=0.7, correlation_type='negative')
+    return {
+        'highly_correlated': {
+            'positive': positive_pairs[:10],
+            'negative': negative_pairs[:10]
+        }
+    }
+
+def _precomputed_sections(params, precomputed, calc):
+    """Correlation sections sliced from the nightly catalog cube (no upstream call)"""
+    corr_matrix = precomputed['matrix']
+    seriation = None
+    if params['seriation']:
+        # Cached per cube generation and basket, like the artifacts of live results
+        key = (f"cube|{precomputed['generated_at']}|{params['period']}|{params['returns_method']}|"
+               f"{params['correlation_method']}|{','.join(corr_matrix.columns)}")
+        cached = result_cache.get(key)
+        metrics.inc('cache_requests_total', cache='correlation', result='hit' if cached is not None else 'miss')
+        if cached is None:
+            with metrics.span('seriation'):
+                cached = {'seriation': calc.seriate(corr_matrix, optimal_max=Config.SERIATION_OPTIMAL_MAX)}
+            result_cache.put(key, cached)
+        seriation = cached['seriation']
+
+    result_id = _register_export(
+        f"cube|{precomputed['generated_at']}|{json.dumps(params, sort_keys=True)}",
+        {'params': params, 'matrix': corr_matrix, 'statistics': precomputed['statistics']}
+    )
+
+    yield 'matrix', {
+        'result_id': result_id,
+        'correlation_matrix': corr_matrix.to_dict(),
+        'assets': corr_matrix.columns.tolist(),
+        'asset_names': _get_asset_names(corr_matrix.columns),
+        'diversification_score': calc.calculate_diversification_score(corr_matrix),
+        'period': params['period'],
+        'interval': params['interval'],
+        'data_points': precomputed['data_points'],
+        'start_date': precomputed['start_date'],
+        'end_date': precomputed['end_date'],
+        'alignment': precomputed['alignment'],
+        'seriation': seriation,
+        'precomputed_at': datetime.fromtimestamp(precomputed['generated_at']).isoformat(timespec='seconds')
+    }
+    yield 'pairs', _pairs_payload(corr_matrix, calc)
+    yield 'betas', {'betas': precomputed['betas']}
+    yield 'statistics', {'statistics': precomputed['statistics']}
+    yield 'performance', {'performance_comparison': precomputed['performance']}
+
+    logger.info(f"Correlation answered from the catalog cube: {len(corr_matrix)} assets")
+
+def _streamed_sections(params, calc):
+    """
+    Correlation sections of a long period, computed chunk by chunk from the
+    history store: only Pearson moments are kept across chunks, never the
+    whole history of prices or returns.
+
+    Only Pearson is streamed. Spearman and Kendall need the ranks of the
+    whole period, so they load it from the store like shorter periods, up
+    to RANK_CORRELATION_MAX_VALUES (days x assets).
+    """
+    import pandas as pd
+    from correlation_calc import ReturnMoments
+
+    moments, alignment, first_prices, last_prices = None, None, None, None
+    with metrics.span('stream'):
+        for prices_df, returns_df in get_data_fetcher().iter_returns(params['assets'], params['period'],
+                                                                     params['returns_method']):
+            report = prices_df.attrs['alignment']
+            if moments is None:
+                moments = ReturnMoments(returns_df.columns)
+                first_prices = prices_df.iloc[:1]
+                alignment = dict(report, filled=dict(report['filled']))
+            else:
+                for field in ('rows', 'calendar_days_excluded', 'non_finite_values', 'rows_dropped'):
+                    alignment[field] += report[field]
+                for symbol, count in report['filled'].items():
+                    alignment['filled'][symbol] = alignment['filled'].get(symbol, 0) + count
+            moments.update(returns_df.to_numpy())
+            last_prices = prices_df.iloc[-1:]
+
+    if moments is None:
+        raise AnalysisError('Aucune donnée disponible pour les actifs sélectionnés. '
+                            'Vérifiez que les symboles sont corrects et réessayez.', status_code=404)
+    if moments.count < 5:
+        raise AnalysisError(f'Données insuffisantes pour calculer les corrélations. '
+                            f'Seulement {moments.count} points de données disponibles.')
+
+    corr_matrix = moments.correlation()
+    seriation = None
+    if params['seriation']:
+        with metrics.span('seriation'):
+            seriation = calc.seriate(corr_matrix, optimal_max=Config.SERIATION_OPTIMAL_MAX)
 
-        # Calculate beta if SPY is included
-        betas = {}
-        if 'SPY' in returns_df.columns:
+    statistics = moments.statistics()
+    end_date = last_prices.index[-1]
+    # Returns and prices are read back from the history store on export, up to the same day
+    result_id = _register_export(
+        f"stream|{end_date:%Y-%m-%d}|{moments.count}|{json.dumps(params, sort_keys=True)}",
+        {'params': params, 'matrix': corr_matrix, 'statistics': statistics, 'end_date': end_date}
+    )
+
+    yield 'matrix', {
+        'result_id': result_id,
+        'correlation_matrix': corr_matrix.to_dict(),
+        'assets': corr_matrix.columns.tolist(),
+        'asset_names': _get_asset_names(corr_matrix.columns),
+        'diversification_score': calc.calculate_diversification_score(corr_matrix),
+        'period': params['period'],
+        'interval': params['interval'],
+        'data_points': moments.count,
+        'start_date': first_prices.index[0].strftime('%Y-%m-%d'),
+        'end_date': end_date.strftime('%Y-%m-%d'),
+        'alignment': alignment,
+        'seriation': seriation
+    }
+    yield 'pairs', _pairs_payload(corr_matrix, calc)
+    yield 'betas', {'betas': moments.betas('SPY')}
+    yield 'statistics', {'statistics': statistics}
+    with metrics.span('performance'):
+        performance_comparison = calc.calculate_performance_comparison(pd.concat([first_prices, last_prices]))
+    yield 'performance', {'performance_comparison': performance_comparison}
+
+    logger.info(f"Correlation streamed over {params['period']}: {len(corr_matrix)} assets, "
+                f"{moments.count} data points")
+
+def _correlation_sections(params):
+    """
+    Run the correlation pipeline and yield (section, payload) tuples.
+
+    The matrix section is yielded first, as soon as the core computation is
+    done, so streaming clients can render the heatmap before the slower
+    statistics, betas and performance sections are ready.
+    """
+    assets = params['assets']
+    period = params['period']
+
+    logger.info(f"Calculating correlation for {params['total_assets']} assets over {period}")
+    logger.info(f"Assets received: {json.dumps(assets, indent=2)}")
+
+    calc = get_calculator()
+
+    if Config.CORRELATION_CUBE and params['interval'] == '1d':
+        precomputed = get_correlation_cube().lookup(assets, period, params['returns_method'],
+                                                    params['correlation_method'])
+        metrics.inc('cache_requests_total', cache='cube', result='hit' if precomputed is not None else 'miss')
+        if precomputed is not None:
+            yield from _precomputed_sections(params, precomputed, calc)
+            return
+
+    if (Config.TIME_PERIODS[period].get('chunked') and params['correlation_method'] == 'pearson'
+            and params['interval'] == '1d'):
+        yield from _streamed_sections(params, calc)
+        return
+    if Config.TIME_PERIODS[period].get('chunked'):
+        # Not streamed: the whole period is loaded, bound its size
+        size = Config.TIME_PERIODS[period]['days'] * params['total_assets']
+        if size > Config.RANK_CORRELATION_MAX_VALUES:
+            raise AnalysisError(f"Corrélation {params['correlation_method']} sur {period} limitée à "
+                                f"{Config.RANK_CORRELATION_MAX_VALUES} valeurs (jours × actifs), "
+                                f"demandé {size}. Réduisez le panier ou la période, ou utilisez Pearson.")
+
+    prices_df, returns_df = _load_returns(params)
+
+    # Calculate correlation matrix (and its seriation when requested)
+    derived = {}
+    if params['seriation']:
+        derived['seriation'] = lambda matrix: calc.seriate(matrix, optimal_max=Config.SERIATION_OPTIMAL_MAX)
+    result = _correlation_result(returns_df, params['correlation_method'], derived)
+    corr_matrix = result['matrix']
+
+    if corr_matrix.empty:
+        raise AnalysisError('Impossible de calculer la matrice de corrélation', status_code=500)
+
+    # Identified by content (span, size and last prices of the data), as the returns key embeds this
+    # worker's fetch time: another worker computing the same data again finds the same id
+    last_prices = hashlib.sha1(prices_df.iloc[-1].to_numpy(dtype='float64').tobytes()).hexdigest()[:12]
+    result_id = _register_export(
+        f"live|{prices_df.index[0].isoformat()}|{prices_df.index[-1].isoformat()}|{len(returns_df)}|"
+        f"{last_prices}|{json.dumps(params, sort_keys=True)}",
+        {'params': params, 'matrix': corr_matrix, 'prices': prices_df, 'returns': returns_df}
+    )
+
+    # Intraday bars are dated to the minute (UTC)
+    date_format = '%Y-%m-%d' if params['interval'] == '1d' else '%Y-%m-%d %H:%M'
+    yield 'matrix', {
+        'result_id': result_id,
+        'correlation_matrix': corr_matrix.to_dict(),
+        'assets': corr_matrix.columns.tolist(),
+        'asset_names': _get_asset_names(corr_matrix.columns),
+        'diversification_score': calc.calculate_diversification_score(corr_matrix),
+        'period': period,
+        'interval': params['interval'],
+        'data_points': len(returns_df),
+        'start_date': prices_df.index[0].strftime(date_format),
+        'end_date': prices_df.index[-1].strftime(date_format),
+        'alignment': prices_df.attrs.get('alignment'),
+        'seriation': result.get('seriation')
+    }
+
+    yield 'pairs', _pairs_payload(corr_matrix, calc)
+
+    # Calculate beta if SPY is included
+    betas = {}
+    if 'SPY' in returns_df.columns:
+        with metrics.span('betas'):
             betas = calc.calculate_beta(returns_df, 'SPY')
+    yield 'betas', {'betas': betas}
 
-        # Calculate performance comparison
+    with metrics.span('statistics'):
+        statistics = calc.calculate_statistics(returns_df, calc.periods_per_year(returns_df, params['interval']))
+    yield 'statistics', {'statistics': statistics}
+
+    # Calculate performance comparison
+    with metrics.span('performance'):
         performance_comparison = calc.calculate_performance_comparison(prices_df)
+    yield 'performance', {'performance_comparison': performance_comparison}
 
-        # Create mapping of technical symbols to names
-        asset_names = {}
-        for technical_symbol in corr_matrix.columns:
-            # Utiliser DISPLAY_NAMES si disponible, sinon fallback vers les dictionnaires d'actifs
-            if technical_symbol in Config.DISPLAY_NAMES:
-                asset_names[technical_symbol] = Config.DISPLAY_NAMES[technical_symbol]
-            elif technical_symbol in Config.CRYPTO_ASSETS:
-                asset_names[technical_symbol] = Config.CRYPTO_ASSETS[technical_symbol]
-            elif technical_symbol in Config.STOCK_ASSETS:
-                asset_names[technical_symbol] = Config.STOCK_ASSETS[technical_symbol]
-            elif technical_symbol in Config.ETF_ASSETS:
-                asset_names[technical_symbol] = Config.ETF_ASSETS[technical_symbol]
-            elif technical_symbol in Config.COMMODITY_ASSETS:
-                asset_names[technical_symbol] = Config.COMMODITY_ASSETS[technical_symbol]
-            else:
-                asset_names[technical_symbol] = technical_symbol  # fallback
+    logger.info(f"Correlation calculated successfully: {len(corr_matrix)} assets, {len(returns_df)} data points")
+
+@app.route('/api/correlation', methods=['POST'])
+def calculate_correlation():
+    """Calculate correlation matrix for selected assets"""
+    try:
+        params = _parse_correlation_request(request.get_json())
 
         # Prepare response
-        response = {
-            'correlation_matrix': corr_matrix.to_dict(),
-            'assets': corr_matrix.columns.tolist(),
-            'asset_names': asset_names,
-            'diversification_score': diversification_score,
-            'statistics': statistics,
-            'performance_comparison': performance_comparison,
-            'highly_correlated': {
-                'positive': positive_pairs[:10],
-                'negative': negative_pairs[:10]
-            },
-            'betas': betas,
-            'period': period,
-            'data_points': len(returns_df),
-            'start_date': prices_df.index[0].strftime('%Y-%m-%d'),
-            'end_date': prices_df.index[-1].strftime('%Y-%m-%d')
-        }
+        response = {}
+        for _, payload in _correlation_sections(params):
+            response.update(payload)
 
-        logger.info(f"Correlation calculated successfully: {len(corr_matrix)} assets, {len(returns_df)} data points")
-        return jsonify(response)
+        with metrics.span('serialization'):
+            return jsonify(response)
 
+    except AnalysisError as e:
+        return jsonify(e.to_dict()), e.status_code
     except ValueError as e:
         logger.warning(f"Validation error: {str(e)}")
         return jsonify({'error': str(e)}), 400
@@ -219,6 +716,307 @@ def calculate_correlation():
         logger.error(f"Error calculating correlation: {str(e)}", exc_info=True)
         return jsonify({'error': f'Erreur lors du calcul: {str(e)}'}), 500
 
+@app.route('/api/correlation/stream', methods=['POST'])
+def stream_correlation():
+    """
+    Stream the correlation analysis as NDJSON, one section per line.
+
+    Each line is {"section": <name>, "data": {...}}. The matrix section is
+    computed before the response starts so that fetch and validation errors
+    keep their HTTP status; later failures are sent as an "error" section.
+    The stream ends with a "done" section.
+    """
+    try:
+        params = _parse_correlation_request(request.get_json())
+        sections = _correlation_sections(params)
+        first_section = next(sections)
+    except AnalysisError as e:
+        return jsonify(e.to_dict()), e.status_code
+    except ValueError as e:
+        logger.warning(f"Validation error: {str(e)}")
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error calculating correlation: {str(e)}", exc_info=True)
+        return jsonify({'error': f'Erreur lors du calcul: {str(e)}'}), 500
+
+    def encode(section, data):
+        return app.json.dumps({'section': section, 'data': data}) + '\n'
+
+    def generate():
+        yield encode(*first_section)
+        try:
+            for section, payload in sections:
+                yield encode(section, payload)
+        except Exception as e:
+            logger.error(f"Error streaming correlation: {str(e)}", exc_info=True)
+            yield encode('error', {'error': f'Erreur lors du calcul: {str(e)}'})
+            return
+        yield encode('done', {})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={'X-Accel-Buffering': 'no', 'Cache-Control': 'no-cache'}
+    )
+
+@app.route('/api/correlation/spectrum', methods=['POST'])
+def correlation_spectrum():
+    """
+    Spectral analysis of the correlation matrix: top-k eigenvalues and
+    eigenvectors, absorption ratio and effective number of bets.
+
+    Same body as /api/correlation, plus an optional `k` (number of
+    eigenvalues, a fifth of the assets by default, at most 20).
+    """
+    try:
+        data = request.get_json()
+        params = _parse_correlation_request(data)
+
+        k = _parse_number(data, 'k', int, None, minimum=1)
+
+        calc = get_calculator()
+        _, returns_df = _load_returns(params)
+        name = f"spectrum:{k or 'default'}"
+        result = _correlation_result(returns_df, params['correlation_method'],
+                                     {name: lambda matrix: calc.spectral_analysis(matrix, k)})
+        corr_matrix = result['matrix']
+        if corr_matrix.empty:
+            raise AnalysisError('Impossible de calculer la matrice de corrélation', status_code=500)
+
+        return jsonify({
+            'assets': corr_matrix.columns.tolist(),
+            'period': params['period'],
+            'interval': params['interval'],
+            'data_points': len(returns_df),
+            'diversification_score': calc.calculate_diversification_score(corr_matrix),
+            **result[name]
+        })
+
+    except AnalysisError as e:
+        return jsonify(e.to_dict()), e.status_code
+    except Exception as e:
+        logger.error(f"Error in spectral analysis: {str(e)}", exc_info=True)
+        return jsonify({'error': f'Erreur lors du calcul: {str(e)}'}), 500
+
+@app.route('/api/correlation/network', methods=['POST'])
+def correlation_network():
+    """
+    Correlation network: minimum spanning tree, threshold graph and node
+    centralities, as column-wise edge lists over the `nodes` positions.
+
+    Same body as /api/correlation, plus optional `threshold` (minimum
+    |correlation| of a threshold graph edge, 0.5 by default) and
+    `max_edges` (strongest edges kept, 5000 by default).
+    """
+    try:
+        data = request.get_json()
+        params = _parse_correlation_request(data)
+        threshold = _parse_number(data, 'threshold', float, 0.5, minimum=0, maximum=1)
+        max_edges = _parse_number(data, 'max_edges', int, 5000, minimum=1)
+
+        calc = get_calculator()
+        _, returns_df = _load_returns(params)
+        name = f"network:{threshold}:{max_edges}"
+        result = _correlation_result(returns_df, params['correlation_method'],
+                                     {name: lambda matrix: calc.correlation_network(matrix, threshold, max_edges)})
+        if result['matrix'].empty:
+            raise AnalysisError('Impossible de calculer la matrice de corrélation', status_code=500)
+
+        return jsonify({
+            'asset_names': _get_asset_names(result['matrix'].columns),
+            'period': params['period'],
+            'interval': params['interval'],
+            'data_points': len(returns_df),
+            **result[name]
+        })
+
+    except AnalysisError as e:
+        return jsonify(e.to_dict()), e.status_code
+    except Exception as e:
+        logger.error(f"Error building correlation network: {str(e)}", exc_info=True)
+        return jsonify({'error': f'Erreur lors du calcul: {str(e)}'}), 500
+
+def _covariance_result(returns_df):
+    """
+    Pearson covariance of the returns, derived from the (cached) Pearson
+    correlation and the volatilities: computed once per returns version.
+    """
+    import numpy as np
+
+    def covariance(matrix):
+        volatility = returns_df[matrix.columns].std().to_numpy(dtype=np.float64)
+        return matrix.to_numpy(dtype=np.float64) * np.outer(volatility, volatility)
+
+    return _correlation_result(returns_df, 'pearson', {'covariance': covariance})
+
+def _parse_baskets(data):
+    """Validate the baskets of a screening request: [(id, {asset_type: [symbols]}), ...]"""
+    baskets = data.get('baskets') if data else None
+    if not isinstance(baskets, list) or not baskets:
+        raise AnalysisError('Paramètre requis manquant (baskets)')
+    if len(baskets) > Config.SCREEN_MAX_BASKETS:
+        raise AnalysisError(f'Trop de paniers ({len(baskets)}), maximum {Config.SCREEN_MAX_BASKETS}')
+
+    parsed = []
+    for i, basket in enumerate(baskets):
+        assets = basket.get('assets') if isinstance(basket, dict) else None
+        if not isinstance(assets, dict) or not all(isinstance(v, list) for v in assets.values()):
+            raise AnalysisError(f'Panier {i} invalide: attendu {{"assets": {{"crypto": [...], "stocks": [...]}}}}')
+        parsed.append((basket.get('id', i), assets))
+    return parsed
+
+@app.route('/api/correlation/screen', methods=['POST'])
+def screen_baskets():
+    """
+    Screen many baskets drawn from one universe in a single request.
+
+    Body: `baskets` (a list of {"id": ..., "assets": {...}}), plus `period`,
+    `interval`, `correlation_method` and `returns_method` as for
+    /api/correlation, and an optional `top_pairs` (5 by default). The
+    union of the baskets is fetched and aligned once, its correlation and
+    covariance matrices are computed once, and each basket is then read
+    from them by indexing. Every basket is measured over the union's
+    common dates.
+    """
+    try:
+        data = request.get_json()
+        baskets = _parse_baskets(data)
+        top_pairs = _parse_number(data, 'top_pairs', int, 5, minimum=0, maximum=100)
+
+        union = {}
+        for _, assets in baskets:
+            for asset_type, symbols in assets.items():
+                union.setdefault(asset_type, []).extend(symbols)
+        union = {asset_type: list(dict.fromkeys(symbols)) for asset_type, symbols in union.items()}
+        params = _parse_correlation_request(dict(data, assets=union))
+
+        calc = get_calculator()
+        prices_df, returns_df = _load_returns(params)
+        corr_matrix = _correlation_result(returns_df, params['correlation_method'])['matrix']
+        if corr_matrix.empty:
+            raise AnalysisError('Impossible de calculer la matrice de corrélation', status_code=500)
+        covariance = _covariance_result(returns_df)['covariance']
+        periods_per_year = calc.periods_per_year(returns_df, params['interval'])
+
+        available = set(corr_matrix.columns)
+        screened, results = [], []
+        for basket_id, assets in baskets:
+            symbols = list(dict.fromkeys(s for values in assets.values() for s in values))
+            present = [s for s in symbols if s in available]
+            missing = [s for s in symbols if s not in available]
+            if len(present) < 2:
+                results.append({'id': basket_id, 'missing': missing,
+                                'error': 'Moins de 2 actifs avec des données dans ce panier'})
+                continue
+            screened.append(present)
+            results.append({'id': basket_id, 'missing': missing})
+
+        with metrics.span('screen'):
+            metrics_by_basket = iter(calc.screen_baskets(corr_matrix, covariance, screened, top_pairs,
+                                                         periods_per_year))
+        for result in results:
+            if 'error' not in result:
+                result.update(next(metrics_by_basket))
+
+        with metrics.span('statistics'):
+            statistics = calc.calculate_statistics(returns_df, periods_per_year)
+
+        # Intraday bars are dated to the minute (UTC)
+        date_format = '%Y-%m-%d' if params['interval'] == '1d' else '%Y-%m-%d %H:%M'
+        logger.info(f"Screened {len(baskets)} baskets over {len(corr_matrix)} assets")
+        return jsonify({
+            'period': params['period'],
+            'interval': params['interval'],
+            'data_points': len(returns_df),
+            'start_date': prices_df.index[0].strftime(date_format),
+            'end_date': prices_df.index[-1].strftime(date_format),
+            'assets': corr_matrix.columns.tolist(),
+            'asset_names': _get_asset_names(corr_matrix.columns),
+            'statistics': statistics,
+            'baskets': results
+        })
+
+    except AnalysisError as e:
+        return jsonify(e.to_dict()), e.status_code
+    except Exception as e:
+        logger.error(f"Error screening baskets: {str(e)}", exc_info=True)
+        return jsonify({'error': f'Erreur lors du calcul: {str(e)}'}), 500
+
+def _risk_model_result(returns_df, interval):
+    """Covariance factorization of the basket (RiskModel), cached with its Pearson result"""
+    from correlation_calc import RiskModel
+
+    covariance = _covariance_result(returns_df)['covariance']
+    periods_per_year = get_calculator().periods_per_year(returns_df, interval)
+    return _correlation_result(returns_df, 'pearson', {
+        'risk_model': lambda matrix: RiskModel(matrix.columns, covariance, periods_per_year)
+    })
+
+def _parse_weights(data):
+    """Validate the optional what-if weights of a risk request: {symbol: finite number}, not all zero"""
+    weights = data.get('weights')
+    if weights is None:
+        return None
+    if not isinstance(weights, dict) or not all(
+            isinstance(w, (int, float)) and not isinstance(w, bool) for w in weights.values()):
+        raise AnalysisError('Paramètre weights invalide: attendu {"SYMBOLE": poids}')
+    # JSON bodies may carry NaN/Infinity, and integers too large for a float
+    if not all(abs(w) < 1e300 and math.isfinite(w) for w in weights.values()):
+        raise AnalysisError('Paramètre weights invalide: poids non finis')
+    if not any(weights.values()):
+        raise AnalysisError('Paramètre weights invalide: au moins un poids doit être non nul')
+    return weights
+
+@app.route('/api/portfolio/risk', methods=['POST'])
+def portfolio_risk():
+    """
+    Portfolio risk of the basket: minimum-variance, risk-parity and equal
+    weights, each with its annualized volatility and the share of it each
+    asset contributes.
+
+    Same body as /api/correlation, plus optional `weights` ({symbol:
+    weight}, a what-if portfolio, used as given) and `long_only`
+    (minimum variance without short positions, true by default). The
+    covariance factorization and the optimized portfolios are cached per
+    returns version: a what-if query on the same basket only costs a
+    matrix-vector product.
+    """
+    try:
+        data = request.get_json()
+        params = _parse_correlation_request(data)
+        long_only = bool(data.get('long_only', True))
+        weights = _parse_weights(data)
+
+        _, returns_df = _load_returns(params)
+        result = _risk_model_result(returns_df, params['interval'])
+        model = result['risk_model']
+        unknown = [symbol for symbol in (weights or {}) if symbol not in model.columns]
+        if unknown:
+            raise AnalysisError(f'Actifs absents du panier analysé: {unknown}')
+
+        name = f"portfolios:{'long_only' if long_only else 'unconstrained'}"
+        with metrics.span('portfolio'):
+            portfolios = _correlation_result(returns_df, 'pearson', {name: lambda matrix: model.portfolios(long_only)})[name]
+            if weights is not None:
+                portfolios = dict(portfolios, custom=model.risk(model.weights_vector(weights)))
+
+        return jsonify({
+            'assets': model.columns,
+            'asset_names': _get_asset_names(model.columns),
+            'period': params['period'],
+            'interval': params['interval'],
+            'data_points': len(returns_df),
+            'long_only': long_only,
+            'portfolios': portfolios,
+            'model': {'regularized': model.regularized, 'condition_number': model.condition_number}
+        })
+
+    except AnalysisError as e:
+        return jsonify(e.to_dict()), e.status_code
+    except Exception as e:
+        logger.error(f"Error computing portfolio risk: {str(e)}", exc_info=True)
+        return jsonify({'error': f'Erreur lors du calcul: {str(e)}'}), 500
+
 @app.route('/api/prices', methods=['POST'])
 def get_latest_prices():
     """Get latest prices for selected assets"""
@@ -228,10 +1026,11 @@ def get_latest_prices():
         if not data or 'assets' not in data:
             return jsonify({'error': 'Missing assets parameter'}), 400
         
-        prices = data_fetcher.get_latest_prices(data['assets'])
+        quotes = get_data_fetcher().get_latest_quotes(data['assets'])
         
         return jsonify({
-            'prices': prices,
+            'prices': {symbol: quote['price'] for symbol, quote in quotes.items()},
+            'quotes': quotes,
             'timestamp': datetime.now().isoformat()
         })
         
@@ -241,29 +1040,145 @@ def get_latest_prices():
 
 
 
-@app.route('/api/export', methods=['POST'])
-def export_data():
-    """Export correlation data as CSV"""
+@app.route('/api/prices/stream', methods=['GET'])
+def stream_prices():
+    """
+    Server-Sent Events stream of live quotes.
+
+    Symbols are passed per asset type as comma-separated query parameters,
+    e.g. /api/prices/stream?crypto=BTC,ETH&stocks=AAPL. Every subscriber
+    shares the same upstream polling loop; each "prices" event only
+    contains the quotes that changed since the previous event.
+    """
+    assets = {}
+    for asset_type in ['crypto', 'stocks', 'etfs', 'commodities']:
+        symbols = [s.strip() for s in request.args.get(asset_type, '').split(',') if s.strip()]
+        if symbols:
+            assets[asset_type] = symbols
+
+    if not assets:
+        return jsonify({'error': 'Missing symbols (crypto, stocks, etfs, commodities)'}), 400
+
+    subscription = price_broadcaster.subscribe(assets)
+
+    def generate():
+        try:
+            while True:
+                quotes = subscription.get(timeout=Config.PRICE_STREAM_HEARTBEAT)
+                if quotes is None:
+                    # Keep the connection open through proxies
+                    yield ': keep-alive\n\n'
+                    continue
+                yield f"event: prices\ndata: {app.json.dumps(quotes)}\n\n"
+        finally:
+            price_broadcaster.unsubscribe(subscription)
+
+    return Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={'X-Accel-Buffering': 'no', 'Cache-Control': 'no-cache'}
+    )
+
+def _export_sheets(entry, names):
+    """Sheets of an export, each read chunk by chunk when the file is written"""
+    import pandas as pd
+    from exports import Sheet, row_chunks
+
+    params = entry['params']
+    loaded = []
+
+    def frame_chunks(name):
+        if name in entry:
+            yield from row_chunks(entry[name])
+        elif 'end_date' in entry:
+            # Long period: read back from the history store one window at a time
+            for i, (prices_df, returns_df) in enumerate(get_data_fetcher().iter_returns(
+                    params['assets'], params['period'], params['returns_method'])):
+                frame = returns_df if name == 'returns' else prices_df.iloc[1 if i else 0:]
+                frame = frame[frame.index <= entry['end_date']]
+                if len(frame):
+                    yield frame
+        else:
+            # Answered from the cube: the frames come from the live path (usually cached)
+            if not loaded:
+                loaded.extend(_load_returns(params))
+            yield from row_chunks(loaded[1] if name == 'returns' else loaded[0])
+
+    def statistics_chunks():
+        statistics = entry.get('statistics')
+        if statistics is None:
+            calc = get_calculator()
+            statistics = calc.calculate_statistics(entry['returns'],
+                                                   calc.periods_per_year(entry['returns'], params['interval']))
+        yield pd.DataFrame.from_dict(statistics, orient='index')
+
+    date_format = '%Y-%m-%d' if params['interval'] == '1d' else '%Y-%m-%d %H:%M'
+    sheets = []
+    for name in names:
+        if name == 'correlation':
+            sheets.append(Sheet(name, [entry['matrix']], 'asset'))
+        elif name == 'statistics':
+            sheets.append(Sheet(name, statistics_chunks(), 'asset'))
+        else:
+            sheets.append(Sheet(name, frame_chunks(name), 'date', date_format))
+    return sheets
+
+@app.route('/api/export/<result_id>', methods=['GET'])
+def export_result(result_id):
+    """
+    Stream an analysis result as a file, from the result cache.
+
+    `result_id` comes with the matrix of /api/correlation. Query parameters:
+    `format` (csv, parquet or xlsx) and `sheets`, a comma-separated list of
+    tables to add after the correlation matrix (statistics, returns,
+    prices). Several CSV or Parquet tables are sent as a ZIP archive.
+    """
+    from exports import EXPORT_FORMATS, EXPORT_SHEETS, check_format, is_archive, stream_export
+
     try:
-        data = request.get_json()
-        
-        if not data or 'correlation_matrix' not in data:
-            return jsonify({'error': 'Missing correlation matrix'}), 400
-        
-        # Convert correlation matrix to DataFrame
-        corr_df = pd.DataFrame(data['correlation_matrix'])
-        
-        # Convert to CSV
-        csv_data = corr_df.to_csv()
-        
-        return jsonify({
-            'csv': csv_data,
-            'filename': f"correlation_matrix_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        })
-        
+        export_format = request.args.get('format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            raise AnalysisError(f'Format invalide. Choix: {list(EXPORT_FORMATS)}')
+        extra = [name.strip() for name in request.args.get('sheets', '').split(',') if name.strip()]
+        unknown = [name for name in extra if name not in EXPORT_SHEETS]
+        if unknown:
+            raise AnalysisError(f'Feuille(s) inconnue(s): {unknown}. Choix: {list(EXPORT_SHEETS[1:])}')
+        try:
+            check_format(export_format)
+        except ImportError:
+            raise AnalysisError(f'Export {export_format} indisponible sur ce serveur (pyarrow non installé)',
+                                status_code=501)
+
+        entry = _export_entry(result_id)
+        if entry is None:
+            raise AnalysisError("Résultat introuvable ou expiré. Relancez l'analyse avant d'exporter.",
+                                status_code=404)
+
+        sheets = _export_sheets(entry, [name for name in EXPORT_SHEETS if name == 'correlation' or name in extra])
+        chunks = stream_export(export_format, sheets)
+        first_chunk = next(chunks)
+    except AnalysisError as e:
+        return jsonify(e.to_dict()), e.status_code
     except Exception as e:
-        app.logger.error(f"Error exporting data: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+        logger.error(f"Error exporting result {result_id}: {str(e)}", exc_info=True)
+        return jsonify({'error': f"Erreur lors de l'export: {str(e)}"}), 500
+
+    def generate():
+        yield first_chunk
+        try:
+            yield from chunks
+        except Exception as e:
+            # Headers are sent: the client gets a truncated file
+            logger.error(f"Error streaming export {result_id}: {str(e)}", exc_info=True)
+
+    archive = is_archive(export_format, sheets)
+    mimetype, extension = ('application/zip', 'zip') if archive else EXPORT_FORMATS[export_format]
+    filename = f"correlation_{entry['params']['period']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"', 'X-Accel-Buffering': 'no'}
+    )
 
 @app.route('/api/search-assets', methods=['POST'])
 def search_assets():
@@ -279,7 +1194,7 @@ def search_assets():
         if len(query) < 2:
             return jsonify({'error': 'Query too short'}), 400
         
-        results = data_fetcher.search_assets(query)
+        results = get_data_fetcher().search_assets(query)
         
         return jsonify({
             'results': results,
@@ -312,7 +1227,7 @@ def add_custom_asset():
             return jsonify({'error': f'Invalid category. Must be one of: {valid_categories}'}), 400
         
         # Validate the asset exists and can be fetched
-        validation_result = data_fetcher.validate_asset(symbol, source)
+        validation_result = get_data_fetcher().validate_asset(symbol, source)
         
         if not validation_result['valid']:
             return jsonify({'error': validation_result['error']}), 400
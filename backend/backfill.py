@@ -0,0 +1,128 @@
+"""
+Warm-up / backfill of the daily history store.
+
+After a deploy or a cache wipe, loads the history of the whole catalog (or
+of the symbols listed in a file) into the store DataFetcher reads the long
+periods from, so the first users do not pay for cold fetches. Symbols are
+fetched in batches, one yf.download call per batch and chunk of
+HISTORY_CHUNK_DAYS; coins Yahoo does not list go to CoinGecko under
+COINGECKO_REQUESTS_PER_MINUTE. Only missing chunks are fetched: an
+interrupted run resumes where it stopped when started again.
+
+Run from backend/, before taking traffic:
+    python backfill.py                              # whole catalog, longest period
+    python backfill.py --symbols-file symbols.txt --period 5y
+"""
+import argparse
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+import numpy as np
+
+from config import Config
+from history_store import ONE_DAY
+from correlation_cube import catalog_assets
+
+logger = logging.getLogger('backfill')
+
+
+def read_symbols_file(path: str) -> Dict[str, List[str]]:
+    """
+    Symbols of a file, one per line, by asset class: crypto symbols are
+    those of the catalog or written `crypto:SYMBOL`, the rest are Yahoo
+    tickers. Blank lines and `#` comments are ignored.
+    """
+    symbols = {'crypto': [], 'stocks': []}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            symbol = line.split('#', 1)[0].strip()
+            if not symbol:
+                continue
+            if symbol.lower().startswith('crypto:'):
+                symbols['crypto'].append(symbol.split(':', 1)[1].strip().upper())
+            elif symbol.upper() in Config.CRYPTO_ASSETS:
+                symbols['crypto'].append(symbol.upper())
+            else:
+                symbols['stocks'].append(symbol)
+    return {asset_class: list(dict.fromkeys(values)) for asset_class, values in symbols.items()}
+
+
+def catalog_symbols() -> Dict[str, List[str]]:
+    catalog = catalog_assets()
+    return {'crypto': catalog['crypto'], 'stocks': catalog['stocks'] + catalog['etfs'] + catalog['commodities']}
+
+
+def planned_chunks(store, asset_class: str, symbols: List[str], start, end, chunk_days: int) -> int:
+    """
+    Upper bound of the upstream calls left for a batch: one per chunk of
+    each distinct missing range, as grouped by backfill_history (backward
+    walks stop earlier at listing dates).
+    """
+    ranges = set()
+    for symbol in symbols:
+        ranges.update(r for r in store.missing(asset_class, symbol, start, end) if r is not None and r[1] >= r[0])
+    return sum(-(-int((last - first) // ONE_DAY + 1) // chunk_days) for first, last in ranges)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load daily history into the store before taking traffic')
+    parser.add_argument('--symbols-file', help='File with one symbol per line (default: the whole catalog)')
+    parser.add_argument('--period', default='max', choices=[p for p, info in Config.TIME_PERIODS.items() if 'days' in info],
+                        help='History to load (default: max)')
+    parser.add_argument('--batch-size', type=int, default=50, help='Symbols per upstream call (default: 50)')
+    parser.add_argument('--reset', action='store_true', help='Forget the stored history of these symbols first')
+    args = parser.parse_args()
+    if args.batch_size < 1:
+        parser.error('--batch-size must be at least 1')
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    from data_fetcher import DataFetcher
+
+    fetcher = DataFetcher()
+    store = fetcher.history_store
+    symbols = read_symbols_file(args.symbols_file) if args.symbols_file else catalog_symbols()
+    end_date = datetime.now() - timedelta(days=1)
+    start_date = datetime.now() - timedelta(days=Config.TIME_PERIODS[args.period]['days'])
+    start, end = np.datetime64(start_date.date()), np.datetime64(end_date.date())
+
+    if args.reset:
+        for asset_class, values in symbols.items():
+            for symbol in values:
+                store.clear(asset_class, symbol)
+
+    batches = [(asset_class, values[i:i + args.batch_size])
+               for asset_class, values in symbols.items() for i in range(0, len(values), args.batch_size)]
+    planned = sum(planned_chunks(store, asset_class, batch, start, end, Config.HISTORY_CHUNK_DAYS)
+                  for asset_class, batch in batches)
+    logger.info(f"Backfilling {sum(len(v) for v in symbols.values())} symbols over {args.period} "
+                f"({start} to {end}), about {planned} chunks to fetch")
+
+    started = time.perf_counter()
+    done = {'chunks': 0, 'failed': 0}
+
+    def progress(asset_class, active, chunk_start, chunk_end):
+        done['chunks'] += 1
+        elapsed = time.perf_counter() - started
+        logger.info(f"[{done['chunks']}/~{max(planned, done['chunks'])}] {asset_class} {chunk_start}..{chunk_end}: "
+                    f"{len(active)} symbols, {elapsed:.0f}s elapsed")
+
+    for asset_class, batch in batches:
+        stats = fetcher.backfill_history(batch, asset_class, start, end, progress)
+        done['failed'] += stats['failed']
+
+    covered = {asset_class: [s for s in values if store.span(asset_class, s) is not None]
+               for asset_class, values in symbols.items()}
+    without = [s for asset_class, values in symbols.items() for s in values if s not in covered[asset_class]]
+    logger.info(f"Done in {time.perf_counter() - started:.1f}s: {done['chunks']} chunks fetched, "
+                f"{done['failed']} failed, {sum(len(v) for v in covered.values())} symbols with history")
+    if without:
+        logger.warning(f"No history for: {', '.join(without)}")
+    if done['failed']:
+        # Failed chunks are fetched again by the next run
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
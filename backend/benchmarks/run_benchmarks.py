@@ -0,0 +1,192 @@
+"""
+Offline benchmark suite for DataFetcher.fetch_mixed_assets and CorrelationCalculator.
+
+Runs against the deterministic synthetic provider (or local files), so it
+needs no network access. Sweeps the number of assets, the period and the
+correlation method, and reports latency percentiles, throughput and peak
+memory as JSON.
+
+Usage (from backend/):
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --assets 10,100,1000,5000 --periods 30d,1y --repeat 5
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --baseline results.json --tolerance 0.25   # exit 1 on regression
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from correlation_calc import CorrelationCalculator
+from data_fetcher import DataFetcher
+from providers import LocalFileProvider, SyntheticProvider
+
+# Share of crypto (24/7) assets in generated baskets, to exercise the alignment
+CRYPTO_SHARE = 0.2
+
+
+def build_basket(n_assets):
+    """Synthetic basket split between crypto and stocks"""
+    n_crypto = int(n_assets * CRYPTO_SHARE)
+    return {
+        'crypto': [f"C{i:04d}" for i in range(n_crypto)],
+        'stocks': [f"S{i:04d}" for i in range(n_assets - n_crypto)]
+    }
+
+
+def measure(func, repeat):
+    """Run func `repeat` times; return (latencies in seconds, peak traced memory in bytes, last result)"""
+    latencies = []
+    peak = 0
+    result = None
+    for _ in range(repeat):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = func()
+        latencies.append(time.perf_counter() - start)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return latencies, peak, result
+
+
+def summarize(latencies, peak, work_units):
+    """Latency percentiles (ms), throughput and peak memory (MB)"""
+    latencies = np.asarray(latencies)
+    return {
+        'runs': len(latencies),
+        'p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'p95_ms': float(np.percentile(latencies, 95) * 1000),
+        'p99_ms': float(np.percentile(latencies, 99) * 1000),
+        'mean_ms': float(latencies.mean() * 1000),
+        'ops_per_s': float(1 / latencies.mean()),
+        'units_per_s': float(work_units / latencies.mean()),
+        'peak_memory_mb': peak / 1024 ** 2
+    }
+
+
+def run(args):
+    provider = LocalFileProvider(args.local_dir) if args.local_dir else SyntheticProvider(seed=args.seed)
+    fetcher = DataFetcher(provider=provider)
+    calc = CorrelationCalculator()
+
+    results = []
+    for n_assets in args.assets:
+        basket = build_basket(n_assets)
+        for period in args.periods:
+            def fetch():
+                # Benchmark the full fetch + alignment, not the cache
+                fetcher.cache.clear()
+                fetcher.cache_timestamps.clear()
+                return fetcher.fetch_mixed_assets(basket, period)
+
+            latencies, peak, prices = measure(fetch, args.repeat)
+            results.append({
+                'benchmark': 'fetch_mixed_assets',
+                'assets': n_assets,
+                'period': period,
+                'rows': len(prices),
+                **summarize(latencies, peak, prices.size)
+            })
+
+            latencies, peak, returns = measure(lambda: calc.calculate_returns(prices, method='log'), args.repeat)
+            results.append({
+                'benchmark': 'calculate_returns',
+                'assets': n_assets,
+                'period': period,
+                'rows': len(returns),
+                **summarize(latencies, peak, returns.size)
+            })
+
+            for method in args.methods:
+                case = {'benchmark': 'calculate_correlation_matrix', 'assets': n_assets,
+                        'period': period, 'method': method}
+                if method == 'kendall' and n_assets > args.max_kendall_assets:
+                    results.append({**case, 'skipped': f'kendall limited to {args.max_kendall_assets} assets'})
+                    continue
+
+                latencies, peak, _ = measure(
+                    lambda: calc.calculate_correlation_matrix(returns, method=method), args.repeat
+                )
+                # Throughput in matrix cells (asset pairs) per second
+                results.append({**case, 'rows': len(returns), **summarize(latencies, peak, n_assets ** 2)})
+
+            print(f"done: {n_assets} assets, {period}", file=sys.stderr)
+
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'provider': provider.name,
+            'repeat': args.repeat
+        },
+        'results': results
+    }
+
+
+def _case_key(result):
+    return (result['benchmark'], result['assets'], result['period'], result.get('method'))
+
+
+def compare(report, baseline, tolerance):
+    """Return the cases whose p50 latency regressed by more than `tolerance` versus the baseline"""
+    previous = {_case_key(r): r for r in baseline['results'] if 'p50_ms' in r}
+    regressions = []
+    for result in report['results']:
+        before = previous.get(_case_key(result))
+        if before and 'p50_ms' in result and result['p50_ms'] > before['p50_ms'] * (1 + tolerance):
+            regressions.append({
+                'case': _case_key(result),
+                'baseline_p50_ms': before['p50_ms'],
+                'p50_ms': result['p50_ms']
+            })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmarks for the correlation pipeline')
+    parser.add_argument('--assets', default='10,100,1000,5000',
+                        type=lambda v: [int(x) for x in v.split(',')], help='Comma-separated basket sizes')
+    parser.add_argument('--periods', default='30d,1y', type=lambda v: v.split(','),
+                        help='Comma-separated periods from Config.TIME_PERIODS')
+    parser.add_argument('--methods', default='pearson,spearman,kendall', type=lambda v: v.split(','),
+                        help='Comma-separated correlation methods')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per case')
+    parser.add_argument('--max-kendall-assets', type=int, default=100,
+                        help='Skip kendall above this basket size (it is O(n^2 * T log T))')
+    parser.add_argument('--seed', type=int, default=42, help='Synthetic provider seed')
+    parser.add_argument('--local-dir', help='Use LocalFileProvider on this directory instead of synthetic data')
+    parser.add_argument('--output', help='Write the JSON report to this file (default: stdout)')
+    parser.add_argument('--baseline', help='Previous JSON report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed p50 slowdown versus the baseline (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    report = run(args)
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            report['regressions'] = compare(report, json.load(f), args.tolerance)
+        exit_code = 1 if report['regressions'] else 0
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Cold start benchmark for the Flask app.
+
+Each run starts a fresh interpreter and measures:
+  - import_app_ms: `import app` (what gunicorn pays before accepting connections)
+  - first_health_ms: import + first /api/health response
+  - first_assets_ms: first /api/assets response, right after the health check
+  - ready_ms: until the background warm-up has built DataFetcher and CorrelationCalculator
+  - heavy_imports_ms: importing data_fetcher + correlation_calc alone, i.e. what the
+    first health check would pay if they were imported at module load
+
+Usage (from backend/):
+    python benchmarks/startup_benchmark.py --repeat 10 --output startup.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+client = app.app.test_client()
+assert client.get('/api/health').status_code == 200
+health = time.perf_counter()
+assert client.get('/api/assets').status_code == 200
+assets = time.perf_counter()
+app.get_data_fetcher()
+app.get_calculator()
+ready = time.perf_counter()
+print(json.dumps({
+    'import_app_ms': (imported - start) * 1000,
+    'first_health_ms': (health - start) * 1000,
+    'first_assets_ms': (assets - health) * 1000,
+    'ready_ms': (ready - start) * 1000
+}))
+"""
+
+HEAVY_CHILD = r"""
+import json, time
+start = time.perf_counter()
+import data_fetcher, correlation_calc
+print(json.dumps({'heavy_imports_ms': (time.perf_counter() - start) * 1000}))
+"""
+
+
+def run_child(code, env):
+    output = subprocess.run([sys.executable, '-c', code], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cold start benchmark')
+    parser.add_argument('--repeat', type=int, default=10, help='Fresh interpreters per measurement')
+    parser.add_argument('--output', help='Write the JSON report to this file (default: stdout)')
+    args = parser.parse_args()
+
+    # Offline and isolated: no network, no persisted caches from a previous run
+    env = dict(os.environ, DATA_PROVIDER='synthetic', DATA_DIR=tempfile.mkdtemp(prefix='startup-'))
+
+    samples = {}
+    for _ in range(args.repeat):
+        for code in (CHILD, HEAVY_CHILD):
+            for key, value in run_child(code, env).items():
+                samples.setdefault(key, []).append(value)
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat
+        },
+        'results': {
+            key: {
+                'p50_ms': float(np.percentile(values, 50)),
+                'p95_ms': float(np.percentile(values, 95)),
+                'min_ms': float(np.min(values)),
+                'max_ms': float(np.max(values))
+            }
+            for key, values in samples.items()
+        }
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
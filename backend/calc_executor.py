@@ -0,0 +1,163 @@
+import threading
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def _correlation_block(input_name: str, shape: Tuple[int, int], output_name: str,
+                       method: str, start: int, stop: int):
+    """
+    Pool task: fill rows [start, stop) of the correlation matrix.
+
+    Returns are read from, and results written to, shared memory segments
+    owned by the calling process; only names and bounds are pickled.
+    """
+    from scipy import stats
+
+    source = shared_memory.SharedMemory(name=input_name)
+    target = shared_memory.SharedMemory(name=output_name)
+    try:
+        values = np.ndarray(shape, dtype=np.float64, buffer=source.buf, order='F')
+        n = shape[1]
+        out = np.ndarray((n, n), dtype=np.float64, buffer=target.buf)
+
+        if method == 'kendall':
+            # Upper triangle from each row i; the mirror (j, i) is only written by row i's owner
+            for i in range(start, stop):
+                out[i, i] = 1.0
+                for j in range(i + 1, n):
+                    tau = stats.kendalltau(values[:, i], values[:, j]).statistic
+                    out[i, j] = out[j, i] = tau
+        else:
+            data = stats.rankdata(values, axis=0) if method == 'spearman' else values
+            std = data.std(axis=0, ddof=1)
+            # Constant columns have no correlation: NaN row and column, diagonal included, as DataFrame.corr
+            constant = std == 0
+            with np.errstate(divide='ignore', invalid='ignore'):
+                z = (data - data.mean(axis=0)) / std
+            z[:, constant] = 0.0
+            out[start:stop] = np.clip(z[:, start:stop].T @ z / (shape[0] - 1), -1.0, 1.0)
+            for i in range(start, stop):
+                out[i, i] = 1.0
+            out[start:stop, constant] = np.nan
+            out[start:stop][constant[start:stop]] = np.nan
+        # Release the views before closing the mappings
+        del values, out
+    finally:
+        source.close()
+        target.close()
+
+
+def _warmup():
+    """Pool task importing scipy.stats, so the first real task does not pay for it"""
+    from scipy import stats  # noqa: F401
+
+
+class CalculationExecutor:
+    """
+    Runs CPU-heavy CorrelationCalculator work inline or on a process pool.
+
+    Kendall correlation is a pure-Python loop over asset pairs and holds the
+    GIL for the whole request, blocking the other threads of a gthread
+    worker; large Pearson/Spearman matrices are plain CPU work that benefits
+    from more cores. Above a size threshold the matrix is split into row
+    blocks (balanced by number of pairs for Kendall) computed by a process
+    pool. Returns go to the pool through a shared memory segment and the
+    result comes back through another, so no DataFrame is pickled.
+
+    Small inputs run inline: the pool round trip costs a few milliseconds.
+    """
+
+    def __init__(self, calc, processes: int, kendall_inline_max: int, dense_inline_max: int):
+        self.calc = calc
+        self.processes = processes
+        self.kendall_inline_max = kendall_inline_max
+        self.dense_inline_max = dense_inline_max
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # forkserver: forking a threaded gunicorn worker directly is unsafe
+                method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+                self._pool = ProcessPoolExecutor(max_workers=self.processes,
+                                                 mp_context=multiprocessing.get_context(method))
+            return self._pool
+
+    def warm_up(self):
+        """Start the pool processes ahead of the first heavy request"""
+        if self.processes > 0:
+            for future in [self.pool.submit(_warmup) for _ in range(self.processes)]:
+                future.result()
+
+    def should_offload(self, rows: int, cols: int, method: str) -> bool:
+        """Size thresholds: Kendall on pairs x observations, others on cells x assets"""
+        if self.processes <= 0 or cols < 2:
+            return False
+        if method == 'kendall':
+            return cols * (cols - 1) // 2 * rows > self.kendall_inline_max
+        return rows * cols * cols > self.dense_inline_max
+
+    def _blocks(self, n: int, method: str) -> List[Tuple[int, int]]:
+        """Row ranges, a few per process, with about the same amount of work each"""
+        count = min(n, self.processes * 4)
+        if method == 'kendall':
+            # Row i has n - i - 1 pairs: cut the cumulative pair count in equal parts
+            work = np.cumsum(np.arange(n, 0, -1) - 1)
+            bounds = np.searchsorted(work, np.linspace(0, work[-1], count + 1)[1:-1], side='right')
+        else:
+            bounds = np.linspace(0, n, count + 1)[1:-1].astype(int)
+        edges = [0] + sorted(set(int(b) for b in bounds if 0 < b < n)) + [n]
+        return list(zip(edges[:-1], edges[1:]))
+
+    def correlation_matrix(self, returns_df: pd.DataFrame, method: str = 'pearson') -> pd.DataFrame:
+        """Same result as CorrelationCalculator.calculate_correlation_matrix"""
+        rows, cols = returns_df.shape
+        if (method not in ('pearson', 'spearman', 'kendall') or not self.should_offload(rows, cols, method)
+                or returns_df.isnull().values.any()):
+            metrics.inc('calc_offload_total', method=method, mode='inline')
+            return self.calc.calculate_correlation_matrix(returns_df, method=method)
+
+        metrics.inc('calc_offload_total', method=method, mode='process')
+        values = np.asfortranarray(returns_df.to_numpy(dtype=np.float64))
+        source = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        target = shared_memory.SharedMemory(create=True, size=cols * cols * 8)
+        try:
+            np.ndarray(values.shape, dtype=np.float64, buffer=source.buf, order='F')[:] = values
+            futures = [
+                self.pool.submit(_correlation_block, source.name, values.shape, target.name, method, start, stop)
+                for start, stop in self._blocks(cols, method)
+            ]
+            for future in futures:
+                future.result()
+            matrix = np.ndarray((cols, cols), dtype=np.float64, buffer=target.buf).copy()
+        except Exception as e:
+            logger.warning(f"Offloaded {method} correlation failed, computing inline: {e}")
+            return self.calc.calculate_correlation_matrix(returns_df, method=method)
+        finally:
+            for segment in (source, target):
+                segment.close()
+                segment.unlink()
+
+        corr_matrix = pd.DataFrame(matrix, index=returns_df.columns, columns=returns_df.columns)
+        if corr_matrix.isnull().any().any():
+            logger.warning("Correlation matrix contains NaN values")
+            corr_matrix = corr_matrix.fillna(0)
+        return corr_matrix
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
@@ -13,9 +13,68 @@ class Config:
     
     # API configuration
     COINGECKO_API_KEY = os.environ.get('COINGECKO_API_KEY', '')
+    COINGECKO_API_URL = os.environ.get('COINGECKO_API_URL', 'https://api.coingecko.com/api/v3').rstrip('/')
+    YAHOO_CHART_URL = os.environ.get('YAHOO_CHART_URL', 'https://query1.finance.yahoo.com/v8/finance/chart').rstrip('/')
     
     # Cache settings
     CACHE_DURATION = int(os.environ.get('CACHE_DURATION', 300))  # 5 minutes
+    QUOTE_CACHE_DURATION = int(os.environ.get('QUOTE_CACHE_DURATION', 30))  # 30 seconds
+    QUOTE_CACHE_SIZE = int(os.environ.get('QUOTE_CACHE_SIZE', 5000))  # symbols per worker
+    
+    # Market data provider: 'live' (Yahoo Finance + CoinGecko), 'http' (raw HTTP APIs at the URLs above),
+    # 'synthetic' or 'local'
+    DATA_PROVIDER = os.environ.get('DATA_PROVIDER', 'live')
+    SYNTHETIC_SEED = int(os.environ.get('SYNTHETIC_SEED', 42))
+    LOCAL_DATA_DIR = os.environ.get('LOCAL_DATA_DIR', 'market_data')  # one <SYMBOL>.csv per symbol
+    
+    # Directory for data persisted across restarts (caches, stores)
+    DATA_DIR = os.environ.get('DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+    
+    # Asset search: ticker metadata cache and upstream lookups
+    METADATA_CACHE_TTL = int(os.environ.get('METADATA_CACHE_TTL', 3600))  # 1 hour
+    SEARCH_LOOKUP_WORKERS = int(os.environ.get('SEARCH_LOOKUP_WORKERS', 6))
+    YAHOO_REQUESTS_PER_SECOND = float(os.environ.get('YAHOO_REQUESTS_PER_SECOND', 5))
+    COINGECKO_REQUESTS_PER_MINUTE = float(os.environ.get('COINGECKO_REQUESTS_PER_MINUTE', 30))  # price history calls
+    
+    # Symbol resolution table (CoinGecko IDs, validated custom assets)
+    RESOLUTION_CACHE_TTL = int(os.environ.get('RESOLUTION_CACHE_TTL', 7 * 24 * 3600))  # 7 days
+    RESOLUTION_NEGATIVE_TTL = int(os.environ.get('RESOLUTION_NEGATIVE_TTL', 3600))  # 1 hour
+    SYMBOL_RESOLUTION_FILE = os.environ.get('SYMBOL_RESOLUTION_FILE', '')  # optional JSON to preload
+    
+    # Live price streaming (one upstream poll per interval, shared by all subscribers)
+    PRICE_STREAM_INTERVAL = int(os.environ.get('PRICE_STREAM_INTERVAL', QUOTE_CACHE_DURATION))
+    PRICE_STREAM_HEARTBEAT = 15  # seconds between keep-alive comments
+    
+    # Aligned price/returns frames shared between gunicorn workers (POSIX shared memory, /dev/shm)
+    SHARED_MEMORY_CACHE = os.environ.get('SHARED_MEMORY_CACHE', 'False').lower() == 'true'
+    SHARED_MEMORY_MAX_MB = int(os.environ.get('SHARED_MEMORY_MAX_MB', 256))  # per worker
+    
+    # CPU-heavy correlation work offloaded to a process pool (0 processes = always inline)
+    CALC_PROCESSES = int(os.environ.get('CALC_PROCESSES', 2))  # per gunicorn worker
+    CALC_KENDALL_INLINE_MAX = int(os.environ.get('CALC_KENDALL_INLINE_MAX', 20000))  # asset pairs x observations
+    CALC_DENSE_INLINE_MAX = int(os.environ.get('CALC_DENSE_INLINE_MAX', 500_000_000))  # observations x assets^2
+
+    # Correlation matrices (and their seriation) cached per returns version and method
+    RESULT_CACHE_SIZE = int(os.environ.get('RESULT_CACHE_SIZE', 64))  # entries per worker
+    RETURNS_CACHE_SIZE = int(os.environ.get('RETURNS_CACHE_SIZE', 64))  # aligned baskets (prices + returns) per worker
+    SERIATION_OPTIMAL_MAX = int(os.environ.get('SERIATION_OPTIMAL_MAX', 300))  # assets; above, no optimal leaf ordering
+    SCREEN_MAX_BASKETS = int(os.environ.get('SCREEN_MAX_BASKETS', 1000))  # baskets per screening request
+
+    # Nightly precomputed correlation cube of the built-in catalog (built by `python correlation_cube.py`)
+    # Off by default: slices are aligned over the whole catalog and may keep fewer rows than the basket alone
+    CORRELATION_CUBE = os.environ.get('CORRELATION_CUBE', 'False').lower() == 'true'
+    CORRELATION_CUBE_FILE = os.environ.get('CORRELATION_CUBE_FILE', os.path.join(DATA_DIR, 'correlation_cube.npz'))
+    CORRELATION_CUBE_MAX_AGE = int(os.environ.get('CORRELATION_CUBE_MAX_AGE', 36 * 3600))  # ignored when older
+    
+    # Daily history of the long periods (5y, 10y, max), stored per symbol and fetched chunk by chunk
+    HISTORY_STORE_DIR = os.environ.get('HISTORY_STORE_DIR', os.path.join(DATA_DIR, 'history'))
+    HISTORY_CHUNK_DAYS = int(os.environ.get('HISTORY_CHUNK_DAYS', 365))  # days per upstream call and per computation chunk
+    RANK_CORRELATION_MAX_VALUES = int(os.environ.get('RANK_CORRELATION_MAX_VALUES', 2_000_000))  # days x assets, Spearman/Kendall over long periods
+
+    # On-demand request profiling (disabled unless a token is set)
+    PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN', '')  # value expected in the X-Profile-Token header
+    PROFILE_INTERVAL = float(os.environ.get('PROFILE_INTERVAL', 0.005))  # seconds between samples
+    PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', 50))  # profiles kept in DATA_DIR/profiles
     
     # Available assets
     CRYPTO_ASSETS = {
@@ -172,5 +231,15 @@ class Config:
         '90d': {'days': 90, 'label': '90 jours'},
         '180d': {'days': 180, 'label': '6 mois'},
         '1y': {'days': 365, 'label': '1 an'},
+        # Long periods: fetched in chunks into the history store, correlations computed chunk by chunk
+        '5y': {'days': 1826, 'label': '5 ans', 'chunked': True},
+        '10y': {'days': 3652, 'label': '10 ans', 'chunked': True},
+        'max': {'days': 9131, 'label': 'Maximum (25 ans)', 'chunked': True},
         'ytd': {'label': 'Depuis début année'}
-    }
\ No newline at end of file
+    }
+    # Bar intervals: daily, or intraday bars (Yahoo keeps 730 days of hourly and 60 days of 15-minute history)
+    INTERVALS = {
+        '1d': {'minutes': 1440, 'label': 'Journalier'},
+        '1h': {'minutes': 60, 'max_days': 730, 'label': 'Horaire'},
+        '15m': {'minutes': 15, 'max_days': 60, 'label': '15 minutes'}
+    }
@@ -2,6 +2,12 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Tuple, Optional
 from scipy import stats as scipy_stats  # Renommé pour éviter le conflit
+from scipy.cluster import hierarchy
+from scipy.spatial.distance import squareform
+from scipy.linalg import cho_factor, cho_solve, eigh
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import minimum_spanning_tree
+from scipy.sparse.linalg import eigsh
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,28 +16,44 @@ class CorrelationCalculator:
 
     @staticmethod
     def calculate_returns(prices_df: pd.DataFrame, method: str = 'log') -> pd.DataFrame:
-        """Calculate returns from price data with validation"""
+        """
+        Calculate returns from price data with validation.
+
+        Works on the price values directly: one ratio array computed in
+        place into log or simple returns, then a single pass dropping rows
+        with NaN or infinite values (the first row has no previous price).
+        """
         if prices_df.empty:
             logger.warning("Empty price dataframe provided")
             return pd.DataFrame()
 
+        values = prices_df.to_numpy(dtype=np.float64)
+
         # Check for zero or negative prices which would break log returns
         if method == 'log':
-            if (prices_df <= 0).any().any():
+            if (values <= 0).any():
                 logger.warning("Found zero or negative prices, using simple returns instead")
                 method = 'simple'
 
-        if method == 'log':
-            # Log returns - more suitable for financial analysis
-            returns = np.log(prices_df / prices_df.shift(1))
-        else:
-            # Simple returns
-            returns = prices_df.pct_change()
+        # float32 bars (intraday): returns computed in float64, then stored as float32 like the prices
+        compact = (prices_df.dtypes == np.float32).all()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = np.divide(values[1:], values[:-1])
+            if method == 'log':
+                # Log returns - more suitable for financial analysis
+                np.log(returns, out=returns)
+            else:
+                # Simple returns
+                returns -= 1.0
 
-        # Remove first row (NaN) and any remaining NaN/inf values
-        returns = returns.dropna()
-        returns = returns.replace([np.inf, -np.inf], np.nan).dropna()
+        index = prices_df.index[1:]
+        valid = np.isfinite(returns).all(axis=1)
+        if not valid.all():
+            returns, index = returns[valid], index[valid]
 
+        if compact:
+            returns = returns.astype(np.float32)
+        returns = pd.DataFrame(returns, index=index, columns=prices_df.columns, copy=False)
         if returns.empty:
             logger.warning("No valid returns calculated")
 
@@ -79,9 +101,8 @@ class CorrelationCalculator:
         if n <= 1:
             return 0.0
         
-        # Get upper triangle of correlation matrix (excluding diagonal)
-        upper_triangle = np.triu(corr_matrix.values, k=1)
-        correlations = upper_triangle[upper_triangle != 0]
+        # Upper triangle of correlation matrix (excluding diagonal), zero correlations included
+        correlations = corr_matrix.values[np.triu_indices(n, k=1)]
         
         # Average absolute correlation
         avg_abs_corr = np.mean(np.abs(correlations))
@@ -129,7 +150,234 @@ class CorrelationCalculator:
         return pairs
     
     @staticmethod
-    def calculate_statistics(returns_df: pd.DataFrame) -> Dict:
+    def seriate(corr_matrix: pd.DataFrame, method: str = 'average', optimal_max: int = 300) -> Dict:
+        """
+        Order the assets so that correlated ones sit next to each other.
+
+        Hierarchical clustering on the correlation distance sqrt(2(1 - rho)),
+        followed by optimal leaf ordering of the dendrogram (adjacent leaves
+        as close as possible). Optimal ordering is cubic in the number of
+        assets, so above `optimal_max` assets the dendrogram order is kept.
+
+        Returns the ordered symbols, the permutation of the matrix positions
+        and the SciPy linkage ([left, right, distance, size] per merge).
+        """
+        n = len(corr_matrix)
+        if n < 2:
+            return {'order': corr_matrix.columns.tolist(), 'permutation': list(range(n)),
+                    'linkage': [], 'optimal': True}
+
+        distances = np.sqrt(np.clip(2.0 * (1.0 - corr_matrix.to_numpy(dtype=np.float64)), 0.0, None))
+        np.fill_diagonal(distances, 0.0)
+        condensed = squareform(distances, checks=False)
+
+        linkage = hierarchy.linkage(condensed, method=method)
+        optimal = n <= optimal_max
+        if optimal:
+            linkage = hierarchy.optimal_leaf_ordering(linkage, condensed)
+
+        permutation = hierarchy.leaves_list(linkage)
+        return {
+            'order': corr_matrix.columns[permutation].tolist(),
+            'permutation': permutation.tolist(),
+            'linkage': [[int(left), int(right), float(distance), int(size)]
+                        for left, right, distance, size in linkage],
+            'optimal': optimal
+        }
+
+    @staticmethod
+    def spectral_analysis(corr_matrix: pd.DataFrame, k: Optional[int] = None, lanczos_min: int = 500) -> Dict:
+        """
+        Top-k eigenvalues and eigenvectors of the correlation matrix, with
+        the absorption ratio and the effective number of bets.
+
+        - absorption ratio: share of the total variance (the trace, i.e. the
+          number of assets) absorbed by the k largest eigenvalues; close to 1
+          when a few common factors drive every asset.
+        - effective number of bets: participation ratio of the eigenvalues,
+          (sum l)^2 / sum l^2, from 1 (a single factor) to N (uncorrelated
+          assets). It equals N^2 / ||C||_F^2, so it needs no decomposition.
+
+        k defaults to a fifth of the assets (Kritzman's absorption ratio), at
+        most 20. From `lanczos_min` assets, a small k is computed with the
+        Lanczos solver (ARPACK); otherwise a dense solver restricted to the
+        k largest eigenvalues is faster.
+        """
+        n = len(corr_matrix)
+        if n < 2:
+            return {}
+        if k is None:
+            k = min(max(1, n // 5), 20)
+        k = max(1, min(int(k), n))
+
+        values = corr_matrix.to_numpy(dtype=np.float64)
+        if n >= lanczos_min and k <= n // 10:
+            # Deterministic start vector: ARPACK's default is random
+            eigenvalues, eigenvectors = eigsh(values, k=k, which='LA', v0=np.ones(n))
+            solver = 'lanczos'
+        else:
+            eigenvalues, eigenvectors = eigh(values, subset_by_index=[n - k, n - 1])
+            solver = 'dense'
+
+        # Largest first; each eigenvector signed so that its loadings sum to a positive value
+        order = np.argsort(eigenvalues)[::-1]
+        eigenvalues, eigenvectors = eigenvalues[order], eigenvectors[:, order]
+        eigenvectors *= np.where(eigenvectors.sum(axis=0) < 0, -1.0, 1.0)
+
+        trace = float(np.trace(values))
+        return {
+            'k': k,
+            'solver': solver,
+            'eigenvalues': eigenvalues.tolist(),
+            'explained_variance': (eigenvalues / trace).tolist(),
+            'eigenvectors': eigenvectors.T.tolist(),
+            'absorption_ratio': float(eigenvalues.sum() / trace),
+            'effective_bets': float(trace ** 2 / np.square(values).sum())
+        }
+
+    @staticmethod
+    def correlation_network(corr_matrix: pd.DataFrame, threshold: float = 0.5, max_edges: int = 5000) -> Dict:
+        """
+        Correlation structure as a network: minimum spanning tree and
+        threshold graph, with node centralities.
+
+        - MST: spanning tree of the correlation distance sqrt(2(1 - rho))
+          with the smallest total length (the backbone of the market).
+        - threshold graph: pairs with |rho| >= threshold, the strongest
+          `max_edges` only.
+
+        Edges are returned column-wise (source and target positions in
+        `nodes`, correlation) and every step works on arrays or sparse
+        matrices, so no Python object is created per pair of assets.
+        Centralities are aligned with `nodes`: degree and strength (sum of
+        |rho|) in the threshold graph, eigenvector centrality of its
+        weighted adjacency, and degree in the MST.
+        """
+        n = len(corr_matrix)
+        values = corr_matrix.to_numpy(dtype=np.float64)
+        nodes = corr_matrix.columns.tolist()
+        if n < 2:
+            return {}
+
+        # MST on distances. csgraph treats (near-)zero entries as missing edges: shift every distance
+        # by 1 so perfectly correlated pairs stay connected (all trees have n - 1 edges, same MST)
+        distances = np.sqrt(np.clip(2.0 * (1.0 - values), 0.0, None)) + 1.0
+        np.fill_diagonal(distances, 0.0)
+        tree = minimum_spanning_tree(distances).tocoo()
+        mst_degree = np.bincount(np.concatenate([tree.row, tree.col]), minlength=n)
+
+        # Threshold graph on the strict upper triangle
+        sources, targets = np.nonzero(np.triu(np.abs(values) >= threshold, k=1))
+        weights = np.abs(values[sources, targets])
+        total_edges = len(weights)
+        if total_edges > max_edges:
+            top = np.argpartition(weights, -max_edges)[-max_edges:]
+            sources, targets, weights = sources[top], targets[top], weights[top]
+        order = np.argsort(weights, kind='stable')[::-1]
+        sources, targets, weights = sources[order], targets[order], weights[order]
+
+        ends = np.concatenate([sources, targets])
+        degree = np.bincount(ends, minlength=n)
+        node_strength = np.bincount(ends, weights=np.concatenate([weights, weights]), minlength=n)
+
+        eigenvector = np.zeros(n)
+        if len(weights):
+            adjacency = csr_matrix((np.concatenate([weights, weights]), (ends, np.concatenate([targets, sources]))),
+                                   shape=(n, n))
+            if n >= 500:
+                _, vectors = eigsh(adjacency, k=1, which='LA', v0=np.ones(n))
+            else:
+                _, vectors = np.linalg.eigh(adjacency.toarray())
+            eigenvector = np.abs(vectors[:, -1])
+            eigenvector /= eigenvector.max()
+
+        return {
+            'nodes': nodes,
+            'threshold': threshold,
+            'mst': {
+                'source': tree.row.tolist(),
+                'target': tree.col.tolist(),
+                'correlation': values[tree.row, tree.col].tolist()
+            },
+            'threshold_graph': {
+                'source': sources.tolist(),
+                'target': targets.tolist(),
+                'correlation': values[sources, targets].tolist(),
+                'truncated': total_edges > len(weights)
+            },
+            'centrality': {
+                'degree': degree.tolist(),
+                'strength': node_strength.tolist(),
+                'eigenvector': eigenvector.tolist(),
+                'mst_degree': mst_degree.tolist()
+            }
+        }
+
+    @staticmethod
+    def screen_baskets(corr_matrix: pd.DataFrame, covariance: np.ndarray, baskets: List[List[str]],
+                       top_pairs: int = 5, periods_per_year: float = 252.0) -> List[Dict]:
+        """
+        Metrics of many baskets drawn from one universe, each read from the
+        universe's correlation and covariance matrices by indexing: nothing
+        is fetched or recomputed per basket.
+
+        Per basket: diversification score and average pairwise correlation,
+        the `top_pairs` pairs with the largest |rho|, and the equally
+        weighted portfolio's annualized volatility and diversification
+        ratio (weighted average volatility / portfolio volatility, 1 for
+        perfectly correlated assets). `covariance` is the Pearson covariance
+        of the returns, in `corr_matrix` order.
+        """
+        values = corr_matrix.to_numpy(dtype=np.float64)
+        covariance = np.asarray(covariance, dtype=np.float64)
+        positions = {symbol: i for i, symbol in enumerate(corr_matrix.columns)}
+
+        results = []
+        for symbols in baskets:
+            index = np.array([positions[symbol] for symbol in symbols])
+            n = len(index)
+            sub = values[np.ix_(index, index)]
+            rows, cols = np.triu_indices(n, k=1)
+            pairs = sub[rows, cols]
+
+            k = min(top_pairs, len(pairs))
+            top = np.argpartition(-np.abs(pairs), k - 1)[:k] if k else np.array([], dtype=int)
+            top = top[np.argsort(-np.abs(pairs[top]), kind='stable')]
+
+            sub_covariance = covariance[np.ix_(index, index)]
+            weights = np.full(n, 1.0 / n)
+            portfolio_variance = float(weights @ sub_covariance @ weights)
+            portfolio_volatility = np.sqrt(max(portfolio_variance, 0.0))
+            average_volatility = float(weights @ np.sqrt(np.clip(np.diag(sub_covariance), 0.0, None)))
+
+            results.append({
+                'assets': list(symbols),
+                'diversification_score': float(1 - np.mean(np.abs(pairs))),
+                'average_correlation': float(np.mean(pairs)),
+                'top_pairs': [
+                    {'asset1': symbols[rows[p]], 'asset2': symbols[cols[p]], 'correlation': float(pairs[p])}
+                    for p in top
+                ],
+                'volatility': float(portfolio_volatility * np.sqrt(periods_per_year)),
+                'diversification_ratio': float(average_volatility / portfolio_volatility)
+                if portfolio_volatility > 0 else None
+            })
+        return results
+
+    @staticmethod
+    def periods_per_year(returns_df: pd.DataFrame, interval: str = '1d') -> float:
+        """
+        Number of return periods in a year, to annualize: 252 trading days
+        for daily bars, otherwise the observed number of bars per trading
+        day (intraday bars follow the trading hours of the basket) x 252.
+        """
+        if interval == '1d' or len(returns_df) < 2:
+            return 252.0
+        days = returns_df.index.normalize().nunique()
+        return 252.0 * len(returns_df) / max(days, 1)
+
+    @staticmethod
+    def calculate_statistics(returns_df: pd.DataFrame, periods_per_year: float = 252.0) -> Dict:
         """Calculate various statistics for each asset with error handling"""
         statistics = {}
 
@@ -160,10 +408,10 @@ class CorrelationCalculator:
                 mean_return = float(asset_returns.mean())
                 volatility = float(asset_returns.std())
 
-                # Annualized Sharpe ratio (assuming daily returns)
+                # Annualized Sharpe ratio (daily returns by default)
                 sharpe_ratio = 0.0
                 if volatility > 0:
-                    sharpe_ratio = float(mean_return / volatility * np.sqrt(252))
+                    sharpe_ratio = float(mean_return / volatility * np.sqrt(periods_per_year))
 
                 # Handle potential issues with skewness and kurtosis
                 try:
@@ -256,4 +504,230 @@ class CorrelationCalculator:
                     'end_date': prices_df.index[-1].strftime('%Y-%m-%d')
                 }
         
-        return performance_data
\ No newline at end of file
+        return performance_data
+
+class ReturnMoments:
+    """
+    Moments of a returns matrix, accumulated chunk by chunk.
+
+    Each chunk's mean and central moments are merged into the running ones
+    with the pairwise update formulas (Chan et al. for the co-moment matrix,
+    Pébay for the third and fourth moments). The Pearson correlation, the
+    betas and the per-asset statistics of a long history then match those
+    of the full returns matrix, which is never held in memory.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        n = len(self.columns)
+        self.count = 0
+        self.mean = np.zeros(n)
+        self.comoment = np.zeros((n, n))  # sum of (x - mean)(x - mean)^T
+        self.m3 = np.zeros(n)
+        self.m4 = np.zeros(n)
+        self.minimum = np.full(n, np.inf)
+        self.maximum = np.full(n, -np.inf)
+        self.positive = np.zeros(n, dtype=np.int64)
+        self.negative = np.zeros(n, dtype=np.int64)
+
+    def update(self, returns: np.ndarray):
+        """Merge a chunk of returns (rows = periods, columns in `self.columns` order)"""
+        values = np.asarray(returns, dtype=np.float64)
+        nb = len(values)
+        if nb == 0:
+            return
+        mean_b = values.mean(axis=0)
+        centered = values - mean_b
+        comoment_b = centered.T @ centered
+        m2_b = np.diag(comoment_b)
+        m3_b = (centered ** 3).sum(axis=0)
+        m4_b = (centered ** 4).sum(axis=0)
+
+        na = self.count
+        n = na + nb
+        delta = mean_b - self.mean
+        m2_a = np.diag(self.comoment).copy()
+        self.m4 += (m4_b + delta ** 4 * na * nb * (na * na - na * nb + nb * nb) / n ** 3
+                    + 6 * delta ** 2 * (na * na * m2_b + nb * nb * m2_a) / n ** 2
+                    + 4 * delta * (na * m3_b - nb * self.m3) / n)
+        self.m3 += m3_b + delta ** 3 * na * nb * (na - nb) / n ** 2 + 3 * delta * (na * m2_b - nb * m2_a) / n
+        self.comoment += comoment_b + np.outer(delta, delta) * (na * nb / n)
+        self.mean += delta * (nb / n)
+        self.count = n
+
+        self.minimum = np.minimum(self.minimum, values.min(axis=0))
+        self.maximum = np.maximum(self.maximum, values.max(axis=0))
+        self.positive += (values > 0).sum(axis=0)
+        self.negative += (values < 0).sum(axis=0)
+
+    def correlation(self) -> pd.DataFrame:
+        """Pearson correlation matrix (0 for constant assets, like calculate_correlation_matrix)"""
+        std = np.sqrt(np.diag(self.comoment))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            matrix = self.comoment / np.outer(std, std)
+        matrix = np.clip(np.nan_to_num(matrix), -1.0, 1.0)
+        np.fill_diagonal(matrix, 1.0)
+        return pd.DataFrame(matrix, index=self.columns, columns=self.columns)
+
+    def betas(self, market_asset: str = 'SPY') -> Dict[str, float]:
+        """Same result as CorrelationCalculator.calculate_beta"""
+        if market_asset not in self.columns:
+            return {}
+        m = self.columns.index(market_asset)
+        market_variance = self.comoment[m, m]
+        return {
+            asset: 1.0 if asset == market_asset else
+            float(self.comoment[i, m] / market_variance) if market_variance > 0 else 0.0
+            for i, asset in enumerate(self.columns)
+        }
+
+    def statistics(self, periods_per_year: float = 252.0) -> Dict:
+        """Same result as CorrelationCalculator.calculate_statistics"""
+        n = self.count
+        statistics = {}
+        for i, asset in enumerate(self.columns):
+            m2 = self.comoment[i, i]
+            if n < 2:
+                statistics[asset] = {
+                    'mean_return': 0.0, 'volatility': 0.0, 'sharpe_ratio': 0.0, 'skewness': 0.0,
+                    'kurtosis': 0.0, 'max_return': 0.0, 'min_return': 0.0,
+                    'positive_days': 0, 'negative_days': 0, 'total_days': n
+                }
+                continue
+            volatility = float(np.sqrt(m2 / (n - 1)))
+            mean_return = float(self.mean[i])
+            statistics[asset] = {
+                'mean_return': mean_return,
+                'volatility': volatility,
+                'sharpe_ratio': float(mean_return / volatility * np.sqrt(periods_per_year)) if volatility > 0 else 0.0,
+                # Biased estimators, as scipy.stats.skew / kurtosis (Fisher) by default
+                'skewness': float((self.m3[i] / n) / (m2 / n) ** 1.5) if m2 > 0 else 0.0,
+                'kurtosis': float((self.m4[i] / n) / (m2 / n) ** 2 - 3.0) if m2 > 0 else 0.0,
+                'max_return': float(self.maximum[i]),
+                'min_return': float(self.minimum[i]),
+                'positive_days': int(self.positive[i]),
+                'negative_days': int(self.negative[i]),
+                'total_days': n
+            }
+        return statistics
+
+
+class RiskModel:
+    """
+    Factorized covariance of a basket, built once per returns version and
+    shared by every portfolio query on it.
+
+    The covariance is made positive definite first: eigenvalues below
+    `floor` times the largest are raised to that floor (a sample
+    covariance is singular when there are more assets than observations,
+    or with a constant asset). Its Cholesky factor L then gives the risk
+    of any weights with two triangular matrix-vector products:
+    sigma = ||L^T w|| and Sigma w = L (L^T w).
+    """
+
+    def __init__(self, columns, covariance: np.ndarray, periods_per_year: float = 252.0, floor: float = 1e-10):
+        self.columns = list(columns)
+        self.periods_per_year = periods_per_year
+        covariance = np.asarray(covariance, dtype=np.float64)
+        covariance = (covariance + covariance.T) / 2
+
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+        minimum = max(float(eigenvalues[-1]), np.finfo(np.float64).tiny) * floor
+        self.regularized = bool(eigenvalues[0] < minimum)
+        if self.regularized:
+            eigenvalues = np.maximum(eigenvalues, minimum)
+            covariance = (eigenvectors * eigenvalues) @ eigenvectors.T
+            covariance = (covariance + covariance.T) / 2
+        self.condition_number = float(eigenvalues[-1] / eigenvalues[0])
+        self.covariance = covariance
+        self.cholesky = np.linalg.cholesky(covariance)
+
+    def weights_vector(self, weights: Dict[str, float]) -> np.ndarray:
+        """Weights by symbol as a vector in `columns` order (0 for the symbols not given)"""
+        positions = {symbol: i for i, symbol in enumerate(self.columns)}
+        vector = np.zeros(len(self.columns))
+        for symbol, weight in weights.items():
+            vector[positions[symbol]] = weight
+        return vector
+
+    def risk(self, weights: np.ndarray) -> Dict:
+        """Annualized volatility of the weights and each asset's share of it (shares sum to 1)"""
+        weights = np.asarray(weights, dtype=np.float64)
+        factor = self.cholesky.T @ weights
+        volatility = float(np.sqrt(factor @ factor))
+        marginal = self.cholesky @ factor  # Sigma w
+        shares = weights * marginal / volatility ** 2 if volatility > 0 else np.zeros_like(weights)
+        return {
+            'weights': dict(zip(self.columns, weights.tolist())),
+            'volatility': volatility * float(np.sqrt(self.periods_per_year)),
+            'risk_contributions': dict(zip(self.columns, shares.tolist()))
+        }
+
+    def minimum_variance(self, long_only: bool = True) -> np.ndarray:
+        """
+        Fully invested weights of least variance. Without constraint, the
+        closed form Sigma^-1 1 / (1^T Sigma^-1 1) from the cached Cholesky
+        factor. Long only, an active-set search: assets with a negative
+        weight are dropped and the problem solved again on the others,
+        until the KKT conditions hold (no dropped asset would lower the
+        variance if added back).
+        """
+        n = len(self.columns)
+        weights = cho_solve((self.cholesky, True), np.ones(n))
+        weights /= weights.sum()
+        if not long_only or (weights >= 0).all():
+            return weights
+
+        active = weights > 0
+        for _ in range(2 * n):
+            index = np.flatnonzero(active)
+            solved = cho_solve(cho_factor(self.covariance[np.ix_(index, index)]), np.ones(len(index)))
+            solved /= solved.sum()
+            if (solved < 0).any():
+                active[index[solved < 0]] = False
+                continue
+            weights = np.zeros(n)
+            weights[index] = solved
+            gradient = self.covariance @ weights
+            variance = weights @ gradient
+            violations = np.flatnonzero(~active & (gradient < variance * (1 - 1e-9)))
+            if not len(violations):
+                break
+            active[violations[np.argmin(gradient[violations])]] = True
+        return weights
+
+    def risk_parity(self, tolerance: float = 1e-10, max_sweeps: int = 1000) -> np.ndarray:
+        """
+        Long-only weights whose assets contribute equally to the variance.
+
+        Cyclical coordinate descent on min 1/2 w^T Sigma w - sum(b log w),
+        whose solution, rescaled to sum to 1, has risk contributions
+        proportional to the budgets b (Griveau-Billion, Richard and
+        Roncalli): each coordinate has a closed-form update, and Sigma w is
+        kept up to date with one column per update.
+        """
+        n = len(self.columns)
+        variances = np.diag(self.covariance)
+        budget = 1.0 / n
+        weights = 1.0 / np.sqrt(variances)
+        weights /= weights.sum()
+        product = self.covariance @ weights
+        for _ in range(max_sweeps):
+            previous = weights.copy()
+            for i in range(n):
+                others = product[i] - variances[i] * weights[i]
+                updated = (-others + np.sqrt(others * others + 4 * variances[i] * budget)) / (2 * variances[i])
+                product += self.covariance[:, i] * (updated - weights[i])
+                weights[i] = updated
+            if np.max(np.abs(weights - previous)) <= tolerance * np.max(weights):
+                break
+        return weights / weights.sum()
+
+    def portfolios(self, long_only: bool = True) -> Dict:
+        """Risk of the minimum-variance, risk-parity and equally weighted portfolios"""
+        n = len(self.columns)
+        return {
+            'minimum_variance': self.risk(self.minimum_variance(long_only)),
+            'risk_parity': self.risk(self.risk_parity()),
+            'equal_weight': self.risk(np.full(n, 1.0 / n))
+        }
@@ -0,0 +1,255 @@
+"""
+Precomputed correlation cube for the built-in asset catalog.
+
+Most requests only use assets from Config.CRYPTO_ASSETS, STOCK_ASSETS,
+ETF_ASSETS and COMMODITY_ASSETS. A nightly job fetches the whole catalog
+once per period and stores, for every period, returns method and
+combination of exchange calendars, the catalog correlation matrices
+(Pearson, Spearman, Kendall) with per-asset statistics, betas and
+performance. A request limited to catalog assets is then answered by
+slicing the sub-matrix of its assets, without any upstream call.
+
+Run from backend/ (e.g. from cron, once a night):
+    python correlation_cube.py
+"""
+import argparse
+import io
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+from alignment import align_frames, exchange_for_symbol
+
+logger = logging.getLogger(__name__)
+
+CORRELATION_METHODS = ('pearson', 'spearman', 'kendall')
+RETURNS_METHODS = ('log', 'simple')
+
+
+def catalog_assets() -> Dict[str, List[str]]:
+    """The built-in catalog, in the request format"""
+    return {
+        'crypto': list(Config.CRYPTO_ASSETS),
+        'stocks': list(Config.STOCK_ASSETS),
+        'etfs': list(Config.ETF_ASSETS),
+        'commodities': list(Config.COMMODITY_ASSETS)
+    }
+
+
+def _asset_exchanges(assets: Dict[str, List[str]]) -> Dict[str, str]:
+    """Exchange calendar of each symbol of a request"""
+    return {
+        symbol: exchange_for_symbol(symbol, 'crypto' if asset_type == 'crypto' else 'stocks')
+        for asset_type, symbols in assets.items() if isinstance(symbols, list)
+        for symbol in symbols
+    }
+
+
+def _slice_key(period: str, returns_method: str, calendars) -> str:
+    return f"{period}|{returns_method}|{'+'.join(sorted(calendars))}"
+
+
+def build_cube(fetcher, calc, periods: Optional[List[str]] = None) -> Dict:
+    """
+    Fetch the catalog for each period and compute every slice.
+
+    Returns {'meta': {...}, 'arrays': {name: ndarray}}: `meta['slices']`
+    describes each slice (assets, dates, statistics...), its matrices are
+    stored as `arrays['<slice key>|<correlation method>']`.
+    """
+    catalog = catalog_assets()
+    exchanges = _asset_exchanges(catalog)
+    stock_symbols = catalog['stocks'] + catalog['etfs'] + catalog['commodities']
+    calendars = sorted(set(exchanges.values()))
+
+    meta = {'generated_at': time.time(), 'periods': [], 'slices': {}}
+    arrays = {}
+    for period in periods or list(Config.TIME_PERIODS):
+        started = time.perf_counter()
+        frames = [frame for frame in (fetcher.fetch_crypto_data(catalog['crypto'], period),
+                                      fetcher.fetch_stock_data(stock_symbols, period)) if not frame.empty]
+        if not frames:
+            logger.warning(f"No catalog data for {period}, period skipped")
+            continue
+
+        # One slice per combination of calendars: a basket is aligned on its own calendars only
+        for size in range(1, len(calendars) + 1):
+            for combination in itertools.combinations(calendars, size):
+                members = [frame[[c for c in frame.columns if exchanges.get(c) in combination]] for frame in frames]
+                members = [frame for frame in members if not frame.empty]
+                if not members:
+                    continue
+                prices_df, report = align_frames(members, exchanges)
+                if len(prices_df) < 2 or len(prices_df.columns) < 2:
+                    continue
+
+                for returns_method in RETURNS_METHODS:
+                    returns_df = calc.calculate_returns(prices_df, method=returns_method)
+                    if len(returns_df) < 5:
+                        continue
+                    key = _slice_key(period, returns_method, combination)
+                    for method in CORRELATION_METHODS:
+                        arrays[f"{key}|{method}"] = calc.calculate_correlation_matrix(
+                            returns_df, method=method).to_numpy(dtype=np.float64)
+                    meta['slices'][key] = {
+                        'assets': [str(c) for c in returns_df.columns],
+                        'data_points': len(returns_df),
+                        'start_date': prices_df.index[0].strftime('%Y-%m-%d'),
+                        'end_date': prices_df.index[-1].strftime('%Y-%m-%d'),
+                        'alignment': report,
+                        'statistics': calc.calculate_statistics(returns_df),
+                        'betas': calc.calculate_beta(returns_df, 'SPY') if 'SPY' in returns_df.columns else {},
+                        'performance': calc.calculate_performance_comparison(prices_df)
+                    }
+
+        meta['periods'].append(period)
+        logger.info(f"Correlation cube: {period} computed in {time.perf_counter() - started:.1f}s")
+    return {'meta': meta, 'arrays': arrays}
+
+
+def save_cube(path: str, cube: Dict):
+    """Write the cube atomically as one .npz file (matrices + JSON metadata, no pickle)"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, __meta__=np.array(json.dumps(cube['meta'])), **cube['arrays'])
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(buffer.getvalue())
+    os.replace(tmp_path, path)
+
+
+class CorrelationCube:
+    """
+    Read side of the cube, shared by the requests of a worker.
+
+    The file is (re)loaded when its modification time changes, checked at
+    most every `check_interval` seconds, so a nightly rebuild is picked up
+    without restarting. A cube older than `max_age` seconds is ignored.
+    """
+
+    def __init__(self, path: str, max_age: int, check_interval: int = 60):
+        self.path = path
+        self.max_age = max_age
+        self.check_interval = check_interval
+        self._meta = None
+        self._arrays = {}
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        now = time.time()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            self._meta, self._arrays, self._mtime = None, {}, None
+            return
+        if mtime == self._mtime:
+            return
+
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                meta = json.loads(str(data['__meta__']))
+                arrays = {name: data[name] for name in data.files if name != '__meta__'}
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Could not load correlation cube {self.path}: {e}")
+            return
+        self._meta, self._arrays, self._mtime = meta, arrays, mtime
+        logger.info(f"Loaded correlation cube: {len(meta['slices'])} slices, "
+                    f"generated {datetime.fromtimestamp(meta['generated_at']).isoformat(timespec='seconds')}")
+
+    def load(self):
+        """Load (or reload) the cube file now"""
+        with self._lock:
+            self._checked_at = 0.0
+            self._refresh()
+
+    def lookup(self, assets: Dict[str, List[str]], period: str, returns_method: str,
+               correlation_method: str) -> Optional[Dict]:
+        """
+        Answer a request from the cube, or None when it cannot: unknown
+        period or method, stale cube, or an asset outside the catalog.
+        """
+        with self._lock:
+            self._refresh()
+            meta, arrays = self._meta, self._arrays
+        if meta is None or time.time() - meta['generated_at'] > self.max_age:
+            return None
+
+        catalog = catalog_assets()
+        requested = []
+        for asset_type, symbols in assets.items():
+            if not isinstance(symbols, list):
+                continue
+            known = catalog['crypto'] if asset_type == 'crypto' else \
+                catalog['stocks'] + catalog['etfs'] + catalog['commodities']
+            if asset_type not in catalog or any(symbol not in known for symbol in symbols):
+                return None
+            requested.extend(symbols)
+        requested = list(dict.fromkeys(requested))
+
+        exchanges = _asset_exchanges(assets)
+        key = _slice_key(period, returns_method, set(exchanges.values()))
+        entry = meta['slices'].get(key)
+        matrix = arrays.get(f"{key}|{correlation_method}")
+        if entry is None or matrix is None:
+            return None
+
+        positions = {symbol: i for i, symbol in enumerate(entry['assets'])}
+        if any(symbol not in positions for symbol in requested):
+            # Missing from the nightly fetch: let the live path decide
+            return None
+        index = np.array([positions[symbol] for symbol in requested])
+
+        selected = set(requested)
+        return {
+            'matrix': pd.DataFrame(matrix[np.ix_(index, index)], index=requested, columns=requested),
+            'data_points': entry['data_points'],
+            'start_date': entry['start_date'],
+            'end_date': entry['end_date'],
+            'alignment': dict(entry['alignment'],
+                              filled={s: n for s, n in entry['alignment']['filled'].items() if s in selected}),
+            'statistics': {s: v for s, v in entry['statistics'].items() if s in selected},
+            'betas': {s: v for s, v in entry['betas'].items() if s in selected} if 'SPY' in selected else {},
+            'performance': {s: v for s, v in entry['performance'].items() if s in selected},
+            'generated_at': meta['generated_at']
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute the catalog correlation cube')
+    parser.add_argument('--output', default=Config.CORRELATION_CUBE_FILE, help='Cube file (.npz)')
+    parser.add_argument('--periods', nargs='+', choices=list(Config.TIME_PERIODS),
+                        help='Periods to compute (default: all)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    from data_fetcher import DataFetcher
+    from correlation_calc import CorrelationCalculator
+
+    started = time.perf_counter()
+    cube = build_cube(DataFetcher(), CorrelationCalculator(), args.periods)
+    if not cube['meta']['slices']:
+        logger.error("No slice computed, keeping the previous cube")
+        raise SystemExit(1)
+    save_cube(args.output, cube)
+    logger.info(f"Correlation cube written to {args.output}: {len(cube['meta']['slices'])} slices "
+                f"in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
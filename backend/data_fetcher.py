@@ -3,21 +3,72 @@ import pandas as pd
 import numpy as np
 import requests
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import os
+import json
 import time
 import logging
 from config import Config
+from search_index import AssetSearchIndex
+from rate_limiter import RateLimiter
+from persistent_cache import PersistentCache
+from symbol_resolver import SymbolResolver
+from metrics import metrics
+from result_cache import ResultCache
+from providers import MarketDataProvider, create_provider
+from shared_frames import SharedFrameStore
+from alignment import align_frames, exchange_for_symbol
+from history_store import HistoryStore, ONE_DAY
+from correlation_calc import CorrelationCalculator
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class DataFetcher:
-    def __init__(self):
+    def __init__(self, provider: Optional[MarketDataProvider] = None):
+        # Pluggable data source (synthetic, local files...); None means live Yahoo/CoinGecko
+        self.provider = provider if provider is not None else create_provider()
         self.cache = {}
         self.cache_timestamps = {}
+        # Aligned prices and returns per basket: key -> {'version', 'prices', 'returns'}
+        self.returns_cache = ResultCache(Config.RETURNS_CACHE_SIZE, Config.CACHE_DURATION)
+        # Latest quote per symbol
+        self.quote_cache = ResultCache(Config.QUOTE_CACHE_SIZE, Config.QUOTE_CACHE_DURATION)
         self.max_retries = 3
         self.retry_delay = 1  # seconds
+        self.search_index = self._build_search_index()
+        self.metadata_cache = PersistentCache(
+            os.path.join(Config.DATA_DIR, 'ticker_metadata.json'),
+            ttl=Config.METADATA_CACHE_TTL
+        )
+        self.symbol_resolver = SymbolResolver(
+            os.path.join(Config.DATA_DIR, 'symbol_resolution.json'),
+            ttl=Config.RESOLUTION_CACHE_TTL,
+            negative_ttl=Config.RESOLUTION_NEGATIVE_TTL,
+            preload_file=Config.SYMBOL_RESOLUTION_FILE
+        )
+        self.yahoo_limiter = RateLimiter(Config.YAHOO_REQUESTS_PER_SECOND, burst=Config.SEARCH_LOOKUP_WORKERS)
+        self.coingecko_limiter = RateLimiter(Config.COINGECKO_REQUESTS_PER_MINUTE / 60)
+        self.lookup_pool = ThreadPoolExecutor(max_workers=Config.SEARCH_LOOKUP_WORKERS, thread_name_prefix='metadata')
+        # Aligned frames published for the other workers (None when disabled)
+        self.shared_frames = SharedFrameStore(
+            ttl=Config.CACHE_DURATION,
+            max_bytes=Config.SHARED_MEMORY_MAX_MB * 1024 * 1024
+        ) if Config.SHARED_MEMORY_CACHE else None
+        # Daily histories of the long periods, fetched chunk by chunk
+        self.history_store = HistoryStore(Config.HISTORY_STORE_DIR)
+        self.history_synced = {}  # history cache key -> time the store was last brought up to date
+
+    def _build_search_index(self) -> AssetSearchIndex:
+        """Build the in-memory asset search index once from the static name mappings"""
+        index = AssetSearchIndex()
+        index.add_mappings(self._get_name_to_symbol_mappings(), source='yahoo')
+        for name, crypto_info in self._get_crypto_name_mappings().items():
+            index.add(name, crypto_info['symbol'], 'crypto', 'coingecko', coingecko_id=crypto_info['id'])
+        logger.info(f"Search index built with {len(index)} entries")
+        return index
 
     def _retry_request(self, func, *args, max_retries=None, **kwargs):
         """Generic retry wrapper for API calls with improved rate limit handling"""
@@ -33,6 +84,7 @@ class DataFetcher:
                     # For 429 errors, use longer exponential backoff
                     wait_time = self.retry_delay * (2 ** attempt) * 5  # 5x longer for rate limits
                     if attempt < retries - 1:
+                        metrics.inc('upstream_retries_total', reason='rate_limit')
                         logger.warning(f"Rate limit hit (429). Attempt {attempt + 1}/{retries}. Waiting {wait_time}s...")
                         time.sleep(wait_time)
                     last_exception = e
@@ -40,12 +92,14 @@ class DataFetcher:
                     # For other HTTP errors, use normal backoff
                     last_exception = e
                     if attempt < retries - 1:
+                        metrics.inc('upstream_retries_total', reason='http_error')
                         wait_time = self.retry_delay * (2 ** attempt)
                         logger.warning(f"Attempt {attempt + 1} failed: {e}. Retrying in {wait_time}s...")
                         time.sleep(wait_time)
             except Exception as e:
                 last_exception = e
                 if attempt < retries - 1:
+                    metrics.inc('upstream_retries_total', reason='error')
                     wait_time = self.retry_delay * (2 ** attempt)  # Exponential backoff
                     logger.warning(f"Attempt {attempt + 1} failed: {e}. Retrying in {wait_time}s...")
                     time.sleep(wait_time)
@@ -53,26 +107,73 @@ class DataFetcher:
         logger.error(f"All {retries} attempts failed: {last_exception}")
         raise last_exception
         
+    @staticmethod
+    def _history_cache_key(kind: str, symbols: List[str], period: str, interval: str = '1d') -> str:
+        key = f"{kind}_{'-'.join(sorted(symbols))}_{period}"
+        return key if interval == '1d' else f"{key}_{interval}"
+
+    def _cache_history(self, cache_key: str, result: pd.DataFrame, interval: str) -> pd.DataFrame:
+        """Cache a fetched history; intraday bars are kept as float32, half the memory of float64"""
+        if interval != '1d':
+            result = result.astype(np.float32)
+        self.cache[cache_key] = result
+        self.cache_timestamps[cache_key] = time.time()
+        return result
+
+    @staticmethod
+    def _stock_symbols(assets: Dict[str, List[str]]) -> List[str]:
+        """Symbols fetched from Yahoo Finance: stocks, ETFs and commodities"""
+        stock_symbols = []
+        for asset_type in ['stocks', 'etfs', 'commodities']:
+            if asset_type in assets and assets[asset_type]:
+                stock_symbols.extend(assets[asset_type])
+        return stock_symbols
+
     def _is_cache_valid(self, key: str) -> bool:
         """Check if cached data is still valid"""
-        if key not in self.cache_timestamps:
-            return False
-        return (time.time() - self.cache_timestamps[key]) < Config.CACHE_DURATION
+        valid = key in self.cache_timestamps and (time.time() - self.cache_timestamps[key]) < Config.CACHE_DURATION
+        metrics.inc('cache_requests_total', cache=key.split('_', 1)[0], result='hit' if valid else 'miss')
+        return valid
+    
+    def _http_get(self, url: str, provider: str = 'coingecko', **kwargs) -> requests.Response:
+        """requests.get that records the upstream status code and latency"""
+        start = time.perf_counter()
+        try:
+            response = requests.get(url, **kwargs)
+        except requests.exceptions.RequestException:
+            metrics.inc('upstream_requests_total', provider=provider, status='error')
+            raise
+        metrics.observe('upstream_request_duration_seconds', time.perf_counter() - start, provider=provider)
+        metrics.inc('upstream_requests_total', provider=provider, status=response.status_code)
+        return response
+    
+    @staticmethod
+    def _record_yahoo_call(data: Optional[pd.DataFrame]):
+        """Record the outcome of a yfinance call (HTTP status is not exposed by yfinance)"""
+        metrics.inc('upstream_requests_total', provider='yahoo',
+                    status='error' if data is None else ('empty' if data.empty else 'ok'))
     
-    def _fetch_single_crypto(self, symbol: str, crypto_id: str, days: int) -> Optional[pd.Series]:
+    def _fetch_single_crypto(self, symbol: str, crypto_id: str, days: int,
+                             interval: str = '1d') -> Optional[pd.Series]:
         """Fetch data for a single cryptocurrency with retry logic"""
-        url = f"https://api.coingecko.com/api/v3/coins/{crypto_id}/market_chart"
+        minutes = Config.INTERVALS[interval]['minutes']
+        url = f"{Config.COINGECKO_API_URL}/coins/{crypto_id}/market_chart"
         params = {
             'vs_currency': 'usd',
-            'days': days,
-            'interval': 'daily'
+            'days': days
         }
+        if interval == '1d':
+            params['interval'] = 'daily'
+        elif days > 90 or (minutes < 60 and days > 1):
+            # CoinGecko only serves 5-minute points up to 1 day and hourly points up to 90 days
+            logger.warning(f"CoinGecko has no {interval} history over {days} days for {symbol}")
+            return None
 
         if Config.COINGECKO_API_KEY:
             params['x_cg_pro_api_key'] = Config.COINGECKO_API_KEY
 
         def make_request():
-            response = requests.get(url, params=params, timeout=30)
+            response = self._http_get(url, params=params, timeout=30)
             response.raise_for_status()
             return response.json()
 
@@ -92,8 +193,12 @@ class DataFetcher:
             # Remove timezone info to match stock data
             df.index = df.index.tz_localize(None)
 
-            # Normalize to daily data (end of day)
-            df = df.resample('D').last()
+            if interval == '1d':
+                # Normalize to daily data (end of day)
+                df = df.resample('D').last()
+            else:
+                # Last price of each bar, skipping intervals without any point
+                df = df.resample(f'{minutes}min').last().dropna()
 
             return df[symbol]
 
@@ -101,9 +206,9 @@ class DataFetcher:
             logger.error(f"Error fetching crypto data for {symbol} ({crypto_id}): {e}")
             return None
 
-    def fetch_crypto_data(self, symbols: List[str], period: str) -> pd.DataFrame:
+    def fetch_crypto_data(self, symbols: List[str], period: str, interval: str = '1d') -> pd.DataFrame:
         """Fetch cryptocurrency data - uses yfinance first (more reliable), CoinGecko as fallback"""
-        cache_key = f"crypto_{'-'.join(sorted(symbols))}_{period}"
+        cache_key = self._history_cache_key('crypto', symbols, period, interval)
 
         if self._is_cache_valid(cache_key):
             logger.debug(f"Using cached data for {cache_key}")
@@ -117,6 +222,12 @@ class DataFetcher:
             days = Config.TIME_PERIODS[period]['days']
             start_date = end_date - timedelta(days=days)
 
+        if Config.TIME_PERIODS[period].get('chunked') and interval == '1d':
+            return self._fetch_chunked(symbols, start_date, end_date, 'crypto', cache_key)
+
+        if self.provider is not None:
+            return self._fetch_from_provider(symbols, start_date, end_date, 'crypto', cache_key, interval)
+
         # Try yfinance first (more reliable, no rate limits)
         logger.info(f"Fetching crypto data from yfinance: {symbols}")
         data_dict = {}
@@ -133,15 +244,18 @@ class DataFetcher:
         if yfinance_symbols:
             try:
                 # Fetch from yfinance
-                yf_data = yf.download(
-                    yfinance_symbols,
-                    start=start_date,
-                    end=end_date,
-                    progress=False,
-                    auto_adjust=True,
-                    group_by='ticker',
-                    threads=True
-                )
+                with metrics.span('fetch', provider='yahoo'):
+                    yf_data = yf.download(
+                        yfinance_symbols,
+                        start=start_date,
+                        end=end_date,
+                        interval=interval,
+                        progress=False,
+                        auto_adjust=True,
+                        group_by='ticker',
+                        threads=True
+                    )
+                self._record_yahoo_call(yf_data)
                 
                 if not yf_data.empty:
                     # Extract Close prices
@@ -153,21 +267,20 @@ class DataFetcher:
                     else:
                         yf_result = yf_data[['Close']] if 'Close' in yf_data.columns else yf_data
                     
+                    # Bars already: only the timezone needs stripping, once for the whole frame
+                    yf_result.index = self._naive_index(yf_result.index, interval)
+                    
                     # Map back to original symbols
                     for yf_symbol, original_symbol in symbol_mapping.items():
                         if yf_symbol in yf_result.columns:
-                            series = yf_result[yf_symbol]
-                            series.index = pd.to_datetime(series.index)
-                            if series.index.tz is not None:
-                                series.index = series.index.tz_localize(None)
-                            series = series.resample('D').last()
-                            data_dict[original_symbol] = series
+                            data_dict[original_symbol] = yf_result[yf_symbol]
                             logger.info(f"Successfully fetched {original_symbol} from yfinance")
                         else:
                             failed_symbols.append(original_symbol)
                 else:
                     failed_symbols = symbols.copy()
             except Exception as e:
+                self._record_yahoo_call(None)
                 logger.warning(f"yfinance fetch failed: {e}")
                 failed_symbols = symbols.copy()
 
@@ -183,17 +296,17 @@ class DataFetcher:
                     crypto_id = self._get_coingecko_id_for_symbol(symbol)
                     crypto_ids.append(crypto_id if crypto_id else symbol.lower())
             
-            for i, (symbol, crypto_id) in enumerate(zip(failed_symbols, crypto_ids)):
-                # Rate limiting for CoinGecko free API
-                if i > 0:
-                    time.sleep(2.0)  # 2 seconds between calls
-                
-                days = (end_date - start_date).days if period != 'ytd' else (end_date - datetime(end_date.year, 1, 1)).days
-                series = self._fetch_single_crypto(symbol, crypto_id, days)
-                if series is not None:
-                    data_dict[symbol] = series
-                    if symbol in failed_symbols:
-                        failed_symbols.remove(symbol)
+            with metrics.span('fetch', provider='coingecko'):
+                for symbol, crypto_id in list(zip(failed_symbols, crypto_ids)):
+                    # Rate limiting for CoinGecko free API
+                    self.coingecko_limiter.acquire()
+
+                    days = (end_date - start_date).days if period != 'ytd' else (end_date - datetime(end_date.year, 1, 1)).days
+                    series = self._fetch_single_crypto(symbol, crypto_id, days, interval)
+                    if series is not None:
+                        data_dict[symbol] = series
+                        if symbol in failed_symbols:
+                            failed_symbols.remove(symbol)
 
         if failed_symbols:
             logger.warning(f"Failed to fetch data for: {failed_symbols}")
@@ -202,41 +315,242 @@ class DataFetcher:
             result = pd.DataFrame(data_dict)
             # Clean data - remove any infinite values
             result = result.replace([np.inf, -np.inf], np.nan)
-            self.cache[cache_key] = result
-            self.cache_timestamps[cache_key] = time.time()
-            return result
+            return self._cache_history(cache_key, result, interval)
 
         return pd.DataFrame()
+
+    @staticmethod
+    def _naive_index(index, interval: str) -> pd.DatetimeIndex:
+        """Timezone-naive index: exchange-local dates for daily bars, UTC times for intraday bars"""
+        index = pd.to_datetime(index)
+        if index.tz is None:
+            return index
+        return index.tz_localize(None) if interval == '1d' else index.tz_convert(None)
     
+    def _fetch_from_provider(self, symbols: List[str], start_date: datetime, end_date: datetime,
+                             asset_class: str, cache_key: str, interval: str = '1d') -> pd.DataFrame:
+        """Fetch history from the configured provider and cache it like live data"""
+        try:
+            with metrics.span('fetch', provider=self.provider.name):
+                result = self.provider.fetch_history(symbols, start_date, end_date, asset_class, interval)
+        except Exception as e:
+            logger.error(f"Error fetching {asset_class} data from {self.provider.name} provider: {e}")
+            return pd.DataFrame()
+
+        missing = set(symbols) - set(result.columns)
+        if missing:
+            logger.warning(f"No data found for symbols: {missing}")
+
+        if not result.empty:
+            result = self._cache_history(cache_key, result.replace([np.inf, -np.inf], np.nan), interval)
+        return result
+
+    def _download_closes(self, symbols: List[str], start: datetime, end: datetime,
+                         asset_class: str) -> pd.DataFrame:
+        """
+        Daily closes of one chunk [start, end] in a single upstream call: the
+        configured provider, or one batched yf.download (crypto as
+        <SYMBOL>-USD). Raises when the call fails.
+        """
+        if self.provider is not None:
+            with metrics.span('fetch', provider=self.provider.name):
+                return self.provider.fetch_history(symbols, start, end, asset_class)
+
+        yf_symbols = {f"{symbol}-USD" if asset_class == 'crypto' else symbol: symbol for symbol in symbols}
+        try:
+            with metrics.span('fetch', provider='yahoo'):
+                data = yf.download(list(yf_symbols), start=start, end=end + timedelta(days=1), progress=False,
+                                   auto_adjust=True, group_by='ticker', threads=True)
+        except Exception:
+            self._record_yahoo_call(None)
+            raise
+        self._record_yahoo_call(data)
+
+        closes = pd.DataFrame()
+        if not data.empty:
+            if isinstance(data.columns, pd.MultiIndex):
+                closes = data.xs('Close', axis=1, level=1)
+            else:
+                closes = pd.DataFrame({next(iter(yf_symbols)): data['Close']})
+            closes = closes.rename(columns=yf_symbols).dropna(axis=1, how='all')
+            closes.index = self._naive_index(closes.index, '1d')
+
+        if asset_class == 'crypto':
+            # Coins Yahoo does not list: CoinGecko, one rate-limited call per coin
+            for symbol in symbols:
+                if symbol not in closes.columns:
+                    series = self._fetch_crypto_range(symbol, start, end)
+                    if series is not None:
+                        closes = closes.join(series, how='outer') if not closes.empty else series.to_frame()
+        return closes
+
+    def _fetch_crypto_range(self, symbol: str, start: datetime, end: datetime) -> Optional[pd.Series]:
+        """Daily closes of a coin between start and end from CoinGecko /market_chart/range, or None"""
+        crypto_id = Config.CRYPTO_ASSETS.get(symbol) or self._get_coingecko_id_for_symbol(symbol)
+        if not crypto_id:
+            return None
+        params = {
+            'vs_currency': 'usd',
+            'from': int(pd.Timestamp(start).timestamp()),
+            'to': int((pd.Timestamp(end) + pd.Timedelta(days=1)).timestamp())
+        }
+        if Config.COINGECKO_API_KEY:
+            params['x_cg_pro_api_key'] = Config.COINGECKO_API_KEY
+
+        self.coingecko_limiter.acquire()
+        try:
+            with metrics.span('fetch', provider='coingecko'):
+                response = self._http_get(f"{Config.COINGECKO_API_URL}/coins/{crypto_id}/market_chart/range",
+                                          params=params, timeout=30)
+            response.raise_for_status()
+            prices = response.json().get('prices', [])
+        except Exception as e:
+            # The free API only serves the last 365 days
+            logger.warning(f"CoinGecko history of {symbol} from {start:%Y-%m-%d} failed: {e}")
+            return None
+        if not prices:
+            return None
+
+        frame = pd.DataFrame(prices, columns=['timestamp', symbol])
+        series = frame.set_index(pd.to_datetime(frame['timestamp'], unit='ms'))[symbol]
+        return series.resample('D').last().dropna()
+
+    def backfill_history(self, symbols: List[str], asset_class: str, start, end,
+                         progress: Optional[Callable[[str, List[str], np.datetime64, np.datetime64], None]] = None
+                         ) -> Dict[str, int]:
+        """
+        Bring the stored daily history of `symbols` up to [start, end], one
+        chunk of HISTORY_CHUNK_DAYS per upstream call.
+
+        Symbols missing the same ranges are fetched together: forward from
+        their covered end up to `end`, and backward from their covered
+        start (or from `end` for new symbols) down to `start`. Each chunk is
+        written to the store as soon as it arrives, so an interrupted fetch
+        resumes where it stopped. Going backward, a chunk without any bar
+        for a symbol that already has history marks the start of that
+        history: older chunks are not requested again. Only settled days
+        (up to yesterday) are stored, so a stored chunk never changes.
+
+        `progress(asset_class, symbols, chunk_start, chunk_end)` is called
+        after each chunk. Returns the number of chunks fetched and failed.
+        """
+        start = np.datetime64(start, 'D')
+        end = min(np.datetime64(end, 'D'), np.datetime64(datetime.now().date()) - ONE_DAY)
+        chunk = np.timedelta64(Config.HISTORY_CHUNK_DAYS, 'D')
+        stats = {'chunks': 0, 'failed': 0}
+        if start > end:
+            return stats
+
+        groups = {}
+        for symbol in symbols:
+            forward, backward = self.history_store.missing(asset_class, symbol, start, end)
+            if self.history_store.coverage(asset_class, symbol) is None:
+                # New symbol: newest chunk first, so its listing date ends the backward walk
+                forward, backward = None, forward
+            groups.setdefault((forward, backward), []).append(symbol)
+
+        for (forward, backward), group in groups.items():
+            windows = {'forward': [], 'backward': []}
+            if forward:
+                for chunk_start in np.arange(forward[0], forward[1] + ONE_DAY, chunk):
+                    windows['forward'].append((chunk_start, min(chunk_start + chunk - ONE_DAY, forward[1])))
+            if backward:
+                for chunk_end in np.arange(backward[1], backward[0] - ONE_DAY, -chunk):
+                    windows['backward'].append((max(chunk_end - chunk + ONE_DAY, backward[0]), chunk_end))
+
+            for direction, chunks in windows.items():
+                active = list(group)
+                for chunk_start, chunk_end in chunks:
+                    if not active:
+                        break
+                    try:
+                        closes = self._download_closes(active, pd.Timestamp(chunk_start), pd.Timestamp(chunk_end),
+                                                       asset_class)
+                    except Exception as e:
+                        logger.warning(f"History chunk {chunk_start}..{chunk_end} failed for {active}: {e}")
+                        stats['failed'] += 1
+                        break
+                    stats['chunks'] += 1
+
+                    for symbol in list(active):
+                        if symbol in closes.columns:
+                            self.history_store.write(asset_class, symbol, closes[symbol], chunk_start, chunk_end)
+                        elif direction == 'forward' and closes.empty:
+                            # No bar for anyone: market closed over the whole chunk
+                            self.history_store.write(asset_class, symbol, None, chunk_start, chunk_end)
+                        elif direction == 'backward' and self.history_store.coverage(asset_class, symbol):
+                            # No older history
+                            self.history_store.write(asset_class, symbol, None, start, chunk_end)
+                            active.remove(symbol)
+                        else:
+                            # Unknown symbol or upstream gap: retried by the next call
+                            active.remove(symbol)
+                    if progress is not None:
+                        progress(asset_class, active, chunk_start, chunk_end)
+        return stats
+
+    def _fetch_chunked(self, symbols: List[str], start_date: datetime, end_date: datetime,
+                       asset_class: str, cache_key: str) -> pd.DataFrame:
+        """Long period: update the history store chunk by chunk, then read the period back from it"""
+        with metrics.span('backfill'):
+            self.backfill_history(symbols, asset_class, start_date, end_date)
+        self.history_synced[cache_key] = time.time()
+
+        result = self.history_store.read(asset_class, symbols, start_date, end_date)
+        missing = set(symbols) - set(result.columns)
+        if missing:
+            logger.warning(f"No data found for symbols: {missing}")
+        if not result.empty:
+            result = self._cache_history(cache_key, result.replace([np.inf, -np.inf], np.nan), '1d')
+        return result
+
     def _get_coingecko_id_for_symbol(self, symbol: str) -> Optional[str]:
         """Get CoinGecko ID for a custom crypto symbol"""
+        coin = self._resolve_coingecko_symbol(symbol)
+        return coin['provider_id'] if coin else None
+    
+    def _resolve_coingecko_symbol(self, symbol: str) -> Optional[Dict]:
+        """
+        Resolve a crypto symbol to its CoinGecko coin, consulting the
+        persistent resolution table before calling /api/v3/search.
+        Returns None if the symbol is unknown (or the lookup failed).
+        """
+        found, coin = self.symbol_resolver.lookup('coingecko', symbol)
+        metrics.inc('cache_requests_total', cache='resolution', result='hit' if found else 'miss')
+        if found:
+            return coin
+        
         try:
-            url = "https://api.coingecko.com/api/v3/search"
+            url = f"{Config.COINGECKO_API_URL}/search"
             params = {'query': symbol}
             
             if Config.COINGECKO_API_KEY:
                 params['x_cg_pro_api_key'] = Config.COINGECKO_API_KEY
             
-            response = requests.get(url, params=params)
+            response = self._http_get(url, params=params, timeout=10)
             response.raise_for_status()
             
             data = response.json()
             coins = data.get('coins', [])
             
-            # Find exact symbol match
-            for coin in coins:
-                if coin['symbol'].upper() == symbol.upper():
-                    return coin['id']
-            
-            return None
-            
         except Exception as e:
-            print(f"Error getting CoinGecko ID for {symbol}: {e}")
+            # Transient failure: do not cache anything
+            logger.warning(f"Error getting CoinGecko ID for {symbol}: {e}")
             return None
+        
+        # Find exact symbol match
+        for coin in coins:
+            if coin['symbol'].upper() == symbol.upper():
+                return self.symbol_resolver.record(
+                    'coingecko', symbol, coin['id'], name=coin['name'], category='crypto'
+                )
+        
+        self.symbol_resolver.record_unknown('coingecko', symbol)
+        return None
     
-    def fetch_stock_data(self, symbols: List[str], period: str) -> pd.DataFrame:
+    def fetch_stock_data(self, symbols: List[str], period: str, interval: str = '1d') -> pd.DataFrame:
         """Fetch stock/ETF/commodity data from Yahoo Finance"""
-        cache_key = f"stock_{'-'.join(sorted(symbols))}_{period}"
+        cache_key = self._history_cache_key('stock', symbols, period, interval)
 
         if self._is_cache_valid(cache_key):
             logger.debug(f"Using cached data for {cache_key}")
@@ -250,12 +564,18 @@ class DataFetcher:
             days = Config.TIME_PERIODS[period]['days']
             start_date = end_date - timedelta(days=days)
 
+        if Config.TIME_PERIODS[period].get('chunked') and interval == '1d':
+            return self._fetch_chunked(symbols, start_date, end_date, 'stocks', cache_key)
+
+        if self.provider is not None:
+            return self._fetch_from_provider(symbols, start_date, end_date, 'stocks', cache_key, interval)
+
         def fetch_data():
             """Inner function for retry logic"""
             if len(symbols) == 1:
                 # For single symbol, use Ticker object
                 ticker = yf.Ticker(symbols[0])
-                hist = ticker.history(start=start_date, end=end_date, auto_adjust=True)
+                hist = ticker.history(start=start_date, end=end_date, interval=interval, auto_adjust=True)
                 if hist.empty:
                     raise ValueError(f"No data returned for {symbols[0]}")
                 return pd.DataFrame({symbols[0]: hist['Close']})
@@ -265,6 +585,7 @@ class DataFetcher:
                     symbols,
                     start=start_date,
                     end=end_date,
+                    interval=interval,
                     progress=False,
                     auto_adjust=True,
                     group_by='ticker',
@@ -291,12 +612,12 @@ class DataFetcher:
                 return result
 
         try:
-            result = self._retry_request(fetch_data, max_retries=2)
+            with metrics.span('fetch', provider='yahoo'):
+                result = self._retry_request(fetch_data, max_retries=2)
+            self._record_yahoo_call(result)
 
             # Ensure index is datetime without timezone
-            result.index = pd.to_datetime(result.index)
-            if result.index.tz is not None:
-                result.index = result.index.tz_localize(None)
+            result.index = self._naive_index(result.index, interval)
 
             # Clean data - remove any infinite values
             result = result.replace([np.inf, -np.inf], np.nan)
@@ -306,107 +627,395 @@ class DataFetcher:
             if missing:
                 logger.warning(f"No data found for symbols: {missing}")
 
-            self.cache[cache_key] = result
-            self.cache_timestamps[cache_key] = time.time()
-
-            return result
+            return self._cache_history(cache_key, result, interval)
 
         except Exception as e:
+            self._record_yahoo_call(None)
             logger.error(f"Error fetching stock data: {e}")
             logger.error(f"Symbols: {symbols}")
             return pd.DataFrame()
     
-    def fetch_mixed_assets(self, assets: Dict[str, List[str]], period: str) -> pd.DataFrame:
-        """Fetch data for mixed asset types with improved alignment strategy"""
+    def _shared_prices_key(self, assets: Dict[str, List[str]], period: str, interval: str = '1d') -> str:
+        """Key of an aligned price frame, identical in every worker"""
+        provider = self.provider.name if self.provider is not None else 'live'
+        symbols = {asset_type: sorted(symbols) for asset_type, symbols in sorted(assets.items())
+                   if isinstance(symbols, list) and symbols}
+        return f"prices|{provider}|{period}|{interval}|{json.dumps(symbols, sort_keys=True)}"
+
+    def fetch_mixed_assets(self, assets: Dict[str, List[str]], period: str, interval: str = '1d') -> pd.DataFrame:
+        """
+        Fetch data for mixed asset types with improved alignment strategy.
+
+        `interval` is a Config.INTERVALS key. Intraday bars are indexed by
+        their UTC start time and aligned as float32, so long intraday
+        windows take half the memory (and shared memory) of daily ones.
+
+        With SHARED_MEMORY_CACHE, the aligned frame is published in shared
+        memory and later calls (from any worker) return a read-only view of
+        it; its key is kept in `attrs['shared_key']`.
+        """
+        if self.shared_frames is not None:
+            shared_key = self._shared_prices_key(assets, period, interval)
+            shared = self.shared_frames.get(shared_key)
+            metrics.inc('cache_requests_total', cache='shared_prices', result='hit' if shared is not None else 'miss')
+            if shared is not None:
+                return shared
+
         all_data = []
-        has_crypto = False
-        has_stocks = False
+        exchanges = {}
 
         logger.info(f"Fetching mixed assets: {assets}")
 
         # Fetch crypto data
         if 'crypto' in assets and assets['crypto']:
-            crypto_data = self.fetch_crypto_data(assets['crypto'], period)
+            crypto_data = self.fetch_crypto_data(assets['crypto'], period, interval)
             if not crypto_data.empty:
                 logger.info(f"Crypto data shape: {crypto_data.shape}")
                 all_data.append(crypto_data)
-                has_crypto = True
+                exchanges.update({symbol: exchange_for_symbol(symbol, 'crypto') for symbol in crypto_data.columns})
 
         # Fetch stock data (including ETFs and commodities)
-        stock_symbols = []
-        for asset_type in ['stocks', 'etfs', 'commodities']:
-            if asset_type in assets and assets[asset_type]:
-                stock_symbols.extend(assets[asset_type])
-
+        stock_symbols = self._stock_symbols(assets)
         if stock_symbols:
-            stock_data = self.fetch_stock_data(stock_symbols, period)
+            stock_data = self.fetch_stock_data(stock_symbols, period, interval)
             if not stock_data.empty:
                 logger.info(f"Stock data shape: {stock_data.shape}")
                 all_data.append(stock_data)
-                has_stocks = True
+                exchanges.update({symbol: exchange_for_symbol(symbol, 'stocks') for symbol in stock_data.columns})
 
         if not all_data:
             logger.warning("No data fetched for any assets")
             return pd.DataFrame()
 
-        # Combine all data with improved alignment
-        combined = pd.concat(all_data, axis=1, join='outer')
-        combined = combined.sort_index()
+        with metrics.span('alignment'):
+            combined = self._align_frames(all_data, exchanges, interval)
+
+        logger.info(f"Combined data shape after cleaning: {combined.shape}")
+        logger.debug(f"Columns in combined data: {combined.columns.tolist()}")
+
+        if self.shared_frames is not None and not combined.empty:
+            combined.attrs['shared_key'] = shared_key
+            shared = self.shared_frames.put(shared_key, combined)
+            if shared is not None:
+                return shared
+
+        return combined
+
+    def _data_version(self, assets: Dict[str, List[str]], period: str, interval: str = '1d') -> Optional[str]:
+        """
+        Version of the cached price histories behind a basket: the time each
+        one was fetched. None when one of them is missing or expired.
+        """
+        keys = []
+        if assets.get('crypto'):
+            keys.append(self._history_cache_key('crypto', assets['crypto'], period, interval))
+        stock_symbols = self._stock_symbols(assets)
+        if stock_symbols:
+            keys.append(self._history_cache_key('stock', stock_symbols, period, interval))
+
+        now = time.time()
+        timestamps = [self.cache_timestamps.get(key) for key in keys]
+        if not keys or any(t is None or now - t >= Config.CACHE_DURATION for t in timestamps):
+            return None
+        return '|'.join(f"{t:.6f}" for t in timestamps)
+
+    def fetch_returns(self, assets: Dict[str, List[str]], period: str, returns_method: str = 'log',
+                      interval: str = '1d') -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Aligned prices of a basket and their returns, as (prices, returns).
 
-        # When mixing crypto (24/7) with stocks (weekdays only),
-        # we need to be smarter about filling
-        if has_crypto and has_stocks:
-            # Only keep trading days (weekdays) for a cleaner correlation
-            # This avoids artificial zero returns on weekends for stocks
-            combined = combined[combined.index.dayofweek < 5]  # Monday=0, Friday=4
-            logger.info(f"Filtered to trading days only: {combined.shape}")
+        Returns are cached as an artifact of their own, keyed by symbols,
+        period, returns method and the version of the prices they come
+        from: requests that only change the correlation method reuse them
+        without fetching, aligning or computing anything. A refetch of the
+        prices changes the version, so stale returns are never served.
 
-        # Forward fill to handle missing values (holidays, etc.)
-        # Limit to 3 days to avoid carrying stale data too long
-        combined = combined.ffill(limit=3)
+        With SHARED_MEMORY_CACHE the version is the creation time of the
+        shared price segment and the returns are published next to it.
 
-        # Then backward fill for any remaining NaN at the beginning
-        combined = combined.bfill(limit=3)
+        Cached returns carry their full key, version included, in
+        `attrs['returns_key']` for caching results computed from them.
+        """
+        key = f"{self._shared_prices_key(assets, period, interval)}|returns|{returns_method}"
 
-        # Drop rows where any value is still NaN (ensures clean data for correlation)
-        initial_len = len(combined)
-        combined = combined.dropna()
+        if self.shared_frames is None:
+            version = self._data_version(assets, period, interval)
+            cached = self.returns_cache.get(key)
+            if version is not None and cached is not None and cached['version'] == version:
+                metrics.inc('cache_requests_total', cache='returns', result='hit')
+                return cached['prices'], cached['returns']
+            metrics.inc('cache_requests_total', cache='returns', result='miss')
 
-        if len(combined) < initial_len:
-            logger.info(f"Dropped {initial_len - len(combined)} rows with missing data")
+        prices_df = self.fetch_mixed_assets(assets, period, interval)
+        if prices_df.empty:
+            return prices_df, pd.DataFrame()
+
+        if 'shared_created_at' in prices_df.attrs:
+            # Tied to this exact price segment: refreshed prices get fresh returns
+            shared_key = f"{key}|{prices_df.attrs['shared_created_at']}"
+            returns_df = self.shared_frames.get(shared_key)
+            metrics.inc('cache_requests_total', cache='shared_returns',
+                        result='hit' if returns_df is not None else 'miss')
+            if returns_df is None:
+                with metrics.span('returns'):
+                    returns_df = CorrelationCalculator.calculate_returns(prices_df, method=returns_method)
+                returns_df.attrs['returns_key'] = shared_key
+                shared = self.shared_frames.put(shared_key, returns_df)
+                if shared is not None:
+                    returns_df = shared
+            return prices_df, returns_df
+
+        with metrics.span('returns'):
+            returns_df = CorrelationCalculator.calculate_returns(prices_df, method=returns_method)
+        version = self._data_version(assets, period, interval)
+        if version is not None:
+            returns_df.attrs['returns_key'] = f"{key}|{version}"
+            self.returns_cache.put(key, {'version': version, 'prices': prices_df, 'returns': returns_df})
+        return prices_df, returns_df
+
+    def iter_returns(self, assets: Dict[str, List[str]], period: str,
+                     returns_method: str = 'log') -> Iterator[Tuple[pd.DataFrame, pd.DataFrame]]:
+        """
+        Aligned prices and returns of a long-period basket, chunk by chunk,
+        up to the last settled day (yesterday).
+
+        The histories are brought up to date in the store, then read back
+        one window of HISTORY_CHUNK_DAYS at a time (memory-mapped), aligned
+        and turned into returns, so memory does not grow with the period.
+        Each window is read with a margin of earlier days for the gap
+        filling, and its returns start right after the last row of the
+        previous window. Windows where an asset has no price yet (before
+        its listing) are skipped, like incomplete rows of a full alignment.
+
+        Yields (prices, returns) per window; prices carry the window's
+        alignment report in `attrs['alignment']`.
+        """
+        today = np.datetime64(datetime.now().date())
+        start, end = today - np.timedelta64(Config.TIME_PERIODS[period]['days'], 'D'), today - ONE_DAY
+        classes = [(asset_class, symbols) for asset_class, symbols in
+                   (('crypto', assets.get('crypto') or []), ('stocks', self._stock_symbols(assets))) if symbols]
+
+        for asset_class, symbols in classes:
+            key = self._history_cache_key('crypto' if asset_class == 'crypto' else 'stock', symbols, period)
+            if time.time() - self.history_synced.get(key, 0) >= Config.CACHE_DURATION:
+                with metrics.span('backfill'):
+                    self.backfill_history(symbols, asset_class, start, end)
+                self.history_synced[key] = time.time()
+
+        exchanges, expected = {}, set()
+        for asset_class, symbols in classes:
+            for symbol in symbols:
+                exchanges[symbol] = exchange_for_symbol(symbol, asset_class)
+                stored = self.history_store.span(asset_class, symbol)
+                if stored is not None and stored[0] <= end and stored[1] >= start:
+                    expected.add(symbol)
+
+        chunk = np.timedelta64(Config.HISTORY_CHUNK_DAYS, 'D')
+        margin = np.timedelta64(14, 'D')
+        previous_end = None
+        for window_start in np.arange(start, end + ONE_DAY, chunk):
+            window_end = min(window_start + chunk - ONE_DAY, end)
+            frames = [self.history_store.read(asset_class, symbols, window_start - margin, window_end)
+                      for asset_class, symbols in classes]
+            frames = [frame for frame in frames if not frame.empty]
+            if not frames or set().union(*(frame.columns for frame in frames)) != expected:
+                continue
+
+            prices_df, report = align_frames(frames, exchanges)
+            # The previous window's last row is the base of this window's first return
+            first_row = previous_end if previous_end is not None else pd.Timestamp(start)
+            prices_df = prices_df[prices_df.index >= first_row]
+            if len(prices_df) < 2:
+                continue
+            returns_df = CorrelationCalculator.calculate_returns(prices_df, method=returns_method)
+            if returns_df.empty:
+                continue
+            previous_end = prices_df.index[-1]
+            prices_df.attrs['alignment'] = report
+            yield prices_df, returns_df
+
+    def _align_frames(self, all_data: List[pd.DataFrame], exchanges: Dict[str, str],
+                      interval: str = '1d') -> pd.DataFrame:
+        """Align price frames from different sources on their exchanges' trading calendars"""
+        combined, report = align_frames(all_data, exchanges, Config.INTERVALS[interval]['minutes'],
+                                        np.float64 if interval == '1d' else np.float32)
+
+        if report['calendar_days_excluded']:
+            excluded = 'non-trading days' if interval == '1d' else 'bars outside trading hours'
+            logger.info(f"Excluded {report['calendar_days_excluded']} {excluded} ({', '.join(report['calendars'])})")
+        if report['rows_dropped']:
+            logger.info(f"Dropped {report['rows_dropped']} rows with missing data")
+        if report['bar_offsets']:
+            logger.info(f"Bars sampled off the clock (minutes): {report['bar_offsets']}")
 
         # Validate data quality
         if len(combined) < 5:
             logger.warning(f"Only {len(combined)} data points after alignment - may be insufficient")
 
-        # Final validation - check for any remaining issues
-        if combined.isnull().any().any():
-            logger.warning("Some NaN values remain after cleaning")
-            combined = combined.dropna()
+        combined.attrs['alignment'] = report
+        return combined
 
-        # Remove any infinite values
-        combined = combined.replace([np.inf, -np.inf], np.nan).dropna()
+    def get_latest_quotes(self, assets: Dict[str, List[str]]) -> Dict[str, Dict]:
+        """
+        Get the latest quote for each asset, with its timestamp.
 
-        logger.info(f"Combined data shape after cleaning: {combined.shape}")
-        logger.debug(f"Columns in combined data: {combined.columns.tolist()}")
+        Quotes come from one batched Yahoo Finance request covering every
+        symbol (crypto as SYMBOL-USD), with a batched CoinGecko simple/price
+        call for crypto Yahoo does not know. Each symbol is cached on its own
+        for QUOTE_CACHE_DURATION, independently of the history cache.
+        """
+        quotes = {}
+        crypto_symbols = []
+        yahoo_symbols = []
+
+        for asset_type, symbols in assets.items():
+            if not isinstance(symbols, list):
+                continue
+            for symbol in symbols:
+                cached = self.quote_cache.get(symbol)
+                if cached is not None:
+                    metrics.inc('cache_requests_total', cache='quote', result='hit')
+                    quotes[symbol] = cached['quote']
+                    continue
+                metrics.inc('cache_requests_total', cache='quote', result='miss')
+                if asset_type == 'crypto':
+                    crypto_symbols.append(symbol)
+                else:
+                    yahoo_symbols.append(symbol)
+
+        if not crypto_symbols and not yahoo_symbols:
+            return quotes
+
+        if self.provider is not None:
+            with metrics.span('quotes', provider=self.provider.name):
+                quotes.update(self.provider.fetch_quotes(crypto_symbols, 'crypto') if crypto_symbols else {})
+                quotes.update(self.provider.fetch_quotes(yahoo_symbols, 'stocks') if yahoo_symbols else {})
+            for symbol in crypto_symbols + yahoo_symbols:
+                if symbol in quotes:
+                    self.quote_cache.put(symbol, {'quote': quotes[symbol]})
+            return quotes
+
+        # Single batched Yahoo request for every missing symbol
+        symbol_mapping = {f"{symbol}-USD": symbol for symbol in crypto_symbols}
+        symbol_mapping.update({symbol: symbol for symbol in yahoo_symbols})
+        with metrics.span('quotes', provider='yahoo'):
+            fetched = self._fetch_yahoo_quotes(list(symbol_mapping.keys()))
+        for yf_symbol, quote in fetched.items():
+            quotes[symbol_mapping[yf_symbol]] = quote
+
+        # CoinGecko fallback for crypto Yahoo could not quote
+        missing_crypto = [symbol for symbol in crypto_symbols if symbol not in quotes]
+        if missing_crypto:
+            with metrics.span('quotes', provider='coingecko'):
+                quotes.update(self._fetch_coingecko_quotes(missing_crypto))
+
+        for symbol in crypto_symbols + yahoo_symbols:
+            if symbol in quotes:
+                self.quote_cache.put(symbol, {'quote': quotes[symbol]})
+
+        missing = [symbol for symbol in crypto_symbols + yahoo_symbols if symbol not in quotes]
+        if missing:
+            logger.warning(f"No quote found for: {missing}")
+
+        return quotes
+
+    def _fetch_yahoo_quotes(self, yf_symbols: List[str]) -> Dict[str, Dict]:
+        """Read the last daily bar of each symbol from one batched yf.download call"""
+        if not yf_symbols:
+            return {}
+
+        try:
+            data = yf.download(
+                yf_symbols,
+                period='5d',
+                interval='1d',
+                progress=False,
+                auto_adjust=True,
+                group_by='ticker',
+                threads=True
+            )
+        except Exception as e:
+            self._record_yahoo_call(None)
+            logger.warning(f"Yahoo quote fetch failed: {e}")
+            return {}
+
+        self._record_yahoo_call(data)
+
+        if data.empty:
+            return {}
+
+        if isinstance(data.columns, pd.MultiIndex):
+            if 'Close' not in data.columns.get_level_values(1):
+                return {}
+            closes = data.xs('Close', axis=1, level=1)
+        else:
+            if 'Close' not in data.columns:
+                return {}
+            closes = pd.DataFrame({yf_symbols[0]: data['Close']})
+
+        quotes = {}
+        for yf_symbol in yf_symbols:
+            if yf_symbol not in closes.columns:
+                continue
+            series = closes[yf_symbol]
+            last_valid_idx = series.last_valid_index()
+            if last_valid_idx is None:
+                continue
+            quotes[yf_symbol] = {
+                'price': float(series.loc[last_valid_idx]),
+                'timestamp': pd.Timestamp(last_valid_idx).isoformat(),
+                'source': 'yahoo'
+            }
+        return quotes
+
+    def _fetch_coingecko_quotes(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Fetch current crypto prices from one batched CoinGecko simple/price call"""
+        ids = {}
+        for symbol in symbols:
+            crypto_id = Config.CRYPTO_ASSETS.get(symbol) or self._get_coingecko_id_for_symbol(symbol)
+            if crypto_id:
+                ids[crypto_id] = symbol
+
+        if not ids:
+            return {}
+
+        params = {
+            'ids': ','.join(ids.keys()),
+            'vs_currencies': 'usd',
+            'include_last_updated_at': 'true'
+        }
+
+        if Config.COINGECKO_API_KEY:
+            params['x_cg_pro_api_key'] = Config.COINGECKO_API_KEY
+
+        def make_request():
+            response = self._http_get(f"{Config.COINGECKO_API_URL}/simple/price", params=params, timeout=10)
+            response.raise_for_status()
+            return response.json()
+
+        try:
+            data = self._retry_request(make_request, max_retries=2)
+        except Exception as e:
+            logger.warning(f"CoinGecko quote fetch failed: {e}")
+            return {}
+
+        quotes = {}
+        for crypto_id, symbol in ids.items():
+            entry = data.get(crypto_id, {})
+            if entry.get('usd') is None:
+                continue
+            updated_at = entry.get('last_updated_at')
+            quotes[symbol] = {
+                'price': float(entry['usd']),
+                'timestamp': datetime.fromtimestamp(updated_at).isoformat() if updated_at else datetime.now().isoformat(),
+                'source': 'coingecko'
+            }
+        return quotes
 
-        return combined
-    
     def get_latest_prices(self, assets: Dict[str, List[str]]) -> Dict[str, float]:
         """Get latest prices for all assets"""
-        prices = {}
-        
-        # Get 7 days of data to ensure we have recent prices
-        data = self.fetch_mixed_assets(assets, '30d')
-        
-        if not data.empty:
-            # Get the last valid price for each asset
-            for symbol in data.columns:
-                last_valid_idx = data[symbol].last_valid_index()
-                if last_valid_idx is not None:
-                    prices[symbol] = float(data.loc[last_valid_idx, symbol])
-        
-        return prices
+        quotes = self.get_latest_quotes(assets)
+        return {symbol: quote['price'] for symbol, quote in quotes.items()}
 
     def search_assets(self, query: str) -> List[Dict]:
         """Search for assets in both Yahoo Finance and CoinGecko"""
@@ -438,48 +1047,10 @@ class DataFetcher:
         results = []
         
         try:
-            # First, try to search in common stock/ETF/commodity mappings
-            name_to_symbol_mappings = self._get_name_to_symbol_mappings()
-            query_lower = query.lower()
-            
-            # Search by name in mappings with improved matching
-            for name, symbol_info in name_to_symbol_mappings.items():
-                name_lower = name.lower()
-                # Check for exact word matches or partial matches
-                if (query_lower in name_lower or 
-                    any(word in name_lower for word in query_lower.split()) or
-                    any(word in query_lower for word in name_lower.split())):
-                    
-                    # Try to get data for this symbol to validate it
-                    try:
-                        ticker = yf.Ticker(symbol_info['symbol'])
-                        info = ticker.info
-                        
-                        if info and 'symbol' in info and info.get('regularMarketPrice'):
-                            # Calculate relevance score for better ordering
-                            relevance_score = 0
-                            if query_lower == name_lower:
-                                relevance_score = 100  # Exact match
-                            elif name_lower.startswith(query_lower):
-                                relevance_score = 90   # Starts with query
-                            elif query_lower in name_lower:
-                                relevance_score = 80   # Contains query
-                            else:
-                                relevance_score = 70   # Word match
-                            
-                            results.append({
-                                'symbol': symbol_info['symbol'],
-                                'name': name,
-                                'source': 'yahoo',
-                                'category': symbol_info['category'],
-                                'price': info.get('regularMarketPrice'),
-                                'currency': info.get('currency', 'USD'),
-                                'relevance': relevance_score
-                            })
-                    except:
-                        continue
-            
-            # Try searching with the query as a symbol (existing logic)
+            # Candidates from the prebuilt stock/ETF/commodity index
+            hits = self.search_index.search(query, source='yahoo')
+            
+            # Try searching with the query as a symbol
             symbols_to_try = [
                 query.upper(),
                 f"{query.upper()}.PA",  # Euronext Paris
@@ -489,46 +1060,104 @@ class DataFetcher:
                 f"{query.upper()}=F"    # Futures/Commodities
             ]
             
+            # Validate every candidate at once (cached, concurrent, rate limited)
+            metadata = self._get_ticker_metadata_many(
+                [hit['symbol'] for hit in hits] + symbols_to_try
+            )
+            
+            for hit in hits:
+                info = metadata.get(hit['symbol'])
+                if info:
+                    results.append({
+                        'symbol': hit['symbol'],
+                        'name': hit['name'],
+                        'source': 'yahoo',
+                        'category': hit['category'],
+                        'price': info['price'],
+                        'currency': info['currency'],
+                        'relevance': hit['relevance']
+                    })
+            
             for symbol in symbols_to_try:
-                try:
-                    ticker = yf.Ticker(symbol)
-                    info = ticker.info
-                    
-                    if info and 'symbol' in info and info.get('regularMarketPrice'):
-                        name = info.get('longName', info.get('shortName', symbol))
-                        if name and name != symbol:
-                            # Check if we already have this symbol
-                            if not any(r['symbol'] == symbol for r in results):
-                                # Determine category based on asset type
-                                category = self._determine_yahoo_category(info)
-                                
-                                # Calculate relevance for symbol-based search
-                                symbol_relevance = 50  # Lower than name matches
-                                if query.upper() == symbol:
-                                    symbol_relevance = 95
-                                elif symbol.startswith(query.upper()):
-                                    symbol_relevance = 85
-                                
-                                results.append({
-                                    'symbol': symbol,
-                                    'name': name,
-                                    'source': 'yahoo',
-                                    'category': category,
-                                    'price': info.get('regularMarketPrice'),
-                                    'currency': info.get('currency', 'USD'),
-                                    'relevance': symbol_relevance
-                                })
-                    
-                    time.sleep(0.1)  # Rate limiting
-                    
-                except Exception as e:
-                    continue  # Skip invalid symbols
+                info = metadata.get(symbol)
+                if not info:
+                    continue
+                
+                name = info['name']
+                if name and name != symbol:
+                    # Check if we already have this symbol
+                    if not any(r['symbol'] == symbol for r in results):
+                        # Determine category based on asset type
+                        category = self._determine_yahoo_category(info)
+                        
+                        # Make the symbol searchable by name from now on
+                        self.search_index.add(name, symbol, category, 'yahoo')
+                        
+                        # Calculate relevance for symbol-based search
+                        symbol_relevance = 50  # Lower than name matches
+                        if query.upper() == symbol:
+                            symbol_relevance = 95
+                        elif symbol.startswith(query.upper()):
+                            symbol_relevance = 85
+                        
+                        results.append({
+                            'symbol': symbol,
+                            'name': name,
+                            'source': 'yahoo',
+                            'category': category,
+                            'price': info['price'],
+                            'currency': info['currency'],
+                            'relevance': symbol_relevance
+                        })
                     
         except Exception as e:
             print(f"Error searching Yahoo Finance: {e}")
         
         return results
     
+    def _get_ticker_metadata(self, symbol: str) -> Optional[Dict]:
+        """
+        Get name, price, currency and quote type for a Yahoo symbol.
+
+        Results, including "unknown symbol", are kept in the persistent
+        metadata cache, so only the first lookup pays for the HTTP call.
+        Transient errors are not cached.
+        """
+        if self.provider is not None:
+            return self.provider.fetch_metadata(symbol)
+        
+        found, metadata = self.metadata_cache.lookup(symbol)
+        metrics.inc('cache_requests_total', cache='metadata', result='hit' if found else 'miss')
+        if found:
+            return metadata
+        
+        self.yahoo_limiter.acquire()
+        try:
+            info = yf.Ticker(symbol).info
+        except Exception as e:
+            logger.debug(f"Metadata lookup failed for {symbol}: {e}")
+            return None
+        
+        metadata = None
+        if info and 'symbol' in info and info.get('regularMarketPrice'):
+            metadata = {
+                'symbol': info['symbol'],
+                'name': info.get('longName', info.get('shortName', symbol)),
+                'price': info.get('regularMarketPrice'),
+                'currency': info.get('currency', 'USD'),
+                'quoteType': info.get('quoteType', '')
+            }
+        
+        self.metadata_cache.set(symbol, metadata)
+        return metadata
+    
+    def _get_ticker_metadata_many(self, symbols: List[str]) -> Dict[str, Optional[Dict]]:
+        """Look up metadata for several symbols concurrently"""
+        unique_symbols = list(dict.fromkeys(symbols))
+        metadata = dict(zip(unique_symbols, self.lookup_pool.map(self._get_ticker_metadata, unique_symbols)))
+        self.metadata_cache.save()
+        return metadata
+    
     def _get_name_to_symbol_mappings(self) -> Dict[str, Dict]:
         """Get a mapping of company/asset names to their symbols for search"""
         mappings = {}
@@ -696,65 +1325,58 @@ class DataFetcher:
         results = []
         
         try:
-            # First, try to search in crypto name mappings
-            crypto_name_mappings = self._get_crypto_name_mappings()
-            query_lower = query.lower()
-            
-            # Search by name in mappings with improved matching
-            for name, crypto_info in crypto_name_mappings.items():
-                name_lower = name.lower()
-                # Check for exact word matches or partial matches
-                if (query_lower in name_lower or 
-                    any(word in name_lower for word in query_lower.split()) or
-                    any(word in query_lower for word in name_lower.split())):
+            # First, look up the prebuilt crypto index
+            hits = self.search_index.search(query, source='coingecko')
+            
+            if self.provider is not None:
+                # Offline mode: price index hits from the provider, no search API
+                quotes = self.provider.fetch_quotes([hit['symbol'] for hit in hits], 'crypto')
+                return [{
+                    'symbol': hit['symbol'].upper(),
+                    'name': hit['name'],
+                    'source': 'coingecko',
+                    'category': 'crypto',
+                    'coingecko_id': hit['coingecko_id'],
+                    'price': quotes[hit['symbol']]['price'],
+                    'relevance': hit['relevance']
+                } for hit in hits if hit['symbol'] in quotes]
+            
+            if hits:
+                # Get current prices for validation, in a single batched call
+                price_url = f"{Config.COINGECKO_API_URL}/simple/price"
+                price_params = {
+                    'ids': ','.join(dict.fromkeys(hit['coingecko_id'] for hit in hits)),
+                    'vs_currencies': 'usd'
+                }
+                
+                if Config.COINGECKO_API_KEY:
+                    price_params['x_cg_pro_api_key'] = Config.COINGECKO_API_KEY
+                
+                price_response = self._http_get(price_url, params=price_params)
+                if price_response.status_code == 200:
+                    price_data = price_response.json()
                     
-                    # Try to get current price for validation
-                    try:
-                        price_url = f"https://api.coingecko.com/api/v3/simple/price"
-                        price_params = {
-                            'ids': crypto_info['id'],
-                            'vs_currencies': 'usd'
-                        }
-                        
-                        if Config.COINGECKO_API_KEY:
-                            price_params['x_cg_pro_api_key'] = Config.COINGECKO_API_KEY
-                        
-                        price_response = requests.get(price_url, params=price_params)
-                        if price_response.status_code == 200:
-                            price_data = price_response.json()
-                            current_price = price_data.get(crypto_info['id'], {}).get('usd')
-                            
-                            # Calculate relevance score
-                            relevance_score = 0
-                            if query_lower == name_lower:
-                                relevance_score = 100  # Exact match
-                            elif name_lower.startswith(query_lower):
-                                relevance_score = 90   # Starts with query
-                            elif query_lower in name_lower:
-                                relevance_score = 80   # Contains query
-                            else:
-                                relevance_score = 70   # Word match
-                            
-                            results.append({
-                                'symbol': crypto_info['symbol'].upper(),
-                                'name': name,
-                                'source': 'coingecko',
-                                'category': 'crypto',
-                                'coingecko_id': crypto_info['id'],
-                                'price': current_price,
-                                'relevance': relevance_score
-                            })
-                    except:
-                        continue
+                    for hit in hits:
+                        if hit['coingecko_id'] not in price_data:
+                            continue
+                        results.append({
+                            'symbol': hit['symbol'].upper(),
+                            'name': hit['name'],
+                            'source': 'coingecko',
+                            'category': 'crypto',
+                            'coingecko_id': hit['coingecko_id'],
+                            'price': price_data[hit['coingecko_id']].get('usd'),
+                            'relevance': hit['relevance']
+                        })
             
             # Then use CoinGecko search API
-            url = "https://api.coingecko.com/api/v3/search"
+            url = f"{Config.COINGECKO_API_URL}/search"
             params = {'query': query}
             
             if Config.COINGECKO_API_KEY:
                 params['x_cg_pro_api_key'] = Config.COINGECKO_API_KEY
             
-            response = requests.get(url, params=params)
+            response = self._http_get(url, params=params)
             response.raise_for_status()
             
             data = response.json()
@@ -783,6 +1405,9 @@ class DataFetcher:
                         'market_cap_rank': coin.get('market_cap_rank'),
                         'relevance': api_relevance
                     })
+                
+                # Make the coin searchable from memory from now on
+                self.search_index.add(coin['name'], coin['symbol'].upper(), 'crypto', 'coingecko', coingecko_id=coin['id'])
             
         except Exception as e:
             print(f"Error searching CoinGecko: {e}")
@@ -859,6 +1484,8 @@ class DataFetcher:
     def validate_asset(self, symbol: str, source: str) -> Dict:
         """Validate that an asset exists and can be fetched"""
         try:
+            if self.provider is not None:
+                return self._validate_provider_asset(symbol, source)
             if source == 'yahoo':
                 return self._validate_yahoo_asset(symbol)
             elif source == 'coingecko':
@@ -868,24 +1495,60 @@ class DataFetcher:
         except Exception as e:
             return {'valid': False, 'error': str(e)}
     
+    def _validate_provider_asset(self, symbol: str, source: str) -> Dict:
+        """Validate an asset against the configured provider"""
+        asset_class = 'crypto' if source == 'coingecko' else 'stocks'
+        quote = self.provider.fetch_quotes([symbol], asset_class).get(symbol)
+        if quote is None:
+            return {'valid': False, 'error': f'No data available for symbol {symbol}'}
+        
+        metadata = self.provider.fetch_metadata(symbol) or {}
+        return {
+            'valid': True,
+            'name': metadata.get('name', symbol),
+            'current_price': quote['price'],
+            'currency': metadata.get('currency', 'USD')
+        }
+    
     def _validate_yahoo_asset(self, symbol: str) -> Dict:
         """Validate a Yahoo Finance asset"""
+        found, entry = self.symbol_resolver.lookup('yahoo', symbol)
+        metrics.inc('cache_requests_total', cache='resolution', result='hit' if found else 'miss')
+        if found:
+            if entry is None:
+                return {'valid': False, 'error': f'No data available for symbol {symbol}'}
+            return {
+                'valid': True,
+                'name': entry['name'],
+                'current_price': entry.get('price'),
+                'currency': entry['currency']
+            }
+        
         try:
             ticker = yf.Ticker(symbol)
             # Try to get recent data
             hist = ticker.history(period="5d")
             
             if hist.empty:
+                self.symbol_resolver.record_unknown('yahoo', symbol)
                 return {'valid': False, 'error': f'No data available for symbol {symbol}'}
             
-            info = ticker.info
-            name = info.get('longName', info.get('shortName', symbol))
+            info = self._get_ticker_metadata(symbol) or {}
+            name = info.get('name', symbol)
+            
+            entry = self.symbol_resolver.record(
+                'yahoo', symbol, symbol,
+                name=name,
+                category=self._determine_yahoo_category(info) if info else None,
+                currency=info.get('currency', 'USD'),
+                price=info.get('price', float(hist['Close'].iloc[-1]))
+            )
             
             return {
                 'valid': True,
                 'name': name,
-                'current_price': info.get('regularMarketPrice'),
-                'currency': info.get('currency', 'USD')
+                'current_price': entry['price'],
+                'currency': entry['currency']
             }
             
         except Exception as e:
@@ -894,54 +1557,45 @@ class DataFetcher:
     def _validate_coingecko_asset(self, symbol: str) -> Dict:
         """Validate a CoinGecko asset"""
         try:
-            # First, search for the coin to get its ID
-            url = "https://api.coingecko.com/api/v3/search"
-            params = {'query': symbol}
+            # First, resolve the symbol to its coin ID (cached)
+            coin = self._resolve_coingecko_symbol(symbol)
             
-            if Config.COINGECKO_API_KEY:
-                params['x_cg_pro_api_key'] = Config.COINGECKO_API_KEY
-            
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            coins = data.get('coins', [])
-            
-            # Find exact symbol match
-            coin_id = None
-            coin_name = None
-            for coin in coins:
-                if coin['symbol'].upper() == symbol.upper():
-                    coin_id = coin['id']
-                    coin_name = coin['name']
-                    break
-            
-            if not coin_id:
+            if not coin:
                 return {'valid': False, 'error': f'Cryptocurrency {symbol} not found'}
             
-            # Try to get price data
-            price_url = f"https://api.coingecko.com/api/v3/simple/price"
-            price_params = {
-                'ids': coin_id,
-                'vs_currencies': 'usd'
-            }
-            
-            if Config.COINGECKO_API_KEY:
-                price_params['x_cg_pro_api_key'] = Config.COINGECKO_API_KEY
-            
-            price_response = requests.get(price_url, params=price_params)
-            price_response.raise_for_status()
-            
-            price_data = price_response.json()
-            current_price = price_data.get(coin_id, {}).get('usd')
+            # Check once that the coin has price data, then trust the table
+            if 'price' not in coin:
+                price_url = f"{Config.COINGECKO_API_URL}/simple/price"
+                price_params = {
+                    'ids': coin['provider_id'],
+                    'vs_currencies': 'usd'
+                }
+                
+                if Config.COINGECKO_API_KEY:
+                    price_params['x_cg_pro_api_key'] = Config.COINGECKO_API_KEY
+                
+                price_response = self._http_get(price_url, params=price_params, timeout=10)
+                price_response.raise_for_status()
+                
+                price_data = price_response.json()
+                current_price = price_data.get(coin['provider_id'], {}).get('usd')
+                
+                if current_price is None:
+                    self.symbol_resolver.record_unknown('coingecko', symbol)
+                    return {'valid': False, 'error': f'No price data available for {symbol}'}
+                
+                coin = self.symbol_resolver.record(
+                    'coingecko', symbol, coin['provider_id'],
+                    name=coin['name'], category='crypto', price=current_price
+                )
             
             return {
                 'valid': True,
-                'name': coin_name,
-                'coingecko_id': coin_id,
-                'current_price': current_price,
+                'name': coin['name'],
+                'coingecko_id': coin['provider_id'],
+                'current_price': coin['price'],
                 'currency': 'USD'
             }
             
         except Exception as e:
-            return {'valid': False, 'error': f'Cannot validate {symbol}: {str(e)}'}
\ No newline at end of file
+            return {'valid': False, 'error': f'Cannot validate {symbol}: {str(e)}'}
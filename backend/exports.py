@@ -0,0 +1,209 @@
+"""
+Streaming export of an analysis result as CSV, Parquet or XLSX.
+
+A result is exported as sheets (correlation matrix, statistics, returns,
+prices), each given as an iterator of DataFrame chunks. Chunks are encoded
+and sent one at a time, so the file is never held in memory as a whole:
+several CSV or Parquet sheets go into a ZIP archive written on the fly
+(without seeking), and XLSX workbooks, themselves ZIP archives of XML
+parts, are written the same way, one row at a time.
+
+Parquet needs pyarrow, which is optional.
+"""
+import io
+import zipfile
+from typing import Iterable, Iterator, List
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+# format -> (mimetype, file extension)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx')
+}
+EXPORT_SHEETS = ('correlation', 'statistics', 'returns', 'prices')
+
+# Rows per chunk of the long tables (returns, prices)
+CHUNK_ROWS = 2000
+
+
+class Sheet:
+    """One table of an export: its name, index label and rows as DataFrame chunks"""
+
+    def __init__(self, name: str, chunks: Iterable[pd.DataFrame], index_label: str,
+                 date_format: str = '%Y-%m-%d'):
+        self.name = name
+        self.chunks = chunks
+        self.index_label = index_label
+        self.date_format = date_format
+
+
+def row_chunks(frame: pd.DataFrame, rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Slices of a frame (views, no copy) of at most `rows` rows"""
+    for start in range(0, len(frame), rows):
+        yield frame.iloc[start:start + rows]
+
+
+def check_format(export_format: str):
+    """Raise ImportError when the optional library a format needs is missing"""
+    if export_format == 'parquet':
+        import pyarrow  # noqa: F401
+
+
+def is_archive(export_format: str, sheets: List[Sheet]) -> bool:
+    """Whether the export is sent as a ZIP of one file per sheet"""
+    return export_format != 'xlsx' and len(sheets) > 1
+
+
+class _Sink(io.RawIOBase):
+    """Write-only stream that keeps what was written until it is taken"""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        # Lets writers track offsets; seeking stays unsupported, so ZipFile streams
+        return self._position
+
+    def take(self) -> bytes:
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def _labelled(chunk: pd.DataFrame, sheet: Sheet) -> pd.DataFrame:
+    chunk = chunk.rename_axis(sheet.index_label)
+    if isinstance(chunk.index, pd.DatetimeIndex):
+        chunk = chunk.set_axis(chunk.index.strftime(sheet.date_format).rename(sheet.index_label), axis=0)
+    return chunk
+
+
+def _csv_parts(sheet: Sheet) -> Iterator[bytes]:
+    header = True
+    for chunk in sheet.chunks:
+        yield _labelled(chunk, sheet).to_csv(header=header).encode('utf-8')
+        header = False
+
+
+def _parquet_parts(sheet: Sheet) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink, writer = _Sink(), None
+    try:
+        for chunk in sheet.chunks:
+            table = pa.Table.from_pandas(chunk.rename_axis(sheet.index_label), preserve_index=True)
+            if writer is None:
+                writer = pq.ParquetWriter(sink, table.schema)
+            # One row group per chunk
+            writer.write_table(table.cast(writer.schema))
+            yield sink.take()
+    finally:
+        if writer is not None:
+            writer.close()
+    yield sink.take()
+
+
+def _xml_cell(value) -> str:
+    if isinstance(value, str):
+        return f'<c t="inlineStr"><is><t>{escape(value)}</t></is></c>'
+    if value is None or not np.isfinite(value):
+        return '<c/>'
+    return f'<c><v>{value!r}</v></c>'
+
+
+def _xlsx_sheet_parts(sheet: Sheet) -> Iterator[bytes]:
+    yield (b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+           b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>')
+    header = True
+    for chunk in sheet.chunks:
+        chunk = _labelled(chunk, sheet)
+        rows = []
+        if header:
+            rows.append('<row>' + ''.join(_xml_cell(str(c)) for c in [sheet.index_label, *chunk.columns]) + '</row>')
+            header = False
+        values = chunk.to_numpy(dtype=np.float64, na_value=np.nan) if all(
+            pd.api.types.is_numeric_dtype(t) for t in chunk.dtypes) else chunk.to_numpy(dtype=object)
+        for label, row in zip(chunk.index, values):
+            cells = ''.join(_xml_cell(v if isinstance(v, str) or v is None else float(v)) for v in row)
+            rows.append(f'<row>{_xml_cell(str(label))}{cells}</row>')
+        yield ''.join(rows).encode('utf-8')
+    yield b'</sheetData></worksheet>'
+
+
+def _xlsx_package(names: List[str]) -> List[tuple]:
+    """The fixed parts of a workbook with the given sheet names: (path, content)"""
+    sheets = ''.join(f'<sheet name="{escape(name)}" sheetId="{i}" r:id="rId{i}"/>' for i, name in enumerate(names, 1))
+    relations = ''.join(
+        f'<Relationship Id="rId{i}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        f'Target="worksheets/sheet{i}.xml"/>' for i in range(1, len(names) + 1))
+    overrides = ''.join(
+        f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+        f'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        for i in range(1, len(names) + 1))
+    declaration = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    return [
+        ('[Content_Types].xml', declaration +
+         '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+         '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+         '<Default Extension="xml" ContentType="application/xml"/>'
+         '<Override PartName="/xl/workbook.xml" '
+         'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+         f'{overrides}</Types>'),
+        ('_rels/.rels', declaration +
+         '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+         '<Relationship Id="rId1" '
+         'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+         'Target="xl/workbook.xml"/></Relationships>'),
+        ('xl/workbook.xml', declaration +
+         '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+         'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+         f'<sheets>{sheets}</sheets></workbook>'),
+        ('xl/_rels/workbook.xml.rels', declaration +
+         '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+         f'{relations}</Relationships>')
+    ]
+
+
+def _zip_stream(entries) -> Iterator[bytes]:
+    """ZIP archive of (path, parts) entries, sent as each part is compressed"""
+    sink = _Sink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for path, parts in entries:
+            with archive.open(path, 'w', force_zip64=True) as entry:
+                for part in parts:
+                    entry.write(part)
+                    data = sink.take()
+                    if data:
+                        yield data
+    yield sink.take()
+
+
+def stream_export(export_format: str, sheets: List[Sheet]) -> Iterator[bytes]:
+    """Bytes of the export file, chunk by chunk"""
+    if export_format == 'xlsx':
+        package = [(path, [content.encode('utf-8')]) for path, content in _xlsx_package([s.name for s in sheets])]
+        entries = package + [(f'xl/worksheets/sheet{i}.xml', _xlsx_sheet_parts(sheet))
+                             for i, sheet in enumerate(sheets, 1)]
+        yield from _zip_stream(entries)
+        return
+
+    encode = _csv_parts if export_format == 'csv' else _parquet_parts
+    if not is_archive(export_format, sheets):
+        yield from (part for part in encode(sheets[0]) if part)
+        return
+    extension = EXPORT_FORMATS[export_format][1]
+    yield from _zip_stream((f'{sheet.name}.{extension}', encode(sheet)) for sheet in sheets)
@@ -0,0 +1,197 @@
+import os
+import threading
+import logging
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# One record per daily bar, sorted by date
+BAR_DTYPE = np.dtype([('date', 'M8[D]'), ('close', '<f8')])
+
+ONE_DAY = np.timedelta64(1, 'D')
+
+
+class HistoryStore:
+    """
+    Daily close history per symbol, on disk, for the long periods.
+
+    Each fetched chunk is an immutable segment file
+    `<asset_class>/<SYMBOL>/<first day>_<last day>.npy` holding the bars of
+    the days it covers; a segment may be empty (weekends, before listing).
+    The covered range of a symbol is the contiguous run of segments ending
+    with the most recent day. Segments are created under a temporary name
+    and renamed, never rewritten in place (replacing a file forces a disk
+    flush on ext4), so an interrupted fetch loses at most the chunk in
+    flight. Past `max_segments` (daily top-ups), the covered segments are
+    merged into one.
+
+    Segments are memory-mapped when read: reading a window of a long
+    history only touches the pages of that window.
+    """
+
+    def __init__(self, directory: str, max_segments: int = 16):
+        self.directory = directory
+        self.max_segments = max_segments
+        self._lock = threading.Lock()
+
+    def _symbol_dir(self, asset_class: str, symbol: str) -> str:
+        return os.path.join(self.directory, asset_class, symbol.replace(os.sep, '_'))
+
+    def _segments(self, asset_class: str, symbol: str) -> List[Tuple[np.datetime64, np.datetime64, str]]:
+        """(first day, last day, path) of each segment, oldest first"""
+        directory = self._symbol_dir(asset_class, symbol)
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return []
+        segments = []
+        for name in names:
+            first, _, last = name[:-len('.npy')].partition('_')
+            if not name.endswith('.npy') or not last:
+                continue
+            try:
+                segments.append((np.datetime64(first, 'D'), np.datetime64(last, 'D'), os.path.join(directory, name)))
+            except ValueError:
+                continue
+        return sorted(segments)
+
+    def _covered_segments(self, asset_class: str, symbol: str) -> List[Tuple[np.datetime64, np.datetime64, str]]:
+        """Segments of the contiguous run ending with the most recent covered day"""
+        segments = sorted(self._segments(asset_class, symbol), key=lambda segment: segment[1], reverse=True)
+        run = []
+        for segment in segments:
+            if run and segment[1] + ONE_DAY < min(first for first, _, _ in run):
+                break
+            run.append(segment)
+        return run
+
+    def coverage(self, asset_class: str, symbol: str) -> Optional[Tuple[np.datetime64, np.datetime64]]:
+        """Covered range (inclusive), or None if nothing was fetched yet"""
+        run = self._covered_segments(asset_class, symbol)
+        if not run:
+            return None
+        return min(first for first, _, _ in run), run[0][1]
+
+    def missing(self, asset_class: str, symbol: str, start: np.datetime64,
+                end: np.datetime64) -> Tuple[Optional[Tuple], Optional[Tuple]]:
+        """
+        Ranges of [start, end] still to fetch, as (forward, backward): days
+        after the covered range, and days before it. Either may be None.
+        """
+        covered = self.coverage(asset_class, symbol)
+        if covered is None:
+            return (start, end), None
+        forward = (max(covered[1] + ONE_DAY, start), end) if covered[1] < end else None
+        backward = (start, min(covered[0] - ONE_DAY, end)) if covered[0] > start else None
+        return forward, backward
+
+    @staticmethod
+    def _open(path: str) -> np.ndarray:
+        try:
+            return np.load(path, mmap_mode='r')
+        except ValueError:
+            # Empty segments cannot be memory-mapped
+            return np.load(path)
+
+    def _load(self, asset_class: str, symbol: str, start: np.datetime64, end: np.datetime64) -> np.ndarray:
+        """Bars of the segments overlapping [start, end], sorted by date"""
+        parts = []
+        for attempt in range(3):
+            try:
+                parts = [self._open(path) for first, last, path in self._segments(asset_class, symbol)
+                         if first <= end and last >= start]
+                break
+            except FileNotFoundError:
+                # Segments merged meanwhile: list them again
+                continue
+        parts = [part for part in parts if len(part)]
+        if not parts:
+            return np.empty(0, dtype=BAR_DTYPE)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def span(self, asset_class: str, symbol: str) -> Optional[Tuple[np.datetime64, np.datetime64]]:
+        """Dates of the first and last stored bars, or None without any bar"""
+        bars = self._load(asset_class, symbol, np.datetime64('1900-01-01'), np.datetime64('2200-01-01'))
+        if len(bars) == 0:
+            return None
+        return bars['date'][0], bars['date'][-1]
+
+    def read(self, asset_class: str, symbols: List[str], start, end) -> pd.DataFrame:
+        """Closes of the symbols between start and end (inclusive), one column per symbol with data"""
+        start, end = np.datetime64(start, 'D'), np.datetime64(end, 'D')
+        data = {}
+        for symbol in symbols:
+            bars = self._load(asset_class, symbol, start, end)
+            dates = bars['date']
+            lo, hi = np.searchsorted(dates, start), np.searchsorted(dates, end, side='right')
+            if hi > lo:
+                window = bars[lo:hi]
+                data[symbol] = pd.Series(np.array(window['close']),
+                                         index=pd.DatetimeIndex(window['date'].astype('datetime64[ns]')))
+        return pd.DataFrame(data)
+
+    @staticmethod
+    def _save(path: str, bars: np.ndarray):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, bars)
+        os.replace(tmp_path, path)
+
+    def write(self, asset_class: str, symbol: str, series: Optional[pd.Series],
+              covered_start: np.datetime64, covered_end: np.datetime64):
+        """
+        Store the bars fetched for [covered_start, covered_end] as a new
+        segment; `series` may be None or empty (no bar over that range).
+        Bars outside the range are ignored.
+        """
+        bars = np.empty(0, dtype=BAR_DTYPE)
+        if series is not None:
+            series = series.dropna()
+            series = series[(series.index >= pd.Timestamp(covered_start))
+                            & (series.index < pd.Timestamp(covered_end + ONE_DAY))]
+            bars = np.empty(len(series), dtype=BAR_DTYPE)
+            bars['date'] = series.index.values.astype('datetime64[D]')
+            bars['close'] = series.to_numpy(dtype=np.float64)
+            bars = np.sort(bars, order='date')
+
+        directory = self._symbol_dir(asset_class, symbol)
+        os.makedirs(directory, exist_ok=True)
+        self._save(os.path.join(directory, f"{covered_start}_{covered_end}.npy"), bars)
+        if len(self._segments(asset_class, symbol)) > self.max_segments:
+            self._compact(asset_class, symbol)
+
+    def _compact(self, asset_class: str, symbol: str):
+        """Merge the covered segments of a symbol into one (a later segment wins on a shared day)"""
+        with self._lock:
+            run = sorted(self._covered_segments(asset_class, symbol))
+            if len(run) <= 1:
+                return
+            try:
+                merged = np.concatenate([np.load(path) for _, _, path in run])
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not compact the history of {symbol}: {e}")
+                return
+            merged = merged[np.argsort(merged['date'], kind='stable')]
+            merged = merged[np.append(merged['date'][1:] != merged['date'][:-1], True)]
+
+            first, last = run[0][0], max(segment[1] for segment in run)
+            path = os.path.join(self._symbol_dir(asset_class, symbol), f"{first}_{last}.npy")
+            self._save(path, merged)
+            for _, _, old_path in run:
+                if old_path != path:
+                    try:
+                        os.remove(old_path)
+                    except FileNotFoundError:
+                        pass
+
+    def clear(self, asset_class: str, symbol: str):
+        """Forget a symbol's history, so it is fetched again from scratch"""
+        with self._lock:
+            for _, _, path in self._segments(asset_class, symbol):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
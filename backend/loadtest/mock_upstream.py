@@ -0,0 +1,201 @@
+"""
+Local mock of the Yahoo chart and CoinGecko HTTP APIs, for load tests.
+
+Serves deterministic synthetic prices (see providers.SyntheticProvider) on
+the routes HttpApiProvider calls, with configurable latency, 429 injection
+and payload size:
+
+    GET /v8/finance/chart/<SYMBOL>?period1=&period2=&interval=1d
+    GET /api/v3/coins/<id>/market_chart?vs_currency=usd&days=
+    GET /api/v3/simple/price?ids=&vs_currencies=usd
+    GET /api/v3/search?query=
+
+Point the backend at it with:
+    DATA_PROVIDER=http
+    YAHOO_CHART_URL=http://127.0.0.1:8099/v8/finance/chart
+    COINGECKO_API_URL=http://127.0.0.1:8099/api/v3
+
+Usage (from backend/):
+    python loadtest/mock_upstream.py --port 8099 --latency 150 --jitter 50 --rate-limit 0.05
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from providers import SyntheticProvider
+
+# Reverse mapping so market_chart/<id> returns the same series as the symbol
+COINGECKO_SYMBOLS = {coin_id: symbol for symbol, coin_id in Config.CRYPTO_ASSETS.items()}
+
+
+class MockUpstreamServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the mock settings and request counters"""
+
+    daemon_threads = True
+
+    def __init__(self, address, latency_ms=100.0, jitter_ms=0.0, rate_limit=0.0,
+                 retry_after=1, pad_bytes=0, seed=42):
+        super().__init__(address, MockUpstreamHandler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.padding = 'x' * pad_bytes
+        self.provider = SyntheticProvider(seed=seed)
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def count(self, route, status):
+        with self._lock:
+            key = f"{route} {status}"
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class MockUpstreamHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, route, status, payload, headers=None):
+        self.server.count(route, status)
+        if self.server.padding and isinstance(payload, dict):
+            payload = {**payload, 'padding': self.server.padding}
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        parts = [p for p in url.path.split('/') if p]
+
+        if parts[:3] == ['v8', 'finance', 'chart'] and len(parts) == 4:
+            route, handler = 'chart', lambda: self._chart(parts[3], params)
+        elif parts[:3] == ['api', 'v3', 'coins'] and len(parts) == 5 and parts[4] == 'market_chart':
+            route, handler = 'market_chart', lambda: self._market_chart(parts[3], params)
+        elif parts == ['api', 'v3', 'simple', 'price']:
+            route, handler = 'simple_price', lambda: self._simple_price(params)
+        elif parts == ['api', 'v3', 'search']:
+            route, handler = 'search', lambda: self._search(params)
+        else:
+            self._send('unknown', 404, {'error': 'Not Found'})
+            return
+
+        delay = max(0.0, random.gauss(server.latency_ms, server.jitter_ms)) if server.jitter_ms else server.latency_ms
+        time.sleep(delay / 1000)
+
+        if server.rate_limit and random.random() < server.rate_limit:
+            self._send(route, 429, {'status': {'error_code': 429, 'error_message': 'Rate limit exceeded'}},
+                       {'Retry-After': str(server.retry_after)})
+            return
+
+        status, payload = handler()
+        self._send(route, status, payload)
+
+    def _chart(self, symbol, params):
+        end = datetime.fromtimestamp(int(params.get('period2', time.time())))
+        start = datetime.fromtimestamp(int(params.get('period1', (end - timedelta(days=30)).timestamp())))
+        prices = self.server.provider.fetch_history([symbol], start, end, 'stocks')
+        if prices.empty:
+            return 404, {'chart': {'result': None, 'error': {'code': 'Not Found', 'description': 'No data found'}}}
+
+        closes = [round(float(p), 4) for p in prices[symbol]]
+        return 200, {'chart': {'result': [{
+            'meta': {'symbol': symbol, 'currency': 'USD', 'regularMarketPrice': closes[-1]},
+            'timestamp': [int(ts.timestamp()) for ts in prices.index],
+            'indicators': {'quote': [{'close': closes}], 'adjclose': [{'adjclose': closes}]}
+        }], 'error': None}}
+
+    def _market_chart(self, coin_id, params):
+        symbol = COINGECKO_SYMBOLS.get(coin_id, coin_id.upper())
+        end = datetime.now()
+        start = end - timedelta(days=int(float(params.get('days', 30))))
+        prices = self.server.provider.fetch_history([symbol], start, end, 'crypto')
+        return 200, {'prices': [[int(ts.timestamp() * 1000), float(p)] for ts, p in prices[symbol].items()]}
+
+    def _simple_price(self, params):
+        end = datetime.now()
+        payload = {}
+        for coin_id in filter(None, params.get('ids', '').split(',')):
+            symbol = COINGECKO_SYMBOLS.get(coin_id, coin_id.upper())
+            prices = self.server.provider.fetch_history([symbol], end - timedelta(days=2), end, 'crypto')
+            payload[coin_id] = {'usd': float(prices[symbol].iloc[-1]), 'last_updated_at': int(end.timestamp())}
+        return 200, payload
+
+    def _search(self, params):
+        query = params.get('query', '').lower()
+        coins = [
+            {'id': coin_id, 'symbol': symbol, 'name': coin_id.replace('-', ' ').title(), 'market_cap_rank': rank}
+            for rank, (symbol, coin_id) in enumerate(Config.CRYPTO_ASSETS.items(), start=1)
+            if query in symbol.lower() or query in coin_id
+        ]
+        return 200, {'coins': coins}
+
+
+def start_mock_upstream(host='127.0.0.1', port=0, **settings) -> MockUpstreamServer:
+    """Start the mock in a background thread; port 0 picks a free port"""
+    server = MockUpstreamServer((host, port), **settings)
+    threading.Thread(target=server.serve_forever, name='mock-upstream', daemon=True).start()
+    return server
+
+
+def add_arguments(parser):
+    """Mock upstream options, shared with run_loadtest.py"""
+    parser.add_argument('--latency', type=float, default=100.0, help='Mean upstream latency (ms)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Standard deviation of the latency (ms)')
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='Share of requests answered with 429')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After header of 429 responses (s)')
+    parser.add_argument('--pad-bytes', type=int, default=0, help='Extra bytes added to every JSON payload')
+
+
+def settings_from_args(args):
+    return {
+        'latency_ms': args.latency,
+        'jitter_ms': args.jitter,
+        'rate_limit': args.rate_limit,
+        'retry_after': args.retry_after,
+        'pad_bytes': args.pad_bytes
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mock Yahoo chart / CoinGecko upstream')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockUpstreamServer((args.host, args.port), **settings_from_args(args))
+    print(f"Mock upstream listening on {server.url}", file=sys.stderr)
+    print(f"  YAHOO_CHART_URL={server.url}/v8/finance/chart", file=sys.stderr)
+    print(f"  COINGECKO_API_URL={server.url}/api/v3", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
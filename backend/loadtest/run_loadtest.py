@@ -0,0 +1,259 @@
+"""
+HTTP load test of the backend against a mock Yahoo/CoinGecko upstream.
+
+Starts the mock upstream (mock_upstream.py) and a gunicorn server running
+app:app with DATA_PROVIDER=http pointed at it, then replays a weighted mix
+of correlation, search and price requests at increasing concurrency levels.
+For each level it reports RPS, p50/p95/p99 latency and error rate per
+endpoint as JSON, plus the level where throughput stops scaling.
+
+Usage (from backend/):
+    python loadtest/run_loadtest.py --concurrency 1,4,16,64 --duration 20
+    python loadtest/run_loadtest.py --workers 4 --threads 8 --latency 250 --rate-limit 0.05
+    python loadtest/run_loadtest.py --target http://127.0.0.1:5000   # already running server, no mock
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import requests
+
+from config import Config
+from mock_upstream import add_arguments, settings_from_args, start_mock_upstream
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CATALOG = {
+    'crypto': list(Config.CRYPTO_ASSETS),
+    'stocks': list(Config.STOCK_ASSETS),
+    'etfs': list(Config.ETF_ASSETS),
+    'commodities': list(Config.COMMODITY_ASSETS)
+}
+
+SEARCH_QUERIES = ['bit', 'eth', 'sol', 'apple', 'micro', 'tesla', 'gold', 'nvda', 'spy', 'link']
+
+# (basket size, weight): most users compare a handful of assets
+BASKET_SIZES = [(3, 4), (5, 4), (10, 2), (20, 1)]
+PERIODS = [('30d', 3), ('90d', 3), ('1y', 2), ('ytd', 1)]
+METHODS = [('pearson', 6), ('spearman', 2), ('kendall', 1)]
+
+
+def weighted_choice(rng, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights=weights)[0]
+
+
+def random_basket(rng, size):
+    symbols = [(asset_type, symbol) for asset_type, symbols in CATALOG.items() for symbol in symbols]
+    basket = {}
+    for asset_type, symbol in rng.sample(symbols, min(size, len(symbols))):
+        basket.setdefault(asset_type, []).append(symbol)
+    return basket
+
+
+def build_request(rng, mix):
+    """Return (endpoint label, method, path, json body) for one request of the mix"""
+    endpoint = weighted_choice(rng, mix)
+    if endpoint == 'correlation':
+        return endpoint, 'POST', '/api/correlation', {
+            'assets': random_basket(rng, weighted_choice(rng, BASKET_SIZES)),
+            'period': weighted_choice(rng, PERIODS),
+            'correlation_method': weighted_choice(rng, METHODS)
+        }
+    if endpoint == 'search':
+        return endpoint, 'POST', '/api/search-assets', {'query': rng.choice(SEARCH_QUERIES)}
+    if endpoint == 'prices':
+        return endpoint, 'POST', '/api/prices', {'assets': random_basket(rng, rng.randint(2, 6))}
+    return endpoint, 'GET', f'/api/{endpoint}', None
+
+
+def run_level(target, concurrency, duration, mix, seed, timeout):
+    """Run `concurrency` closed-loop clients for `duration` seconds"""
+    samples = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(client_id):
+        rng = random.Random(seed * 1000 + client_id)
+        session = requests.Session()
+        local = []
+        while time.perf_counter() < deadline:
+            endpoint, method, path, body = build_request(rng, mix)
+            start = time.perf_counter()
+            try:
+                response = session.request(method, target + path, json=body, timeout=timeout)
+                status = response.status_code
+            except requests.exceptions.RequestException:
+                status = 'error'
+            local.append((endpoint, status, time.perf_counter() - start))
+        with lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        'concurrency': concurrency,
+        'duration_s': elapsed,
+        'total': summarize(samples, elapsed),
+        'endpoints': {
+            endpoint: summarize([s for s in samples if s[0] == endpoint], elapsed)
+            for endpoint in sorted({s[0] for s in samples})
+        }
+    }
+
+
+def summarize(samples, elapsed):
+    if not samples:
+        return {'requests': 0}
+    latencies = np.array([s[2] for s in samples])
+    statuses = {}
+    for _, status, _ in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    errors = sum(count for status, count in statuses.items() if not status.startswith('2'))
+    return {
+        'requests': len(samples),
+        'rps': len(samples) / elapsed,
+        'p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'p95_ms': float(np.percentile(latencies, 95) * 1000),
+        'p99_ms': float(np.percentile(latencies, 99) * 1000),
+        'error_rate': errors / len(samples),
+        'statuses': statuses
+    }
+
+
+def find_saturation(levels, min_gain=0.1):
+    """First concurrency level whose RPS grew by less than `min_gain` over the previous one"""
+    for previous, level in zip(levels, levels[1:]):
+        if level['total'].get('rps', 0) < previous['total'].get('rps', 0) * (1 + min_gain):
+            return level['concurrency']
+    return None
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_app(args, upstream_url, data_dir):
+    """Start gunicorn on a free port with the HTTP provider pointed at the mock"""
+    port = free_port()
+    env = dict(os.environ,
+               DEBUG='False',
+               DATA_PROVIDER='http',
+               YAHOO_CHART_URL=f"{upstream_url}/v8/finance/chart",
+               COINGECKO_API_URL=f"{upstream_url}/api/v3",
+               DATA_DIR=data_dir)
+    if args.cache_duration is not None:
+        env['CACHE_DURATION'] = str(args.cache_duration)
+        env['QUOTE_CACHE_DURATION'] = str(args.cache_duration)
+
+    command = [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}',
+               '--workers', str(args.workers), '--threads', str(args.threads),
+               '--worker-class', 'gthread' if args.threads > 1 else 'sync',
+               '--timeout', '120', '--log-level', 'warning', 'app:app']
+    # The app logs every request at INFO level: keep it out of the report
+    log_path = os.path.join(data_dir, 'app.log')
+    with open(log_path, 'wb') as log_file:
+        process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=log_file, stderr=subprocess.STDOUT)
+    print(f"Backend logs: {log_path}", file=sys.stderr)
+
+    target = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{target}/api/health", timeout=1).ok:
+                return process, target
+        except requests.exceptions.RequestException:
+            pass
+        if process.poll() is not None:
+            break
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('gunicorn did not start')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the backend against a mock upstream')
+    parser.add_argument('--target', help='Base URL of an already running backend (no mock, no gunicorn)')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers')
+    parser.add_argument('--threads', type=int, default=4, help='Threads per gunicorn worker (gthread)')
+    parser.add_argument('--concurrency', default='1,4,16,32', type=lambda v: [int(x) for x in v.split(',')],
+                        help='Comma-separated numbers of concurrent clients')
+    parser.add_argument('--duration', type=float, default=15, help='Seconds per concurrency level')
+    parser.add_argument('--timeout', type=float, default=60, help='Client request timeout (s)')
+    parser.add_argument('--mix', default='correlation:6,search:2,prices:2,assets:1',
+                        type=lambda v: [(k, float(w)) for k, w in (item.split(':') for item in v.split(','))],
+                        help='Weighted request mix (correlation, search, prices, assets, periods)')
+    parser.add_argument('--cache-duration', type=int,
+                        help='CACHE_DURATION for the spawned app (0 sends every request upstream)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Write the JSON report to this file (default: stdout)')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    upstream = None
+    process = None
+    data_dir = tempfile.mkdtemp(prefix='loadtest-')
+    try:
+        if args.target:
+            target = args.target.rstrip('/')
+        else:
+            upstream = start_mock_upstream(**settings_from_args(args))
+            process, target = start_app(args, upstream.url, data_dir)
+
+        levels = []
+        for concurrency in args.concurrency:
+            level = run_level(target, concurrency, args.duration, args.mix, args.seed, args.timeout)
+            levels.append(level)
+            total = level['total']
+            print(f"concurrency {concurrency}: {total.get('rps', 0):.1f} req/s, "
+                  f"p95 {total.get('p95_ms', 0):.0f} ms, errors {total.get('error_rate', 0):.1%}",
+                  file=sys.stderr)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+        if upstream is not None:
+            upstream.shutdown()
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'target': target,
+            'workers': None if args.target else args.workers,
+            'threads': None if args.target else args.threads,
+            'duration_s': args.duration,
+            'mix': dict(args.mix),
+            'upstream': None if args.target else {**settings_from_args(args), 'requests': upstream.counts}
+        },
+        'saturation_concurrency': find_saturation(levels),
+        'levels': levels
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
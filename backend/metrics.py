@@ -0,0 +1,146 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+# Histogram buckets in seconds, from cache hits to slow upstream calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Spans recorded during the current request, for the Server-Timing header
+_request_spans: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar('request_spans', default=None)
+
+
+class MetricsRegistry:
+    """
+    Minimal in-process metrics registry rendering the Prometheus text format.
+
+    Counters and histograms are keyed by name and label set. Values are per
+    process: with several gunicorn workers each worker exposes its own
+    series, which Prometheus aggregates at query time.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _labels_key(labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def describe(self, name: str, help_text: str):
+        """Set the HELP text of a metric"""
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Increment a counter"""
+        key = (name, self._labels_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """Record a value (in seconds) in a histogram"""
+        key = (name, self._labels_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {
+                    'buckets': [0] * len(self.buckets),
+                    'sum': 0.0,
+                    'count': 0
+                }
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                histogram['buckets'][index] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    @contextmanager
+    def span(self, stage: str, **labels):
+        """
+        Time a pipeline stage.
+
+        The duration is recorded in the stage_duration_seconds histogram and,
+        when called while a request is being timed, in its Server-Timing list.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            self.observe('stage_duration_seconds', duration, stage=stage, **labels)
+
+            spans = _request_spans.get()
+            if spans is not None:
+                name = '_'.join([stage] + [str(v) for v in labels.values()])
+                spans.append((name, duration))
+
+    @staticmethod
+    def start_request():
+        """Start collecting spans for the current request"""
+        _request_spans.set([])
+
+    @staticmethod
+    def server_timing() -> str:
+        """Format the spans of the current request as a Server-Timing header value"""
+        spans = _request_spans.get() or []
+        return ', '.join(f"{name};dur={duration * 1000:.1f}" for name, duration in spans)
+
+    @staticmethod
+    def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        pairs = labels + extra
+        if not pairs:
+            return ''
+        escaped = (
+            '{}="{}"'.format(k, v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+            for k, v in pairs
+        )
+        return '{' + ','.join(escaped) + '}'
+
+    def render_prometheus(self) -> str:
+        """Render every metric in the Prometheus text exposition format"""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: {**h, 'buckets': list(h['buckets'])} for key, h in self._histograms.items()}
+
+        lines = []
+        seen = set()
+
+        def header(name, metric_type):
+            if name in seen:
+                return
+            seen.add(name)
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} {metric_type}")
+
+        for (name, labels), value in sorted(counters.items()):
+            header(name, 'counter')
+            lines.append(f"{name}{self._format_labels(labels)} {value}")
+
+        for (name, labels), histogram in sorted(histograms.items()):
+            header(name, 'histogram')
+            cumulative = 0
+            for bound, count in zip(self.buckets, histogram['buckets']):
+                cumulative += count
+                lines.append(f"{name}_bucket{self._format_labels(labels, (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{name}_bucket{self._format_labels(labels, (('le', '+Inf'),))} {histogram['count']}")
+            lines.append(f"{name}_sum{self._format_labels(labels)} {histogram['sum']}")
+            lines.append(f"{name}_count{self._format_labels(labels)} {histogram['count']}")
+
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+metrics.describe('stage_duration_seconds', 'Duration of pipeline stages (fetch, alignment, returns, correlation, ...)')
+metrics.describe('cache_requests_total', 'Cache lookups by cache and result (hit/miss)')
+metrics.describe('upstream_requests_total', 'Upstream API calls by provider and HTTP status')
+metrics.describe('upstream_request_duration_seconds', 'Latency of upstream HTTP calls by provider')
+metrics.describe('upstream_retries_total', 'Retried upstream calls by reason')
+metrics.describe('http_requests_total', 'API requests by endpoint and status')
+metrics.describe('http_request_duration_seconds', 'API request latency by endpoint')
+metrics.describe('calc_offload_total', 'Correlation matrices by method, computed inline or on the process pool')
@@ -0,0 +1,88 @@
+import json
+import os
+import threading
+import time
+import logging
+from typing import Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class PersistentCache:
+    """
+    Small key/value cache with per-entry TTL, persisted as a JSON file.
+
+    Values must be JSON-serializable. `None` is a valid value, which lets
+    callers cache negative results ("this symbol does not exist") and tell
+    them apart from a cache miss with `lookup()`. Writes are batched: `set()`
+    only marks the cache dirty and `save()` rewrites the file atomically.
+    """
+
+    def __init__(self, path: str, ttl: int):
+        self.path = path
+        self.ttl = ttl
+        self._entries = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self.load(path)
+
+    def load(self, path: str):
+        """Merge entries from a JSON file (missing or corrupt files are ignored)"""
+        if not os.path.exists(path):
+            return
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load cache file {path}: {e}")
+            return
+
+        with self._lock:
+            self._entries.update(entries)
+        logger.info(f"Loaded {len(entries)} entries from {path}")
+
+    def lookup(self, key: str) -> Tuple[bool, Any]:
+        """Return (found, value) for a non-expired entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            if entry['expires_at'] < time.time():
+                del self._entries[key]
+                self._dirty = True
+                return False, None
+            return True, entry['value']
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the cached value, or `default` if missing or expired"""
+        found, value = self.lookup(key)
+        return value if found else default
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        """Store a value; it expires after `ttl` seconds (defaults to the cache TTL)"""
+        now = time.time()
+        with self._lock:
+            self._entries[key] = {
+                'value': value,
+                'stored_at': now,
+                'expires_at': now + (ttl if ttl is not None else self.ttl)
+            }
+            self._dirty = True
+
+    def save(self):
+        """Write the cache to disk if it changed since the last save"""
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = dict(self._entries)
+            self._dirty = False
+
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save cache file {self.path}: {e}")
@@ -0,0 +1,124 @@
+import queue
+import threading
+import itertools
+import logging
+from typing import Callable, Dict, List, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class PriceSubscription:
+    """A client subscribed to live quotes for a set of symbols"""
+
+    def __init__(self, subscription_id: int, assets: Dict[str, List[str]], max_pending: int = 10):
+        self.id = subscription_id
+        self.assets = assets
+        self.symbols = {symbol for symbols in assets.values() for symbol in symbols}
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.last_sent = {}
+
+    def push(self, quotes: Dict[str, Dict]):
+        """Queue the quotes that changed since the last push, dropping the oldest update if the client lags"""
+        changed = {
+            symbol: quote for symbol, quote in quotes.items()
+            if symbol in self.symbols and self.last_sent.get(symbol) != quote
+        }
+        if not changed:
+            return
+
+        self.last_sent.update(changed)
+        while True:
+            try:
+                self.queue.put_nowait(changed)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout: float) -> Optional[Dict[str, Dict]]:
+        """Wait for the next update, or return None on timeout"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class PriceBroadcaster:
+    """
+    Polls upstream quotes once per interval for the union of all subscribed
+    symbols and fans the updates out to every subscriber.
+
+    Upstream load depends on the number of distinct symbols, not on the
+    number of connected clients. The polling thread starts with the first
+    subscriber and stops when the last one leaves.
+    """
+
+    def __init__(self, fetch_quotes: Callable[[Dict[str, List[str]]], Dict[str, Dict]],
+                 interval: Optional[int] = None):
+        self.fetch_quotes = fetch_quotes
+        self.interval = interval or Config.PRICE_STREAM_INTERVAL
+        self.latest_quotes = {}
+        self._subscribers = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def subscribe(self, assets: Dict[str, List[str]]) -> PriceSubscription:
+        """Register a subscriber and seed it with the quotes already known"""
+        subscription = PriceSubscription(next(self._ids), assets)
+
+        with self._lock:
+            self._subscribers[subscription.id] = subscription
+            subscription.push(self.latest_quotes)
+
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='price-broadcaster', daemon=True)
+                self._thread.start()
+
+        # Poll now so new symbols do not wait for the next interval
+        self._wakeup.set()
+        logger.info(f"Price subscriber {subscription.id} added ({len(subscription.symbols)} symbols)")
+        return subscription
+
+    def unsubscribe(self, subscription: PriceSubscription):
+        """Remove a subscriber"""
+        with self._lock:
+            self._subscribers.pop(subscription.id, None)
+        logger.info(f"Price subscriber {subscription.id} removed")
+
+    def subscribed_assets(self) -> Dict[str, List[str]]:
+        """Union of the symbols requested by all subscribers, grouped by asset type"""
+        union = {}
+        with self._lock:
+            for subscription in self._subscribers.values():
+                for asset_type, symbols in subscription.assets.items():
+                    union.setdefault(asset_type, set()).update(symbols)
+        return {asset_type: sorted(symbols) for asset_type, symbols in union.items()}
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+
+            # Cleared before polling: a subscriber arriving during the poll triggers another one
+            self._wakeup.clear()
+            assets = self.subscribed_assets()
+            try:
+                quotes = self.fetch_quotes(assets)
+            except Exception as e:
+                logger.warning(f"Price broadcast poll failed: {e}")
+                quotes = {}
+
+            with self._lock:
+                self.latest_quotes.update(quotes)
+                for subscription in self._subscribers.values():
+                    subscription.push(quotes)
+
+            self._wakeup.wait(self.interval)
@@ -0,0 +1,93 @@
+import os
+import sys
+import threading
+import time
+import uuid
+import logging
+from collections import Counter
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RequestProfiler:
+    """
+    Sampling profiler for a single thread (the one serving a request).
+
+    A daemon thread wakes up every `interval` seconds, reads the target
+    thread's current frame through sys._current_frames() and counts the
+    stack. Nothing is installed in the profiled thread itself (no
+    sys.setprofile hook), so the overhead is the sampler's own CPU time and
+    requests that are not profiled pay nothing.
+
+    The result is written in the collapsed ("folded") stack format, one
+    `root;caller;callee count` line per distinct stack, which flamegraph.pl,
+    speedscope and inferno read directly.
+    """
+
+    def __init__(self, directory: str, interval: float = 0.005, label: str = ''):
+        self.directory = directory
+        self.interval = interval
+        self.label = label
+        self.profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.samples = Counter()
+        self._thread_id = None
+        self._started_at = None
+        self._stop = threading.Event()
+        self._sampler = None
+
+    @staticmethod
+    def _stack(frame) -> str:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ';'.join(reversed(stack))
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                self.samples[self._stack(frame)] += 1
+
+    def start(self):
+        """Start sampling the calling thread"""
+        self._thread_id = threading.get_ident()
+        self._started_at = time.perf_counter()
+        self._sampler = threading.Thread(target=self._run, name=f'profiler-{self.profile_id}', daemon=True)
+        self._sampler.start()
+
+    def stop(self) -> Optional[str]:
+        """Stop sampling and write the profile; return its path"""
+        self._stop.set()
+        self._sampler.join()
+        duration = time.perf_counter() - self._started_at
+
+        path = os.path.join(self.directory, f"{self.profile_id}.folded")
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(f"# {self.label} duration={duration:.3f}s interval={self.interval}s "
+                        f"samples={sum(self.samples.values())}\n")
+                for stack, count in self.samples.most_common():
+                    f.write(f"{stack} {count}\n")
+        except OSError as e:
+            logger.warning(f"Could not write profile {path}: {e}")
+            return None
+
+        logger.info(f"Profile {self.profile_id} written ({self.label}, {duration:.3f}s)")
+        return path
+
+
+def prune_profiles(directory: str, keep: int):
+    """Delete the oldest profiles beyond `keep`"""
+    try:
+        files = sorted(f for f in os.listdir(directory) if f.endswith('.folded'))
+    except OSError:
+        return
+    for name in files[:-keep] if keep > 0 else files:
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError:
+            pass
@@ -0,0 +1,415 @@
+import os
+import time
+import zlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import requests
+
+from config import Config
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class MarketDataProvider:
+    """
+    Interface for market data sources plugged behind DataFetcher.
+
+    When DataFetcher is given a provider, history, quotes, ticker metadata and
+    asset validation all go through it instead of Yahoo Finance / CoinGecko.
+    Only `fetch_history` is required; the other methods have defaults built
+    on top of it.
+    """
+
+    name = 'base'
+
+    def fetch_history(self, symbols: List[str], start: datetime, end: datetime,
+                      asset_class: str, interval: str = '1d') -> pd.DataFrame:
+        """
+        Return close prices between start and end, one column per symbol
+        found, indexed by a timezone-naive DatetimeIndex. `asset_class` is
+        'crypto' or 'stocks' (stocks, ETFs and commodities). `interval` is a
+        Config.INTERVALS key: daily bars are indexed by day, intraday bars by
+        their UTC start time.
+        """
+        raise NotImplementedError
+
+    def fetch_quotes(self, symbols: List[str], asset_class: str) -> Dict[str, Dict]:
+        """Return {symbol: {'price', 'timestamp', 'source'}} from the last bar of the history"""
+        end = datetime.now()
+        history = self.fetch_history(symbols, end - timedelta(days=7), end, asset_class)
+
+        quotes = {}
+        for symbol in history.columns:
+            last_valid_idx = history[symbol].last_valid_index()
+            if last_valid_idx is not None:
+                quotes[symbol] = {
+                    'price': float(history.loc[last_valid_idx, symbol]),
+                    'timestamp': pd.Timestamp(last_valid_idx).isoformat(),
+                    'source': self.name
+                }
+        return quotes
+
+    def fetch_metadata(self, symbol: str) -> Optional[Dict]:
+        """Return {'symbol', 'name', 'price', 'currency', 'quoteType'} or None if unknown"""
+        quote = self.fetch_quotes([symbol], 'stocks').get(symbol)
+        if quote is None:
+            return None
+        return {
+            'symbol': symbol,
+            'name': symbol,
+            'price': quote['price'],
+            'currency': 'USD',
+            'quoteType': 'EQUITY'
+        }
+
+
+class SyntheticProvider(MarketDataProvider):
+    """
+    Deterministic synthetic prices for offline benchmarks and tests.
+
+    Each symbol follows a one-factor log-normal model: a market factor shared
+    by all symbols plus idiosyncratic noise, so symbols are genuinely
+    correlated. Crypto trades every day, other assets on weekdays. An
+    optional `latency` (seconds) simulates the upstream round trip.
+
+    Every random draw is a hash of (seed, symbol, date or bar), never of
+    the requested window: the factor of a day is the same for all symbols,
+    and overlapping windows (e.g. the chunks of the history store) read the
+    same path. The log price is built on three scales so that any window
+    costs the same, whatever its distance from the epoch:
+    - anchors every BLOCK_DAYS days since 1970, a mean-reverting AR(1)
+      (prices stay within a plausible range over decades);
+    - daily closes, a Brownian bridge between the anchors of their block;
+    - intraday bars, a Brownian bridge between two daily closes.
+    """
+
+    name = 'synthetic'
+
+    VOLATILITY = {'crypto': 0.04, 'stocks': 0.015}
+    BLOCK_DAYS = 256
+    ANCHOR_PERSISTENCE = 0.8
+    EPOCH = pd.Timestamp('1970-01-01').toordinal()
+
+    # Independent draw streams
+    _BETA, _PRICE, _ANCHOR, _DAY, _BAR = range(1, 6)
+
+    def __init__(self, seed: int = 42, latency: float = 0.0):
+        self.seed = seed
+        self.latency = latency
+
+    @staticmethod
+    def _symbol_seed(symbol: str) -> int:
+        return zlib.crc32(symbol.encode('utf-8'))
+
+    @staticmethod
+    def _mix(keys: np.ndarray) -> np.ndarray:
+        """splitmix64 finalizer: well-spread 64-bit hashes of uint64 keys"""
+        z = keys + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
+
+    def _uniforms(self, stream: int, symbol_seed: int, counters) -> np.ndarray:
+        """Uniforms in (0, 1), one per counter, for a stream and symbol (symbol_seed 0: shared by all)"""
+        base = self._mix(np.array([(self.seed << 40) ^ (stream << 32) ^ symbol_seed], dtype=np.uint64))[0]
+        hashed = self._mix(np.asarray(counters, dtype=np.int64).astype(np.uint64) ^ base)
+        return ((hashed >> np.uint64(11)).astype(np.float64) + 0.5) / 2.0 ** 53
+
+    def _normals(self, stream: int, symbol_seed: int, counters) -> np.ndarray:
+        """Standard normals, one per counter (Box-Muller on two hashed uniforms)"""
+        counters = np.asarray(counters, dtype=np.int64)
+        u1 = self._uniforms(stream, symbol_seed, 2 * counters)
+        u2 = self._uniforms(stream, symbol_seed, 2 * counters + 1)
+        return np.sqrt(-2.0 * np.log(u1)) * np.cos(2.0 * np.pi * u2)
+
+    def _shocks(self, stream: int, seeds: List[int], betas: np.ndarray, counters: np.ndarray) -> np.ndarray:
+        """Unit-variance shocks (counters x symbols): beta x shared factor + own noise"""
+        factor = self._normals(stream, 0, counters)[:, None]
+        noise = np.column_stack([self._normals(stream, seed, counters) for seed in seeds])
+        return (betas * factor + noise) / np.sqrt(1 + betas ** 2)
+
+    @staticmethod
+    def _bridge(start: np.ndarray, end: np.ndarray, shocks: np.ndarray, scale: float) -> np.ndarray:
+        """Brownian bridges from `start` to `end` (per symbol) through len(shocks) steps; row i = step i + 1"""
+        path = np.cumsum(shocks * scale, axis=0)
+        steps = np.arange(1, len(shocks) + 1)[:, None] / len(shocks)
+        return start + path - steps * (path[-1] - (end - start))
+
+    def _daily_levels(self, seeds: List[int], betas: np.ndarray, days: np.ndarray, volatility: float) -> np.ndarray:
+        """Log price (before the symbol's initial level) at the close of each day ordinal, days x symbols"""
+        blocks = (days - self.EPOCH) // self.BLOCK_DAYS
+        last_block = int(blocks.max())
+
+        # Anchor k = level at the end of block k - 1; AR(1) over all blocks since the epoch (a few dozen)
+        block_volatility = volatility * np.sqrt(self.BLOCK_DAYS)
+        innovations = self._shocks(self._ANCHOR, seeds, betas, np.arange(last_block + 2)) * block_volatility
+        anchors = np.zeros((last_block + 2, len(seeds)))
+        for k in range(1, last_block + 2):
+            anchors[k] = self.ANCHOR_PERSISTENCE * anchors[k - 1] + innovations[k]
+
+        levels = np.empty((len(days), len(seeds)))
+        for block in np.unique(blocks):
+            first_day = self.EPOCH + int(block) * self.BLOCK_DAYS
+            shocks = self._shocks(self._DAY, seeds, betas, np.arange(first_day, first_day + self.BLOCK_DAYS))
+            path = self._bridge(anchors[block], anchors[block + 1], shocks, volatility)
+            rows = blocks == block
+            levels[rows] = path[days[rows] - first_day]
+        return levels
+
+    @staticmethod
+    def _index(start: pd.Timestamp, end: pd.Timestamp, asset_class: str, minutes: int) -> pd.DatetimeIndex:
+        """Bar times: every day for crypto, weekdays for the rest (intraday: 14:30-21:00 UTC, NYSE hours)"""
+        if minutes >= 1440:
+            return pd.date_range(start, end, freq='D') if asset_class == 'crypto' else pd.bdate_range(start, end)
+        index = pd.date_range(start, end, freq=f'{minutes}min', inclusive='left')
+        if asset_class != 'crypto':
+            minute_of_day = index.hour * 60 + index.minute
+            index = index[(index.dayofweek < 5) & (minute_of_day >= 14 * 60 + 30) & (minute_of_day < 21 * 60)]
+        return index
+
+    def fetch_history(self, symbols: List[str], start: datetime, end: datetime,
+                      asset_class: str, interval: str = '1d') -> pd.DataFrame:
+        if self.latency:
+            time.sleep(self.latency)
+
+        minutes = Config.INTERVALS[interval]['minutes']
+        start = pd.Timestamp(start).normalize()
+        end = pd.Timestamp(end).normalize()
+        index = self._index(start, end, asset_class, minutes)
+        if len(index) == 0 or not symbols:
+            return pd.DataFrame()
+
+        volatility = self.VOLATILITY.get(asset_class, self.VOLATILITY['stocks'])
+        seeds = [self._symbol_seed(symbol) for symbol in symbols]
+        # Symbol constants, independent of the window
+        betas = np.array([0.2 + self._uniforms(self._BETA, seed, [0])[0] for seed in seeds])
+        initial_prices = np.array([10 + 490 * self._uniforms(self._PRICE, seed, [0])[0] for seed in seeds])
+
+        days = np.array([d.toordinal() for d in index.normalize()], dtype=np.int64)
+        if minutes >= 1440:
+            log_prices = self._daily_levels(seeds, betas, days, volatility)
+        else:
+            # Bars of a day bridge the previous close to the day's close
+            bars_per_day = 1440 // minutes
+            unique_days, day_rows = np.unique(days, return_inverse=True)
+            closes = self._daily_levels(seeds, betas, np.concatenate([unique_days - 1, unique_days]), volatility)
+            bar_volatility = volatility * np.sqrt(minutes / 1440)
+            bar_of_day = (index.hour * 60 + index.minute).to_numpy() // minutes
+            log_prices = np.empty((len(index), len(seeds)))
+            for i, day in enumerate(unique_days):
+                counters = day * bars_per_day + np.arange(bars_per_day) + minutes * (1 << 40)
+                path = self._bridge(closes[i], closes[len(unique_days) + i],
+                                    self._shocks(self._BAR, seeds, betas, counters), bar_volatility)
+                rows = day_rows == i
+                # Bar opening at position p is priced at its close
+                log_prices[rows] = path[bar_of_day[rows]]
+
+        prices = initial_prices * np.exp(log_prices)
+        return pd.DataFrame(prices, index=index, columns=list(symbols))
+
+    def fetch_metadata(self, symbol: str) -> Optional[Dict]:
+        metadata = super().fetch_metadata(symbol)
+        if metadata:
+            metadata['name'] = f"Synthetic {symbol}"
+        return metadata
+
+
+class LocalFileProvider(MarketDataProvider):
+    """
+    Prices read from a directory with one file per symbol.
+
+    Files are named `<SYMBOL>.csv` (or `<SYMBOL>.parquet`), with a date
+    index in the first column and a `close` / `Close` column (otherwise the
+    first data column is used). Files are loaded once and kept in memory.
+    """
+
+    name = 'local'
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._series = {}
+
+    def _load(self, symbol: str) -> Optional[pd.Series]:
+        if symbol in self._series:
+            return self._series[symbol]
+
+        series = None
+        for extension in ('parquet', 'csv'):
+            path = os.path.join(self.directory, f"{symbol}.{extension}")
+            if not os.path.exists(path):
+                continue
+            try:
+                if extension == 'parquet':
+                    frame = pd.read_parquet(path)
+                else:
+                    frame = pd.read_csv(path, index_col=0, parse_dates=True)
+            except Exception as e:
+                logger.warning(f"Could not read {path}: {e}")
+                continue
+
+            column = next((c for c in ('close', 'Close') if c in frame.columns), frame.columns[0])
+            series = frame[column].astype(float)
+            series.index = pd.to_datetime(series.index)
+            if series.index.tz is not None:
+                series.index = series.index.tz_localize(None)
+            series = series.sort_index()
+            break
+
+        self._series[symbol] = series
+        return series
+
+    def fetch_history(self, symbols: List[str], start: datetime, end: datetime,
+                      asset_class: str, interval: str = '1d') -> pd.DataFrame:
+        minutes = Config.INTERVALS[interval]['minutes']
+        data = {}
+        for symbol in symbols:
+            series = self._load(symbol)
+            if series is not None:
+                series = series.loc[pd.Timestamp(start):pd.Timestamp(end)]
+                if minutes < 1440:
+                    # Files may hold finer bars: keep the last price of each interval
+                    series = series.resample(f'{minutes}min').last().dropna()
+                data[symbol] = series
+            else:
+                logger.warning(f"No local data file for {symbol}")
+        return pd.DataFrame(data)
+
+
+class HttpApiProvider(MarketDataProvider):
+    """
+    Prices from the raw Yahoo chart and CoinGecko HTTP APIs.
+
+    Unlike the live path (yfinance), every call is a plain HTTP request to
+    Config.YAHOO_CHART_URL / Config.COINGECKO_API_URL, so both can point at
+    a local mock upstream for load tests. Stocks are fetched one chart per
+    symbol on a small thread pool; crypto uses CoinGecko market_chart and a
+    batched simple/price call. 429 responses are retried after Retry-After.
+    """
+
+    name = 'http'
+
+    MAX_RETRIES = 3
+    HEADERS = {'User-Agent': 'Mozilla/5.0'}
+
+    def __init__(self, yahoo_url: Optional[str] = None, coingecko_url: Optional[str] = None,
+                 max_workers: int = 8, timeout: float = 30):
+        self.yahoo_url = yahoo_url or Config.YAHOO_CHART_URL
+        self.coingecko_url = coingecko_url or Config.COINGECKO_API_URL
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(self.HEADERS)
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='http-provider')
+
+    def _get(self, url: str, upstream: str, params: Dict) -> Optional[Dict]:
+        """GET a JSON document; None when the resource does not exist or retries are exhausted"""
+        for attempt in range(self.MAX_RETRIES):
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except requests.exceptions.RequestException as e:
+                metrics.inc('upstream_requests_total', provider=upstream, status='error')
+                logger.warning(f"{upstream} request failed: {e}")
+                return None
+            metrics.observe('upstream_request_duration_seconds', time.perf_counter() - start, provider=upstream)
+            metrics.inc('upstream_requests_total', provider=upstream, status=response.status_code)
+
+            if response.status_code == 429 and attempt < self.MAX_RETRIES - 1:
+                metrics.inc('upstream_retries_total', reason='rate_limit')
+                time.sleep(min(float(response.headers.get('Retry-After', 2 ** attempt)), 10))
+                continue
+            if response.status_code != 200:
+                return None
+            return response.json()
+        return None
+
+    @staticmethod
+    def _coingecko_id(symbol: str) -> str:
+        return Config.CRYPTO_ASSETS.get(symbol, symbol.lower())
+
+    def _fetch_chart(self, symbol: str, start: datetime, end: datetime, interval: str) -> Optional[pd.Series]:
+        data = self._get(f"{self.yahoo_url}/{symbol}", 'yahoo', {
+            'period1': int(pd.Timestamp(start).timestamp()),
+            'period2': int(pd.Timestamp(end).timestamp()),
+            'interval': interval
+        })
+        results = ((data or {}).get('chart') or {}).get('result')
+        if not results or not results[0].get('timestamp'):
+            return None
+
+        result = results[0]
+        closes = result['indicators']['quote'][0]['close']
+        index = pd.to_datetime(result['timestamp'], unit='s')
+        if interval == '1d':
+            index = index.normalize()
+        return pd.Series(closes, index=index, name=symbol, dtype=float)
+
+    def _fetch_market_chart(self, symbol: str, start: datetime, end: datetime, interval: str) -> Optional[pd.Series]:
+        days = max((pd.Timestamp(end) - pd.Timestamp(start)).days, 1)
+        params = {'vs_currency': 'usd', 'days': days}
+        if interval == '1d':
+            params['interval'] = 'daily'
+        # Otherwise CoinGecko picks the granularity: 5-minute up to 1 day, hourly up to 90 days
+        data = self._get(f"{self.coingecko_url}/coins/{self._coingecko_id(symbol)}/market_chart", 'coingecko', params)
+        prices = (data or {}).get('prices')
+        if not prices:
+            return None
+
+        frame = pd.DataFrame(prices, columns=['timestamp', symbol])
+        series = frame.set_index(pd.to_datetime(frame['timestamp'], unit='ms'))[symbol]
+        rule = 'D' if interval == '1d' else f"{Config.INTERVALS[interval]['minutes']}min"
+        return series.resample(rule).last().dropna().loc[pd.Timestamp(start).normalize():pd.Timestamp(end)]
+
+    def fetch_history(self, symbols: List[str], start: datetime, end: datetime,
+                      asset_class: str, interval: str = '1d') -> pd.DataFrame:
+        fetch = self._fetch_market_chart if asset_class == 'crypto' else self._fetch_chart
+        series = self.pool.map(lambda symbol: fetch(symbol, start, end, interval), symbols)
+        data = {symbol: s for symbol, s in zip(symbols, series) if s is not None}
+        return pd.DataFrame(data)
+
+    def fetch_quotes(self, symbols: List[str], asset_class: str) -> Dict[str, Dict]:
+        if asset_class != 'crypto':
+            return super().fetch_quotes(symbols, asset_class)
+
+        ids = {self._coingecko_id(symbol): symbol for symbol in symbols}
+        data = self._get(f"{self.coingecko_url}/simple/price", 'coingecko', {
+            'ids': ','.join(ids),
+            'vs_currencies': 'usd',
+            'include_last_updated_at': 'true'
+        }) or {}
+
+        quotes = {}
+        for coin_id, symbol in ids.items():
+            entry = data.get(coin_id)
+            if entry and 'usd' in entry:
+                updated_at = entry.get('last_updated_at')
+                quotes[symbol] = {
+                    'price': float(entry['usd']),
+                    'timestamp': (datetime.fromtimestamp(updated_at) if updated_at else datetime.now()).isoformat(),
+                    'source': 'coingecko'
+                }
+        return quotes
+
+
+def create_provider(name: Optional[str] = None) -> Optional[MarketDataProvider]:
+    """
+    Build the provider configured by DATA_PROVIDER.
+
+    'live' (the default) returns None: DataFetcher then uses Yahoo Finance
+    and CoinGecko directly.
+    """
+    name = (name or Config.DATA_PROVIDER).lower()
+    if name == 'live':
+        return None
+    if name == 'http':
+        return HttpApiProvider()
+    if name == 'synthetic':
+        return SyntheticProvider(seed=Config.SYNTHETIC_SEED)
+    if name == 'local':
+        return LocalFileProvider(Config.LOCAL_DATA_DIR)
+    raise ValueError(f"Unknown data provider: {name}")
@@ -0,0 +1,34 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket.
+
+    Allows `rate` calls per second on average, with bursts of up to `burst`
+    calls. `acquire()` blocks until a token is available, so callers running
+    concurrently in a thread pool share the same upstream budget.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a call is allowed"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_time = (1 - self._tokens) / self.rate
+
+            time.sleep(wait_time)
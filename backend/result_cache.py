@@ -0,0 +1,49 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class ResultCache:
+    """
+    In-memory LRU cache of computed results (a correlation matrix and what
+    is derived from it), with a TTL.
+
+    Keys embed the version of the returns the result was computed from, so
+    a refetch of the prices naturally misses; entries are small dicts of
+    artifacts that callers extend by putting a new dict under the same key.
+    """
+
+    def __init__(self, max_entries: int, ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (stored_at, value), least recently used first
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry[0] >= self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: str, value: Dict[str, Any]):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'max_entries': self.max_entries}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
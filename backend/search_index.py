@@ -0,0 +1,173 @@
+import re
+import threading
+import unicodedata
+from typing import Dict, List, Optional
+
+# Relevance scores, consistent with the scores used by DataFetcher search
+EXACT_NAME_SCORE = 100
+EXACT_SYMBOL_SCORE = 95
+NAME_PREFIX_SCORE = 90
+SYMBOL_PREFIX_SCORE = 85
+WORD_PREFIX_SCORE = 80
+WORD_MATCH_SCORE = 70
+
+# Tokens shorter than this only match exactly (avoids 'a' matching everything)
+MIN_PREFIX_LENGTH = 2
+
+_TOKEN_SPLIT = re.compile(r"[^0-9a-z&^=.]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase and strip accents so that 'Pétrole' matches 'petrole'"""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower().strip()
+
+
+def tokenize(text: str) -> List[str]:
+    """Split normalized text into search tokens"""
+    return [token for token in _TOKEN_SPLIT.split(normalize(text)) if token]
+
+
+class _TrieNode:
+    __slots__ = ('children', 'ids')
+
+    def __init__(self):
+        self.children = {}
+        self.ids = set()
+
+
+class AssetSearchIndex:
+    """
+    In-memory asset search index.
+
+    Each entry (name -> symbol) is indexed three ways:
+    - a token inverted index for whole-word matches,
+    - a prefix trie over tokens, full names and symbols, where each node
+      holds the ids of every entry below it, so a prefix lookup costs
+      O(len(prefix)) regardless of the index size,
+    - exact lookups on the normalized name and symbol.
+
+    The index is built once from the static mappings and can be extended at
+    runtime with symbols discovered through the upstream search APIs.
+    """
+
+    def __init__(self):
+        self._entries = []
+        self._keys = {}
+        self._names = {}
+        self._symbols = {}
+        self._tokens = {}
+        self._name_trie = _TrieNode()
+        self._token_trie = _TrieNode()
+        self._symbol_trie = _TrieNode()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, name: str, symbol: str, category: str, source: str, **extra) -> int:
+        """Add an entry (or update an existing one) and return its id"""
+        key = (source, normalize(name), symbol.upper())
+
+        with self._lock:
+            if key in self._keys:
+                entry_id = self._keys[key]
+                self._entries[entry_id].update(extra)
+                return entry_id
+
+            entry_id = len(self._entries)
+            self._entries.append({
+                'name': name,
+                'symbol': symbol,
+                'category': category,
+                'source': source,
+                **extra
+            })
+            self._keys[key] = entry_id
+
+            normalized_name = normalize(name)
+            normalized_symbol = normalize(symbol)
+            self._names.setdefault(normalized_name, set()).add(entry_id)
+            self._symbols.setdefault(normalized_symbol, set()).add(entry_id)
+            self._insert(self._name_trie, normalized_name, entry_id)
+            self._insert(self._symbol_trie, normalized_symbol, entry_id)
+
+            for token in set(tokenize(name)):
+                self._tokens.setdefault(token, set()).add(entry_id)
+                self._insert(self._token_trie, token, entry_id)
+
+            return entry_id
+
+    def add_mappings(self, mappings: Dict[str, Dict], source: str, default_category: Optional[str] = None):
+        """Bulk-add a {name: {'symbol': ..., 'category': ..., ...}} mapping"""
+        for name, info in mappings.items():
+            extra = {k: v for k, v in info.items() if k not in ('symbol', 'category')}
+            self.add(name, info['symbol'], info.get('category', default_category), source, **extra)
+
+    def search(self, query: str, source: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Return matching entries with a 'relevance' score, best first.
+
+        Only the best-scoring entry is kept for each (source, symbol).
+        """
+        normalized_query = normalize(query)
+        query_tokens = tokenize(query)
+        if not normalized_query:
+            return []
+
+        scores = {}
+
+        def score(ids, value):
+            for entry_id in ids:
+                if scores.get(entry_id, 0) < value:
+                    scores[entry_id] = value
+
+        with self._lock:
+            score(self._names.get(normalized_query, ()), EXACT_NAME_SCORE)
+            score(self._symbols.get(normalized_query, ()), EXACT_SYMBOL_SCORE)
+
+            if len(normalized_query) >= MIN_PREFIX_LENGTH:
+                score(self._lookup(self._name_trie, normalized_query), NAME_PREFIX_SCORE)
+                score(self._lookup(self._symbol_trie, normalized_query), SYMBOL_PREFIX_SCORE)
+
+            # Every query word is the start of a word of the name
+            prefix_sets = [
+                self._lookup(self._token_trie, token)
+                for token in query_tokens if len(token) >= MIN_PREFIX_LENGTH
+            ]
+            if prefix_sets and len(prefix_sets) == len(query_tokens):
+                score(set.intersection(*prefix_sets), WORD_PREFIX_SCORE)
+
+            # At least one whole word in common
+            for token in query_tokens:
+                if len(token) >= MIN_PREFIX_LENGTH:
+                    score(self._tokens.get(token, ()), WORD_MATCH_SCORE)
+
+            best = {}
+            for entry_id, relevance in scores.items():
+                entry = self._entries[entry_id]
+                if source and entry['source'] != source:
+                    continue
+                key = (entry['source'], entry['symbol'])
+                if key not in best or best[key]['relevance'] < relevance:
+                    best[key] = {**entry, 'relevance': relevance}
+
+        results = sorted(best.values(), key=lambda x: (-x['relevance'], x['name'].lower()))
+        return results[:limit] if limit else results
+
+    @staticmethod
+    def _insert(root: _TrieNode, key: str, entry_id: int):
+        node = root
+        node.ids.add(entry_id)
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+            node.ids.add(entry_id)
+
+    @staticmethod
+    def _lookup(root: _TrieNode, prefix: str) -> set:
+        node = root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return set()
+        return node.ids
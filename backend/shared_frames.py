@@ -0,0 +1,266 @@
+import atexit
+import hashlib
+import json
+import struct
+import threading
+import time
+import logging
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Segment layout: [header length (8 bytes)][JSON header][padding][float32/float64 values][int64 index]
+_HEADER_SIZE = struct.Struct('<Q')
+_ALIGNMENT = 64
+
+
+def _aligned(offset: int) -> int:
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+class SharedFrameStore:
+    """
+    Float DataFrames with a DatetimeIndex stored in named POSIX shared memory.
+
+    Every gunicorn worker computes the same segment name from the same key,
+    so a frame published by one worker is mapped by the others without
+    being fetched or copied again: `get()` returns a DataFrame whose values
+    and index are read-only views on the shared segment.
+
+    Segments carry their creation time and expire after `ttl` seconds. A
+    worker unlinks the segments it created once they expire, when it goes
+    over `max_bytes`, or when it exits (multiprocessing resource tracker).
+    Unlinking only removes the name: workers that already mapped the
+    segment keep a valid view until they drop it.
+    """
+
+    def __init__(self, ttl: int, max_bytes: int, prefix: str = 'cacm'):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.prefix = prefix
+        self._created = {}   # name -> (SharedMemory, created_at, size), oldest first
+        self._attached = {}  # name -> (SharedMemory, frame, created_at)
+        self._retired = []   # segments that could not be closed yet (views still in use)
+        self._lock = threading.Lock()
+        atexit.register(self.clear)
+
+    def _name(self, key: str) -> str:
+        return f"{self.prefix}_{hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]}"
+
+    @staticmethod
+    def _header(segment: shared_memory.SharedMemory) -> Dict:
+        (header_length,) = _HEADER_SIZE.unpack_from(segment.buf, 0)
+        return json.loads(bytes(segment.buf[_HEADER_SIZE.size:_HEADER_SIZE.size + header_length]))
+
+    @classmethod
+    def _read(cls, segment: shared_memory.SharedMemory):
+        """Map a segment as (DataFrame of read-only views, created_at)"""
+        header = cls._header(segment)
+        rows, cols = header['shape']
+
+        values = np.ndarray((rows, cols), dtype=np.dtype(header.get('dtype', 'float64')), buffer=segment.buf,
+                            offset=header['values_offset'])
+        index = np.ndarray((rows,), dtype=np.int64, buffer=segment.buf, offset=header['index_offset'])
+        values.flags.writeable = False
+        index.flags.writeable = False
+
+        frame = pd.DataFrame(values, index=pd.DatetimeIndex(index.view('datetime64[ns]')),
+                             columns=header['columns'], copy=False)
+        frame.attrs.update(header['attrs'])
+        frame.attrs['shared_created_at'] = header['created_at']
+        return frame, header['created_at']
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """Return the shared frame for `key`, or None if missing or expired"""
+        name = self._name(key)
+        now = time.time()
+
+        with self._lock:
+            attached = self._attached.get(name)
+            if attached and now - attached[2] < self.ttl:
+                return attached[1]
+            if attached:
+                self._detach(name)
+
+            try:
+                segment = shared_memory.SharedMemory(name=name)
+            except FileNotFoundError:
+                return None
+            # Attaching registers the segment with this process's resource tracker,
+            # which would unlink it on exit although another worker owns it
+            if name not in self._created:
+                resource_tracker.unregister(segment._name, 'shared_memory')
+
+            try:
+                frame, created_at = self._read(segment)
+            except (ValueError, KeyError, struct.error) as e:
+                # Segment still being written by its creator, or corrupt
+                logger.debug(f"Could not read shared frame {name}: {e}")
+                segment.close()
+                return None
+
+            if now - created_at >= self.ttl:
+                del frame
+                segment.close()
+                return None
+
+            self._attached[name] = (segment, frame, created_at)
+            return frame
+
+    def put(self, key: str, frame: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """
+        Publish a float frame with a DatetimeIndex; return the shared view of it.
+
+        float32 frames (intraday bars) are stored as float32, anything else as
+        float64. Returns None (and publishes nothing) for frames that cannot
+        be stored: empty, non-numeric or without a DatetimeIndex.
+        """
+        if frame.empty or not isinstance(frame.index, pd.DatetimeIndex):
+            return None
+        try:
+            dtype = np.float32 if (frame.dtypes == np.float32).all() else np.float64
+            values = np.ascontiguousarray(frame.to_numpy(dtype=dtype))
+        except (TypeError, ValueError):
+            return None
+        index = frame.index.as_unit('ns').asi8
+
+        created_at = time.time()
+        header = {
+            'shape': list(values.shape),
+            'dtype': values.dtype.name,
+            'columns': [str(c) for c in frame.columns],
+            'attrs': frame.attrs,
+            'created_at': created_at
+        }
+        # Offsets depend on the header length, which depends on the offsets: reserve room for them
+        header.update(values_offset=0, index_offset=0)
+        try:
+            header_length = len(json.dumps(header).encode('utf-8')) + 64
+        except TypeError:
+            logger.debug(f"Frame attrs are not JSON-serializable, not sharing {key}")
+            return None
+        header['values_offset'] = _aligned(_HEADER_SIZE.size + header_length)
+        header['index_offset'] = _aligned(header['values_offset'] + values.nbytes)
+        size = header['index_offset'] + index.nbytes
+        encoded = json.dumps(header).encode('utf-8')
+
+        name = self._name(key)
+        with self._lock:
+            self._evict(size)
+            # Replaced below: drop the mapping of the previous copy first
+            if name in self._attached:
+                self._detach(name)
+            if name in self._created:
+                self._unlink(name)
+            try:
+                segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+            except FileExistsError:
+                # Another worker published it first, or left an expired copy behind
+                if not self._remove_expired(name):
+                    return None
+                try:
+                    segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+                except OSError:
+                    return None
+            except OSError as e:
+                logger.warning(f"Could not create shared frame {name}: {e}")
+                return None
+
+            segment.buf[_HEADER_SIZE.size + len(encoded):header['values_offset']] = bytes(
+                header['values_offset'] - _HEADER_SIZE.size - len(encoded))
+            segment.buf[header['values_offset']:header['values_offset'] + values.nbytes] = values.tobytes()
+            segment.buf[header['index_offset']:size] = index.tobytes()
+            segment.buf[_HEADER_SIZE.size:_HEADER_SIZE.size + len(encoded)] = encoded
+            # Written last: readers ignore the segment until the header length is set
+            _HEADER_SIZE.pack_into(segment.buf, 0, len(encoded))
+
+            self._created[name] = (segment, created_at, size)
+            shared, _ = self._read(segment)
+            self._attached[name] = (segment, shared, created_at)
+            return shared
+
+    def _evict(self, incoming: int):
+        """Unlink this worker's expired segments, then the oldest ones until `incoming` fits"""
+        now = time.time()
+        for name, (_, _, created_at) in list(self._attached.items()):
+            if now - created_at >= self.ttl:
+                self._detach(name)
+        self._retired = [segment for segment in self._retired if not self._close(segment)]
+
+        for name, (_, created_at, _) in list(self._created.items()):
+            if now - created_at >= self.ttl:
+                self._unlink(name)
+
+        total = sum(size for _, _, size in self._created.values())
+        for name, (_, _, size) in list(self._created.items()):
+            if total + incoming <= self.max_bytes:
+                break
+            self._unlink(name)
+            total -= size
+
+    def _remove_expired(self, name: str) -> bool:
+        """Unlink another worker's segment if it expired; True when the name is free"""
+        try:
+            segment = shared_memory.SharedMemory(name=name)
+        except FileNotFoundError:
+            return True
+        try:
+            expired = time.time() - self._header(segment)['created_at'] >= self.ttl
+        except (ValueError, KeyError, struct.error):
+            expired = False
+        if expired:
+            try:
+                # Also drops the registration attaching made with the resource tracker
+                segment.unlink()
+            except FileNotFoundError:
+                resource_tracker.unregister(segment._name, 'shared_memory')
+        else:
+            # Not ours: keep the resource tracker from unlinking it on exit
+            resource_tracker.unregister(segment._name, 'shared_memory')
+        self._close(segment)
+        return expired
+
+    def _unlink(self, name: str):
+        segment, _, _ = self._created.pop(name)
+        try:
+            segment.unlink()
+        except FileNotFoundError:
+            # Already removed by another worker as expired
+            resource_tracker.unregister(segment._name, 'shared_memory')
+        if name not in self._attached:
+            self._close(segment)
+
+    def _detach(self, name: str):
+        segment, _, _ = self._attached.pop(name)
+        if name not in self._created:
+            self._close(segment)
+
+    def _close(self, segment: shared_memory.SharedMemory) -> bool:
+        """Close a mapping; if a caller still holds a view on it, retry on a later eviction"""
+        try:
+            segment.close()
+            return True
+        except BufferError:
+            if segment not in self._retired:
+                self._retired.append(segment)
+            return False
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'created': len(self._created),
+                'created_bytes': sum(size for _, _, size in self._created.values()),
+                'attached': len(self._attached)
+            }
+
+    def clear(self):
+        """Unlink every segment created by this worker and drop attached ones"""
+        with self._lock:
+            for name in list(self._attached):
+                self._detach(name)
+            for name in list(self._created):
+                self._unlink(name)
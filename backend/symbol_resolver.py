@@ -0,0 +1,84 @@
+import json
+import time
+import logging
+from typing import Dict, Optional, Tuple
+
+from persistent_cache import PersistentCache
+
+logger = logging.getLogger(__name__)
+
+
+class SymbolResolver:
+    """
+    Persistent symbol resolution table.
+
+    Maps (source, symbol) to what we learned about it upstream: the provider
+    id (CoinGecko coin id, Yahoo ticker), display name, category, currency
+    and when it was validated. Symbols that upstream does not know are
+    stored as negative entries with a shorter TTL, so repeated lookups of an
+    unknown symbol do not spend the rate-limit budget again.
+
+    The table can be preloaded from a JSON file of the form
+    {"coingecko": {"PEPE": {"provider_id": "pepe", "name": "Pepe"}}, "yahoo": {...}}
+    where a null entry marks a known-unknown symbol.
+    """
+
+    def __init__(self, path: str, ttl: int, negative_ttl: int, preload_file: Optional[str] = None):
+        self.negative_ttl = negative_ttl
+        self._cache = PersistentCache(path, ttl=ttl)
+        if preload_file:
+            self.preload(preload_file)
+
+    @staticmethod
+    def _key(source: str, symbol: str) -> str:
+        return f"{source}:{symbol.upper()}"
+
+    def lookup(self, source: str, symbol: str) -> Tuple[bool, Optional[Dict]]:
+        """Return (found, entry); entry is None for a known-unknown symbol"""
+        return self._cache.lookup(self._key(source, symbol))
+
+    def record(self, source: str, symbol: str, provider_id: str, name: Optional[str] = None,
+               category: Optional[str] = None, currency: str = 'USD', save: bool = True, **extra) -> Dict:
+        """Store a successful resolution"""
+        entry = {
+            'symbol': symbol.upper(),
+            'source': source,
+            'provider_id': provider_id,
+            'name': name,
+            'category': category,
+            'currency': currency,
+            'validated_at': time.time(),
+            **extra
+        }
+        self._cache.set(self._key(source, symbol), entry)
+        if save:
+            self._cache.save()
+        return entry
+
+    def record_unknown(self, source: str, symbol: str, save: bool = True):
+        """Store a negative resolution (symbol not found upstream)"""
+        self._cache.set(self._key(source, symbol), None, ttl=self.negative_ttl)
+        if save:
+            self._cache.save()
+
+    def preload(self, path: str):
+        """Load resolutions from a JSON file, overriding cached ones"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                table = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not preload symbol resolutions from {path}: {e}")
+            return
+
+        count = 0
+        for source, symbols in table.items():
+            for symbol, entry in symbols.items():
+                if entry is None:
+                    self.record_unknown(source, symbol, save=False)
+                else:
+                    entry = {k: v for k, v in entry.items() if k not in ('symbol', 'source', 'validated_at')}
+                    self.record(source, symbol, entry.pop('provider_id', symbol), save=False, **entry)
+                count += 1
+
+        self._cache.save()
+        logger.info(f"Preloaded {count} symbol resolutions from {path}")
@@ -107,18 +107,94 @@ const API = {
     },
     
     // Calculate correlation matrix
-    async calculateCorrelation(assets, period, correlationMethod = 'pearson', returnsMethod = 'log') {
+    // seriation: also return a clustering order of the assets for the heatmap
+    async calculateCorrelation(assets, period, correlationMethod = 'pearson', returnsMethod = 'log', seriation = false) {
         return this.request('/correlation', {
             method: 'POST',
             body: JSON.stringify({
                 assets,
                 period,
                 correlation_method: correlationMethod,
-                returns_method: returnsMethod
+                returns_method: returnsMethod,
+                seriation
             })
         });
     },
     
+    // Calculate correlation matrix progressively (NDJSON stream)
+    // onSection(section, data) is called for each section as soon as it arrives:
+    // 'matrix' first, then 'pairs', 'betas', 'statistics' and 'performance'
+    async streamCorrelation(assets, period, onSection, correlationMethod = 'pearson', returnsMethod = 'log', seriation = false) {
+        const controller = new AbortController();
+        const timeoutId = setTimeout(() => controller.abort(), this.timeout);
+
+        try {
+            const response = await fetch(`${this.baseURL}/correlation/stream`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json'
+                },
+                signal: controller.signal,
+                body: JSON.stringify({
+                    assets,
+                    period,
+                    correlation_method: correlationMethod,
+                    returns_method: returnsMethod,
+                    seriation
+                })
+            });
+
+            if (!response.ok) {
+                let errorMessage;
+                try {
+                    const error = await response.json();
+                    errorMessage = error.error || `Erreur HTTP ${response.status}`;
+                } catch {
+                    errorMessage = `Erreur HTTP ${response.status}`;
+                }
+                throw new Error(errorMessage);
+            }
+
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+
+            const handleLine = (line) => {
+                if (!line.trim()) return;
+                const message = JSON.parse(line);
+                if (message.section === 'error') {
+                    throw new Error(message.data.error);
+                }
+                if (message.section !== 'done') {
+                    onSection(message.section, message.data);
+                }
+            };
+
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+
+                buffer += decoder.decode(value, { stream: true });
+                const lines = buffer.split('\n');
+                buffer = lines.pop();
+                lines.forEach(handleLine);
+            }
+            handleLine(buffer + decoder.decode());
+
+        } catch (error) {
+            if (error.name === 'AbortError') {
+                throw new Error('La requête a expiré. Le serveur met trop de temps à répondre.');
+            }
+            if (error.message === 'Failed to fetch') {
+                throw new Error('Impossible de se connecter au serveur. Vérifiez que le backend est démarré.');
+            }
+            console.error('API stream failed:', error);
+            throw error;
+        } finally {
+            clearTimeout(timeoutId);
+        }
+    },
+
     // Get latest prices
     async getLatestPrices(assets) {
         return this.request('/prices', {
@@ -127,6 +203,23 @@ const API = {
         });
     },
     
+    // Subscribe to live price updates (Server-Sent Events)
+    // assets: { crypto: [...], stocks: [...], etfs: [...], commodities: [...] }
+    // Returns the EventSource; call .close() to unsubscribe
+    subscribePrices(assets, onPrices) {
+        const params = new URLSearchParams();
+        for (const [category, symbols] of Object.entries(assets)) {
+            if (symbols && symbols.length > 0) {
+                params.set(category, symbols.join(','));
+            }
+        }
+
+        const source = new EventSource(`${this.baseURL}/prices/stream?${params.toString()}`);
+        source.addEventListener('prices', (event) => onPrices(JSON.parse(event.data)));
+        source.onerror = (error) => console.warn('Price stream interrupted, reconnecting...', error);
+        return source;
+    },
+    
     // Search for assets in Yahoo Finance and CoinGecko
     async searchAssets(query) {
         return this.request('/search-assets', {
@@ -148,14 +241,13 @@ const API = {
         });
     },
 
-    // Export correlation data
-    async exportData(correlationMatrix) {
-        return this.request('/export', {
-            method: 'POST',
-            body: JSON.stringify({
-                correlation_matrix: correlationMatrix
-            })
-        });
+    // Download URL of an analysis result, streamed by the server (csv, parquet or xlsx)
+    exportUrl(resultId, format = 'csv', sheets = []) {
+        const params = new URLSearchParams({ format });
+        if (sheets.length) {
+            params.set('sheets', sheets.join(','));
+        }
+        return `${this.baseURL}/export/${encodeURIComponent(resultId)}?${params}`;
     },
     
     // Health check
@@ -17,6 +17,9 @@ const App = {
         },
         currentData: null,
         loading: false,
+        livePrices: {}, // Dernières cotations reçues par symbole technique
+        priceStream: null,
+        priceStreamKey: '',
         displayToTechnicalMapping: {} // Mapping symbole affiché -> symbole technique
     },
     
@@ -227,6 +230,7 @@ const App = {
         selectedList.innerHTML = allSelected.map(item => `
             <span class="selected-tag">
                 ${item.displaySymbol}
+                <span class="selected-tag-price" data-technical-symbol="${item.technicalSymbol}">${this.formatLivePrice(item.technicalSymbol)}</span>
                 <i class="fas fa-times remove-btn" data-display-symbol="${item.displaySymbol}" data-technical-symbol="${item.technicalSymbol}" data-category="${item.category}"></i>
             </span>
         `).join('');
@@ -236,6 +240,41 @@ const App = {
         
         // Enable/disable calculate button
         document.getElementById('calculate-btn').disabled = allSelected.length < 2;
+        
+        // Follow the prices of the new selection (grouped: several changes in a row reconnect once)
+        clearTimeout(this.priceStreamTimer);
+        this.priceStreamTimer = setTimeout(() => this.updatePriceStream(), 300);
+    },
+    
+    // Subscribe to live prices of the selected assets, reopening the stream when the selection changed
+    updatePriceStream() {
+        const key = JSON.stringify(this.state.selectedAssets);
+        if (key === this.state.priceStreamKey) {
+            return;
+        }
+        this.state.priceStreamKey = key;
+        
+        if (this.state.priceStream) {
+            this.state.priceStream.close();
+            this.state.priceStream = null;
+        }
+        if (Object.values(this.state.selectedAssets).flat().length > 0) {
+            this.state.priceStream = API.subscribePrices(this.state.selectedAssets, (quotes) => this.renderLivePrices(quotes));
+        }
+    },
+    
+    // Show the quotes of a price event in the selected tags
+    renderLivePrices(quotes) {
+        Object.assign(this.state.livePrices, quotes);
+        document.querySelectorAll('.selected-tag-price').forEach(element => {
+            element.textContent = this.formatLivePrice(element.dataset.technicalSymbol);
+        });
+    },
+    
+    // Last known price of a selected asset, empty until the first quote
+    formatLivePrice(technicalSymbol) {
+        const quote = this.state.livePrices[technicalSymbol];
+        return quote && quote.price != null ? `$${this.formatPrice(quote.price)}` : '';
     },
     
     // Helper function to find display symbol from technical symbol
@@ -278,39 +317,31 @@ const App = {
             '90d': '90 jours',
             '180d': '6 mois',
             '1y': '1 an',
+            '5y': '5 ans',
+            '10y': '10 ans',
+            'max': '25 ans',
             'ytd': "depuis le début de l'année"
         };
 
         this.showLoading(true, `Récupération des données pour ${totalAssets} actifs sur ${periodLabels[period] || period}...`);
 
         try {
-            // Calculate correlation
-            const data = await API.calculateCorrelation(
-                this.state.selectedAssets,
-                period,
-                correlationMethod
-            );
-
+            // Stream the correlation: the heatmap is rendered as soon as the
+            // matrix arrives, the other sections fill in as they complete
+            const data = {};
             this.state.currentData = data;
 
-            // Show results section
-            document.getElementById('results-section').style.display = 'block';
-
-            // Update visualizations
-            ChartModule.createCorrelationHeatmap(data.correlation_matrix, data.assets, data.asset_names);
-            ChartModule.updateMetrics(data);
-            ChartModule.displayCorrelationPairs(
-                data.highly_correlated.positive,
-                data.highly_correlated.negative,
-                data.asset_names
+            await API.streamCorrelation(
+                this.state.selectedAssets,
+                period,
+                (section, payload) => {
+                    Object.assign(data, payload);
+                    this.renderSection(section, data, period);
+                },
+                correlationMethod,
+                'log',
+                true // Heatmap in clustering order, computed by the server
             );
-            ChartModule.createStatisticsTable(data.statistics, data.betas, data.asset_names);
-
-            // Create performance comparison
-            ChartModule.createPerformanceComparison(data.performance_comparison, data.asset_names, period);
-
-            // Enable export button
-            document.getElementById('export-btn').disabled = false;
 
             // Show success message
             this.showSuccess(
@@ -318,9 +349,6 @@ const App = {
                 'Calcul terminé'
             );
 
-            // Scroll to results
-            document.getElementById('results-section').scrollIntoView({ behavior: 'smooth' });
-
         } catch (error) {
             this.showError(error.message || 'Erreur lors du calcul');
             console.error('Correlation calculation error:', error);
@@ -328,33 +356,58 @@ const App = {
             this.showLoading(false);
         }
     },
-    
 
-    
-    // Export data
-    async exportData() {
-        if (!this.state.currentData) return;
-        
-        try {
-            const exportData = await API.exportData(this.state.currentData.correlation_matrix);
-            
-            // Create download link
-            const blob = new Blob([exportData.csv], { type: 'text/csv' });
-            const url = window.URL.createObjectURL(blob);
-            const a = document.createElement('a');
-            a.href = url;
-            a.download = exportData.filename;
-            document.body.appendChild(a);
-            a.click();
-            window.URL.revokeObjectURL(url);
-            document.body.removeChild(a);
-            
-            this.showSuccess('Données exportées avec succès', 'Export terminé');
-        } catch (error) {
-            this.showError('Erreur lors de l\'export');
-            console.error(error);
+    // Render one streamed section of the correlation results
+    renderSection(section, data, period) {
+        switch (section) {
+            case 'matrix':
+                // Show results section
+                document.getElementById('results-section').style.display = 'block';
+
+                ChartModule.createCorrelationHeatmap(
+                    data.correlation_matrix,
+                    data.seriation ? data.seriation.order : data.assets,
+                    data.asset_names
+                );
+                ChartModule.updateMetrics(data);
+
+                // Enable export button
+                document.getElementById('export-btn').disabled = false;
+
+                // The heatmap is usable now, the remaining sections follow
+                this.showLoading(false);
+                document.getElementById('results-section').scrollIntoView({ behavior: 'smooth' });
+                break;
+            case 'pairs':
+                ChartModule.displayCorrelationPairs(
+                    data.highly_correlated.positive,
+                    data.highly_correlated.negative,
+                    data.asset_names
+                );
+                break;
+            case 'statistics':
+                ChartModule.createStatisticsTable(data.statistics, data.betas || {}, data.asset_names);
+                break;
+            case 'performance':
+                ChartModule.createPerformanceComparison(data.performance_comparison, data.asset_names, period);
+                break;
         }
     },
+
+    // Export data
+    exportData() {
+        if (!this.state.currentData || !this.state.currentData.result_id) return;
+        
+        // The server streams the file: the browser downloads it directly
+        const a = document.createElement('a');
+        a.href = API.exportUrl(this.state.currentData.result_id, 'csv');
+        a.download = '';
+        document.body.appendChild(a);
+        a.click();
+        document.body.removeChild(a);
+        
+        this.showSuccess('Téléchargement lancé', 'Export');
+    },
     
     // Show/hide loading spinner with optional message
     showLoading(show, message = 'Chargement des données...') {
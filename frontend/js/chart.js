@@ -240,6 +240,9 @@ const ChartModule = {
             '90d': '90 jours',
             '180d': '6 mois',
             '1y': '1 an',
+            '5y': '5 ans',
+            '10y': '10 ans',
+            'max': '25 ans',
             'ytd': 'Depuis début d\'année'
         };
         const periodLabel = periodLabels[period] || period || 'période sélectionnée'; // Fallback